@@ -0,0 +1,99 @@
+import os
+import time
+import hashlib
+import threading
+
+from path_binary import atomic_write
+from path_data import path_format
+
+class AutoSaver:
+    """
+    后台自动保存
+    submit 只记录最新的路径数据快照，停止提交 delay 秒后由工作线程统一序列化并写入，
+    连续多次提交只写最后一次。写入经临时文件原子替换，内容哈希与上次写入相同时跳过。
+    提交的路径数据由工作线程读取，调用方之后不应再修改它（可传入 PathData.copy()）
+    """
+
+    def __init__(self, delay=1.0):
+        self.delay = delay
+        self.saved_count = 0    # 实际写入次数
+        self.skipped_count = 0  # 内容未变而跳过的次数
+        self._pending = {}   # 文件名 -> 路径数据
+        self._due = 0.0
+        self._hashes = {}    # 文件名 -> 上次写入内容的哈希
+        self._busy = False
+        self._flushing = False
+        self._closed = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def submit(self, filename, path_data):
+        """提交待保存的数据，重新开始计时"""
+        with self._condition:
+            if self._closed:
+                return
+            self._pending[filename] = path_data
+            self._due = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='AutoSaver', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """立即写入等待中的数据并等待完成，返回是否在超时前完成"""
+        with self._condition:
+            self._flushing = True
+            self._condition.notify_all()
+            done = self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+            self._flushing = False
+            return done
+
+    def close(self, timeout=5.0):
+        """写入等待中的数据后停止工作线程"""
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # 等到最后一次提交之后 delay 秒，期间的新提交会推迟写入
+                while not self._flushing and not self._closed:
+                    remaining = self._due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                pending, self._pending = self._pending, {}
+                self._busy = True
+
+            try:
+                for filename, path_data in pending.items():
+                    try:
+                        self._write(filename, path_data)
+                    except Exception as e:
+                        print(f"自动保存出错: {str(e)}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, filename, path_data):
+        """序列化并写入，内容未变时跳过；返回是否写入"""
+        data = path_data.to_bytes(path_format(filename))
+        digest = hashlib.sha1(data).digest()
+        if filename not in self._hashes and os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                self._hashes[filename] = hashlib.sha1(f.read()).digest()
+        if self._hashes.get(filename) == digest:
+            self.skipped_count += 1
+            return False
+        atomic_write(filename, data)
+        self._hashes[filename] = digest
+        self.saved_count += 1
+        return True
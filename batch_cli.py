@@ -0,0 +1,236 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+
+from image_processor import ImageProcessor
+from path_data import PathData
+from path_binary import BINARY_EXTENSION
+from path_codec import CHAIN_EXTENSION
+from profiling import profiler
+from thinning import available_backends
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.bmp')
+# 输出格式 -> 扩展名
+OUTPUT_EXTENSIONS = {'json': '.json', 'binary': BINARY_EXTENSION, 'chain': CHAIN_EXTENSION}
+
+# 各阶段名称，按执行顺序（用于输出表头）
+STAGE_NAMES = ('load', 'preprocess', 'skeletonize', 'extract_paths', 'simplify_paths', 'fit_paths', 'save')
+STAGE_LABELS = ('load', 'preproc', 'skeleton', 'extract', 'simplify', 'fit', 'save')
+
+# 每个工作进程复用一个处理器；批量图像各不相同，不保留预处理缓存
+_processor = None
+
+def _get_processor():
+    global _processor
+    if _processor is None:
+        _processor = ImageProcessor(cache_bytes=0)
+    return _processor
+
+def find_images(directory):
+    """列出目录下支持的图像文件（按文件名排序）"""
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+def output_path(file_path, output_dir, output_format):
+    """图像对应的路径文件名"""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(output_dir, name + OUTPUT_EXTENSIONS[output_format])
+
+def process_image(file_path, output_dir, params):
+    """
+    处理单张图像：预处理 → 骨架提取 → 路径提取 → 路径简化 → 路径拟合，保存为PathData JSON
+    返回包含各阶段耗时（秒）、路径统计和输出文件的字典，出错时包含 error
+    """
+    processor = _get_processor()
+    name = os.path.basename(file_path)
+    timings = {}
+    result = {'file': name, 'timings': timings}
+    cpu_start = time.process_time()
+    if params.get('profile_dir'):
+        profiler.enable(trace_memory=params.get('profile_memory', False))
+        profiler.begin(name)
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return value
+
+    try:
+        image = timed('load', processor.load_image, file_path)
+        if image is None:
+            result['error'] = "无法加载图像文件"
+            return result
+
+        # 与主窗口一致：大图按最长边缩放
+        h, w = image.shape[:2]
+        max_size = params['max_size']
+        if max_size and max(h, w) > max_size:
+            scale = max_size / max(h, w)
+            image = cv2.resize(image, (int(w * scale), int(h * scale)),
+                               interpolation=cv2.INTER_AREA)
+        result['size'] = (image.shape[1], image.shape[0])
+
+        processed = timed('preprocess', processor.preprocess, image,
+                          params['threshold'], params['noise_kernel_size'])
+        skeleton = timed('skeletonize', processor.skeletonize, processed,
+                         thinning_backend=params['thinning_backend'])
+        paths, endpoints, crosspoints = timed('extract_paths', processor.extract_paths, skeleton,
+                                              min_component_size=params['min_component_size'])
+        simplified = timed('simplify_paths', processor.simplify_paths, paths,
+                           params['simplify_tolerance'])
+        fitted_paths = []
+        if params['fit']:
+            fitted_paths = timed('fit_paths', processor.fit_paths, simplified, endpoints, crosspoints,
+                                 line_threshold=params['line_threshold'],
+                                 control_dist_factor=params['control_dist_factor'],
+                                 bezier_tolerance=params['bezier_tolerance'])
+
+        path_data = PathData()
+        path_data.add_path_data(simplified, endpoints, crosspoints, skeleton.shape,
+                                params['simplify_tolerance'])
+        path_data.set_thinning_info(processor.thinning_info)
+        path_data.add_fitted_paths(fitted_paths)
+        output = output_path(file_path, output_dir, params['format'])
+        if not timed('save', path_data.save_to_file, output):
+            result['error'] = "保存路径数据失败"
+            return result
+
+        result.update({
+            'output': output,
+            'paths': len(simplified),
+            'points': sum(len(path) for path in simplified),
+            'fitted': len(fitted_paths),
+        })
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['total'] = sum(timings.values())
+        result['cpu'] = time.process_time() - cpu_start
+        if params.get('profile_dir'):
+            profiler.dump_json(os.path.join(params['profile_dir'],
+                                            os.path.splitext(name)[0] + '.profile.json'))
+    return result
+
+def run_batch(image_files, output_dir, params, workers=1):
+    """按完成顺序逐个产出处理结果；workers为1时在当前进程顺序执行"""
+    if workers <= 1:
+        for file_path in image_files:
+            yield process_image(file_path, output_dir, params)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_image, file_path, output_dir, params)
+                   for file_path in image_files]
+        for future in as_completed(futures):
+            yield future.result()
+
+def format_result(result):
+    """格式化单张图像的处理结果"""
+    name = result['file']
+    if 'error' in result:
+        return f"{name:<24}出错: {result['error']}"
+    size = f"{result['size'][0]}x{result['size'][1]}"
+    stages = ''.join(f"{result['timings'].get(stage, 0) * 1000:>10.1f}" for stage in STAGE_NAMES)
+    return (f"{name:<24}{size:>11}{stages}{result['total'] * 1000:>10.1f}"
+            f"{result['paths']:>8}{result['points']:>9}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量提取图像路径（无界面，多进程）")
+    parser.add_argument('input_dir', help="图像目录")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="路径文件输出目录（默认为图像目录下的 paths 子目录）")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="覆盖已存在的路径文件（默认跳过）")
+    parser.add_argument('--format', default='json', choices=list(OUTPUT_EXTENSIONS),
+                        help="输出格式：json、binary（内存映射二进制）或 chain（链码压缩）")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行进程数（默认CPU核心数）")
+    parser.add_argument('--max-size', type=int, default=1000,
+                        help="图像最长边缩放上限（与主窗口一致，0表示不缩放）")
+    parser.add_argument('--threshold', type=int, default=127, help="二值化阈值")
+    parser.add_argument('--noise', type=int, default=3, help="降噪强度（开运算核大小）")
+    parser.add_argument('--thinning', default='zhang-suen', choices=['auto'] + available_backends(),
+                        help="细化后端（默认zhang-suen；auto：按图像尺寸校准后自动选择最快的拓扑一致后端）")
+    parser.add_argument('--min-component', type=int, default=0,
+                        help="丢弃像素数小于该值的连通分量（0表示保留全部）")
+    parser.add_argument('--simplify', type=float, default=0.0,
+                        help="路径简化容差（像素，0表示不简化）")
+    parser.add_argument('--line-threshold', type=float, default=0.98, help="直线判定阈值")
+    parser.add_argument('--control-dist', type=float, default=0.25, help="控制点距离因子")
+    parser.add_argument('--bezier-tolerance', type=float, default=2.0,
+                        help="曲线拟合容差（像素，0表示单段曲线）")
+    parser.add_argument('--no-fit', action='store_true', help="跳过路径拟合")
+    parser.add_argument('--profile', metavar='DIR', default=None,
+                        help="开启性能分析，每张图像的阶段报告保存到该目录")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="性能分析同时记录峰值内存（tracemalloc，会拖慢处理）")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        print(f"目录不存在: {args.input_dir}")
+        return 1
+    image_files = find_images(args.input_dir)
+    if not image_files:
+        print("所选目录没有支持的图像文件")
+        return 1
+
+    # 默认不写到图像旁边，避免覆盖与图像同名的已有路径文件
+    output_dir = args.output_dir or os.path.join(args.input_dir, 'paths')
+    os.makedirs(output_dir, exist_ok=True)
+    if not args.overwrite:
+        existing = [file_path for file_path in image_files
+                    if os.path.exists(output_path(file_path, output_dir, args.format))]
+        for file_path in existing:
+            print(f"跳过已存在的输出: {output_path(file_path, output_dir, args.format)}")
+        image_files = [file_path for file_path in image_files if file_path not in existing]
+        if not image_files:
+            print("所有图像的输出文件都已存在（使用 --overwrite 覆盖）")
+            return 0
+    params = {
+        'max_size': args.max_size,
+        'threshold': args.threshold,
+        'noise_kernel_size': args.noise,
+        'thinning_backend': args.thinning,
+        'min_component_size': args.min_component,
+        'simplify_tolerance': args.simplify,
+        'line_threshold': args.line_threshold,
+        'control_dist_factor': args.control_dist,
+        'bezier_tolerance': args.bezier_tolerance,
+        'fit': not args.no_fit,
+        'format': args.format,
+        'profile_dir': args.profile,
+        'profile_memory': args.profile_memory,
+    }
+    workers = max(1, min(args.workers, len(image_files)))
+
+    header = ''.join(f"{label:>10}" for label in STAGE_LABELS)
+    print(f"共 {len(image_files)} 张图像，{workers} 个进程（各阶段耗时单位: ms）")
+    print(f"{'image':<24}{'size':>11}{header}{'total':>10}{'paths':>8}{'points':>9}")
+
+    start = time.perf_counter()
+    results = []
+    for result in run_batch(image_files, output_dir, params, workers):
+        results.append(result)
+        print(format_result(result))
+    elapsed = time.perf_counter() - start
+
+    succeeded = [result for result in results if 'error' not in result]
+    busy = sum(result['total'] for result in results)
+    cpu = sum(result['cpu'] for result in results)
+    pixels = sum(result['size'][0] * result['size'][1] for result in succeeded)
+    print(f"\n完成 {len(succeeded)}/{len(results)} 张，耗时 {elapsed:.2f}s，"
+          f"吞吐量 {len(succeeded) / max(elapsed, 1e-9):.2f} 张/s "
+          f"({pixels / 1e6 / max(elapsed, 1e-9):.2f} 百万像素/s)")
+    print(f"单图累计耗时 {busy:.2f}s，CPU时间 {cpu:.2f}s，并行加速比 {busy / max(elapsed, 1e-9):.2f}")
+    return 0 if len(succeeded) == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,879 @@
+import os
+import sys
+import glob
+import json
+import time
+import types
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+# 无界面运行：Qt使用offscreen平台，绘制控制器依赖的pyautogui/win32模块用空实现替代
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+def _install_stubs():
+    """注册pyautogui和win32api/win32con的空实现，避免基准测试移动真实鼠标"""
+    pyautogui = types.ModuleType('pyautogui')
+    for name in ('moveTo', 'mouseDown', 'mouseUp', 'click'):
+        setattr(pyautogui, name, lambda *args, **kwargs: None)
+    pyautogui.FAILSAFE = False
+    pyautogui.PAUSE = 0
+    sys.modules['pyautogui'] = pyautogui
+
+    win32api = types.ModuleType('win32api')
+    win32api.GetAsyncKeyState = lambda key: 0
+    sys.modules.setdefault('win32api', win32api)
+
+    win32con = types.ModuleType('win32con')
+    win32con.VK_RBUTTON = 0x02
+    sys.modules.setdefault('win32con', win32con)
+
+_install_stubs()
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from image_processor import ImageProcessor
+from path_data import PathData
+from path_binary import BINARY_EXTENSION
+from path_codec import CHAIN_EXTENSION, decode_chain
+from path_animator import PathAnimator
+from stroke_order import order_paths
+from thinning import available_backends, run_backend, topology_signature, REFERENCE_BACKEND
+
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage')
+IMAGE_PATTERNS = ('ts*.jpg', '*.png')
+PATH_PATTERN = '[0-9]*.json'
+
+# 结果文件格式版本，比较时不一致则给出提示
+FORMAT_VERSION = 1
+
+
+def legacy_zhang_suen_thinning(binary_image, max_iterations=100):
+    """原逐像素Zhang-Suen实现，仅作为基准和结果校验使用"""
+    def neighbors(x, y, image):
+        return [image[x-1, y], image[x-1, y+1],
+                image[x, y+1], image[x+1, y+1],
+                image[x+1, y], image[x+1, y-1],
+                image[x, y-1], image[x-1, y-1]]
+
+    def transitions(neighbors):
+        n = neighbors + neighbors[0:1]
+        return sum((n1, n2) == (0, 1) for n1, n2 in zip(n, n[1:]))
+
+    if len(binary_image.shape) > 2:
+        binary_image = cv2.cvtColor(binary_image, cv2.COLOR_RGB2GRAY)
+
+    binary_image = binary_image > 127
+    binary_image = binary_image.astype(np.uint8) * 255
+
+    image = binary_image.copy() / 255
+    changing = True
+    iteration = 0
+
+    while changing and iteration < max_iterations:
+        changing = False
+        iteration += 1
+
+        deletion_markers = []
+        for i in range(1, image.shape[0]-1):
+            for j in range(1, image.shape[1]-1):
+                if image[i, j] == 1:
+                    P = neighbors(i, j, image)
+                    if (2 <= sum(P) <= 6 and
+                        transitions(P) == 1 and
+                        P[0] * P[2] * P[4] == 0 and
+                        P[2] * P[4] * P[6] == 0):
+                        deletion_markers.append((i, j))
+        for i, j in deletion_markers:
+            image[i, j] = 0
+            changing = True
+
+        deletion_markers = []
+        for i in range(1, image.shape[0]-1):
+            for j in range(1, image.shape[1]-1):
+                if image[i, j] == 1:
+                    P = neighbors(i, j, image)
+                    if (2 <= sum(P) <= 6 and
+                        transitions(P) == 1 and
+                        P[0] * P[2] * P[6] == 0 and
+                        P[0] * P[4] * P[6] == 0):
+                        deletion_markers.append((i, j))
+        for i, j in deletion_markers:
+            image[i, j] = 0
+            changing = True
+
+    return (image * 255).astype(np.uint8)
+
+
+def legacy_find_special_points(binary):
+    """原逐像素端点/交叉点检测，仅作为基准和结果校验使用"""
+    points = np.column_stack(np.where(binary > 0)[::-1])
+    endpoints = []
+    crosspoints = []
+    neighbors = [(-1,-1), (-1,0), (-1,1),
+                (0,-1),          (0,1),
+                (1,-1),  (1,0),  (1,1)]
+    height, width = binary.shape
+    for x, y in points:
+        neighbor_count = 0
+        for dx, dy in neighbors:
+            nx, ny = x + dx, y + dy
+            if (0 <= nx < width and 0 <= ny < height and
+                binary[ny, nx] > 0):
+                neighbor_count += 1
+        if neighbor_count == 1:
+            endpoints.append((x, y))
+        elif neighbor_count > 2:
+            crosspoints.append((x, y))
+    return endpoints, crosspoints
+
+
+def legacy_extract_path_segments(binary, endpoints, crosspoints):
+    """原逐像素路径追踪，仅作为基准使用"""
+    # 创建所有特殊点的集合
+    special_points = set(tuple(p) for p in endpoints + crosspoints)
+
+    # 获取所有路径点
+    path_points = np.column_stack(np.where(binary > 0)[::-1])
+
+    # 创建已访问点的集合
+    visited = set()
+    paths = []
+
+    # 定义8邻域的偏移量（按顺时针排序）
+    neighbors = [(-1,0), (-1,1), (0,1), (1,1),
+                (1,0), (1,-1), (0,-1), (-1,-1)]
+
+    height, width = binary.shape
+
+    def get_neighbors(point):
+        """获取点的有效邻居（按顺时针顺序）"""
+        x, y = point
+        valid_neighbors = []
+        for dx, dy in neighbors:
+            nx, ny = x + dx, y + dy
+            if (0 <= nx < width and 0 <= ny < height and 
+                binary[ny, nx] > 0 and
+                (nx, ny) not in visited):
+                valid_neighbors.append((nx, ny))
+        return valid_neighbors
+
+    def trace_path(start_point):
+        """从起点追踪路径"""
+        current_path = [start_point]
+        visited.add(start_point)
+        current_point = start_point
+
+        while True:
+            # 获取当前点的未访问邻居
+            next_points = get_neighbors(current_point)
+
+            # 如果没有未访问的邻居，结束路径
+            if not next_points:
+                break
+
+            # 选择最接近当前方向的下一个点
+            if len(current_path) > 1:
+                last_dir = np.array(current_point) - np.array(current_path[-2])
+                next_dirs = [np.array(p) - np.array(current_point) for p in next_points]
+                angles = [np.arctan2(np.cross(last_dir, d), np.dot(last_dir, d)) for d in next_dirs]
+                next_point = next_points[np.argmin(np.abs(angles))]
+            else:
+                next_point = next_points[0]
+
+            # 如果下一个点是特殊点，将其添加到路径后结束
+            if next_point in special_points and len(current_path) > 1:
+                current_path.append(next_point)
+                visited.add(next_point)
+                break
+
+            # 继续路径
+            current_path.append(next_point)
+            visited.add(next_point)
+            current_point = next_point
+
+        return current_path
+
+    # 从每个端点和交叉点开始追踪路径
+    for start_point in special_points:
+        if start_point not in visited:
+            path = trace_path(start_point)
+            if len(path) > 1:
+                paths.append(path)
+            # 从这个点开始向所有未访问的邻居追踪
+            for neighbor in get_neighbors(start_point):
+                if neighbor not in visited:
+                    path = trace_path(start_point)
+                    if len(path) > 1:
+                        paths.append(path)
+
+    # 处理可能的闭合路径
+    for point in path_points:
+        point = tuple(point)
+        if point not in visited:
+            path = trace_path(point)
+            if len(path) > 1:
+                paths.append(path)
+
+    return paths
+
+
+def legacy_bezier_point(points, t):
+    """原递归de Casteljau求点"""
+    if len(points) == 1:
+        return points[0]
+    new_points = []
+    for i in range(len(points) - 1):
+        x = points[i][0] * (1 - t) + points[i + 1][0] * t
+        y = points[i][1] * (1 - t) + points[i + 1][1] * t
+        new_points.append((x, y))
+    return legacy_bezier_point(new_points, t)
+
+
+def legacy_draw_fitted_paths(image_shape, fitted_paths):
+    """原拟合路径绘制：每条曲线逐点求值并逐段调用cv2.line（不含端点标记）"""
+    from bezier_fit import split_segments
+    result = np.zeros((*image_shape[:2], 3), dtype=np.uint8)
+    colors = [(255, 255, 255), (255, 255, 0), (0, 255, 255), (255, 0, 255), (128, 255, 0)]
+    for i, (path_type, path) in enumerate(fitted_paths):
+        color = colors[i % len(colors)]
+        if path_type == 'line':
+            cv2.line(result, path[0], path[1], color, 2)
+            continue
+        if len(path) > 4 and (len(path) - 1) % 3 == 0:
+            curves = split_segments(path)
+        else:
+            curves = [np.array(path)]
+        for points in curves:
+            prev_point = None
+            for t in np.linspace(0, 1, 200):
+                current_point = tuple(map(int, legacy_bezier_point(points, t)))
+                if prev_point is not None:
+                    cv2.line(result, prev_point, current_point, color, 2)
+                prev_point = current_point
+    return result
+
+
+def legacy_draw_paths(image_shape, paths):
+    """原路径绘制：每条路径逐段调用cv2.line（不含端点标记）"""
+    result = np.zeros((*image_shape[:2], 3), dtype=np.uint8)
+    colors = [(255, 255, 255), (255, 255, 0), (0, 255, 255), (255, 0, 255), (128, 255, 0),
+              (0, 255, 128), (128, 128, 255), (255, 128, 128), (128, 255, 255), (255, 128, 255)]
+    for i, path in enumerate(paths):
+        color = colors[i % len(colors)]
+        for j in range(len(path) - 1):
+            cv2.line(result, path[j], path[j + 1], color, 2)
+        cv2.circle(result, path[0], 2, color, -1)
+        cv2.circle(result, path[-1], 2, color, -1)
+    return result
+
+
+def measure(func, repeat=5, warmup=1):
+    """重复执行函数，返回 (最后一次结果, 耗时中位数ms, 最小耗时ms)"""
+    result = None
+    for _ in range(warmup):
+        result = func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times), min(times)
+
+
+def timed(func, *args, **kwargs):
+    """执行函数并返回(结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def record(results, key, median_ms, min_ms, **counts):
+    results[key] = {'median_ms': round(median_ms, 3), 'min_ms': round(min_ms, 3)}
+    if counts:
+        results[key]['counts'] = counts
+
+
+def load_binary_image(processor, file_path, max_size=1000, noise_kernel_size=1):
+    """按主窗口的方式加载、缩放并预处理图像，返回二值灰度图"""
+    image = processor.load_image(file_path)
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    if max_size and max(h, w) > max_size:
+        scale = max_size / max(h, w)
+        image = cv2.resize(image, (int(w * scale), int(h * scale)),
+                           interpolation=cv2.INTER_AREA)
+    # 样例图线条较细，默认不做开运算以免线条被去噪抹掉
+    processed = processor.preprocess(image, 127, noise_kernel_size)
+    return cv2.cvtColor(processed, cv2.COLOR_RGB2GRAY)
+
+
+def load_path_file(file_path):
+    """读取路径JSON；旧文件可能缺少端点、交叉点和拟合路径，按空列表补齐"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for key in ('endpoints', 'crosspoints', 'fitted_paths'):
+        data.setdefault(key, [])
+    path_data = PathData()
+    path_data.from_dict(data)
+    return path_data
+
+
+def bench_pipeline(processor, image_files, params, repeat, results):
+    """依次测量各处理阶段（每个阶段以上一阶段的结果为输入）"""
+    for file_path in image_files:
+        name = os.path.basename(file_path)
+        image, median_ms, min_ms = measure(lambda: processor.load_image(file_path), repeat)
+        if image is None:
+            continue
+        record(results, f"pipeline/{name}/load", median_ms, min_ms)
+
+        h, w = image.shape[:2]
+        max_size = params['max_size']
+        if max_size and max(h, w) > max_size:
+            scale = max_size / max(h, w)
+            image = cv2.resize(image, (int(w * scale), int(h * scale)),
+                               interpolation=cv2.INTER_AREA)
+
+        processed, median_ms, min_ms = measure(
+            lambda: processor.preprocess(image, params['threshold'], params['noise_kernel_size']), repeat)
+        record(results, f"pipeline/{name}/preprocess", median_ms, min_ms,
+               pixels=image.shape[0] * image.shape[1])
+
+        # 各细化后端单独计时，并标记与Zhang-Suen拓扑是否一致
+        binary = (processed[..., 0] > 127).astype(np.uint8)
+        reference = topology_signature(run_backend(REFERENCE_BACKEND, binary)[0])
+        for backend in available_backends():
+            skeleton, median_ms, min_ms = measure(lambda: run_backend(backend, binary)[0], repeat)
+            record(results, f"pipeline/{name}/thin/{backend}", median_ms, min_ms,
+                   equivalent=topology_signature(skeleton) == reference)
+
+        skeleton, median_ms, min_ms = measure(
+            lambda: processor.skeletonize(processed, thinning_backend=params['thinning_backend']), repeat)
+        record(results, f"pipeline/{name}/skeletonize", median_ms, min_ms,
+               skeleton_pixels=int(np.count_nonzero(skeleton)))
+
+        (paths, endpoints, crosspoints), median_ms, min_ms = measure(
+            lambda: processor.extract_paths(skeleton), repeat)
+        record(results, f"pipeline/{name}/extract_paths", median_ms, min_ms,
+               paths=len(paths), points=sum(len(path) for path in paths))
+
+        simplified, median_ms, min_ms = measure(
+            lambda: processor.simplify_paths(paths, params['simplify_tolerance']), repeat)
+        record(results, f"pipeline/{name}/simplify_paths", median_ms, min_ms,
+               points=sum(len(path) for path in simplified))
+
+        fitted_paths, median_ms, min_ms = measure(
+            lambda: processor.fit_paths(simplified, endpoints, crosspoints,
+                                        line_threshold=params['line_threshold'],
+                                        control_dist_factor=params['control_dist_factor'],
+                                        bezier_tolerance=params['bezier_tolerance']), repeat)
+        record(results, f"pipeline/{name}/fit_paths", median_ms, min_ms, fitted=len(fitted_paths))
+
+        _, median_ms, min_ms = measure(
+            lambda: processor.visualize_paths(skeleton.shape, simplified, endpoints, crosspoints), repeat)
+        record(results, f"pipeline/{name}/visualize_paths", median_ms, min_ms)
+
+        _, median_ms, min_ms = measure(
+            lambda: processor.visualize_fitted_paths(skeleton.shape, fitted_paths,
+                                                     endpoints, crosspoints), repeat)
+        record(results, f"pipeline/{name}/visualize_fitted_paths", median_ms, min_ms)
+
+
+def bench_path_data(path_files, temp_dir, repeat, results):
+    """测量PathData保存和加载（读写临时目录中的副本）"""
+    for file_path in path_files:
+        name = os.path.basename(file_path)
+        path_data = load_path_file(file_path)
+        output = os.path.join(temp_dir, name)
+        points = sum(len(path) for path in path_data.paths)
+
+        _, median_ms, min_ms = measure(lambda: path_data.save_to_file(output), repeat)
+        record(results, f"path_data/{name}/save", median_ms, min_ms,
+               paths=len(path_data.paths), points=points)
+
+        loaded = PathData()
+        _, median_ms, min_ms = measure(lambda: loaded.load_from_file(output), repeat)
+        record(results, f"path_data/{name}/load", median_ms, min_ms, bytes=os.path.getsize(output),
+               memory_bytes=loaded.nbytes)
+
+        # 每次先标记修改，测量完整验证而不是缓存命中
+        def validate():
+            loaded.touch()
+            return loaded.validate_path_data()
+        _, median_ms, min_ms = measure(validate, repeat)
+        record(results, f"path_data/{name}/validate", median_ms, min_ms)
+
+        # 二进制格式
+        binary_output = os.path.splitext(output)[0] + BINARY_EXTENSION
+        _, median_ms, min_ms = measure(lambda: path_data.save_to_file(binary_output), repeat)
+        record(results, f"path_data/{name}/save_binary", median_ms, min_ms)
+        _, median_ms, min_ms = measure(lambda: loaded.load_from_file(binary_output), repeat)
+        record(results, f"path_data/{name}/load_binary", median_ms, min_ms,
+               bytes=os.path.getsize(binary_output))
+
+        # 链码格式：内存中编码/解码，以及文件加载；ratio 为相对JSON文件的压缩比
+        json_bytes = os.path.getsize(output)
+        for compress in (False, True):
+            suffix = '_zlib' if compress else ''
+            encoded, median_ms, min_ms = measure(
+                lambda: path_data.to_bytes('chain', compress=compress), repeat)
+            record(results, f"path_data/{name}/encode_chain{suffix}", median_ms, min_ms,
+                   bytes=len(encoded), ratio=round(json_bytes / len(encoded), 1))
+            _, median_ms, min_ms = measure(lambda: decode_chain(encoded), repeat)
+            record(results, f"path_data/{name}/decode_chain{suffix}", median_ms, min_ms)
+        chain_output = os.path.splitext(output)[0] + CHAIN_EXTENSION
+        path_data.save_to_file(chain_output)
+        _, median_ms, min_ms = measure(lambda: loaded.load_from_file(chain_output), repeat)
+        record(results, f"path_data/{name}/load_chain", median_ms, min_ms,
+               bytes=os.path.getsize(chain_output))
+
+
+def animation_frames(animator, frame_count):
+    """按ExportThread的方式逐帧推进动画，返回前 frame_count 帧"""
+    frames = []
+    animator.frame_ready.connect(frames.append)
+    try:
+        animator.reset()
+        total_frames = len(animator.paths) * animator.total_frames
+        for _ in range(min(frame_count, total_frames)):
+            animator._draw_frame()
+            animator.current_frame += 1
+            if animator.current_frame >= animator.total_frames:
+                animator.current_frame = 0
+                animator.current_path_index += 1
+    finally:
+        animator.frame_ready.disconnect(frames.append)
+        animator.reset()
+    return frames
+
+
+def encode_mp4(frames, filename, size, fps=30):
+    """与ExportThread相同的MP4编码流程"""
+    out = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for frame in frames:
+        out.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    out.release()
+
+
+def bench_animation(path_files, temp_dir, frame_count, repeat, results):
+    """测量动画帧绘制与导出编码；帧从动画中段开始，包含已完成路径和当前路径"""
+    animator = PathAnimator()
+    for file_path in path_files:
+        name = os.path.basename(file_path)
+        path_data = load_path_file(file_path)
+        if not path_data.paths:
+            continue
+        animator.set_data(path_data.paths, path_data.endpoints, path_data.crosspoints,
+                          path_data.image_size)
+        height, width = path_data.image_size[:2]
+
+        def draw_frames():
+            # 每次重新设置数据，使背景缓存的构建也计入耗时
+            animator.set_data(path_data.paths, path_data.endpoints, path_data.crosspoints,
+                              path_data.image_size)
+            animator.current_path_index = len(path_data.paths) // 2
+            for frame in range(frame_count):
+                animator.current_frame = frame % animator.total_frames
+                animator._draw_frame()
+
+        _, median_ms, min_ms = measure(draw_frames, repeat)
+        record(results, f"animation/{name}/frame", median_ms / frame_count, min_ms / frame_count,
+               frames=frame_count)
+
+        frames = animation_frames(animator, frame_count)
+        output = os.path.join(temp_dir, os.path.splitext(name)[0] + '.mp4')
+        _, median_ms, min_ms = measure(lambda: encode_mp4(frames, output, (width, height)), repeat)
+        record(results, f"export/{name}/encode", median_ms / len(frames), min_ms / len(frames),
+               frames=len(frames))
+
+
+def bench_draw_prepare(path_files, repeat, results):
+    """测量绘制线程的坐标转换和笔画顺序优化（pyautogui为空实现，不会移动鼠标）"""
+    from draw_controller import DrawController, DrawThread
+    controller = DrawController()
+    for file_path in path_files:
+        name = os.path.basename(file_path)
+        path_data = load_path_file(file_path)
+        controller.paths = path_data.paths
+        controller.original_width = path_data.image_size[1]
+        controller.original_height = path_data.image_size[0]
+        _, median_ms, min_ms = measure(
+            lambda: DrawThread(controller, controller.paths, 0, 0), repeat)
+        record(results, f"draw/{name}/transform", median_ms, min_ms,
+               points=sum(len(path) for path in path_data.paths))
+
+        (_, stats), median_ms, min_ms = measure(lambda: order_paths(path_data.paths), repeat)
+        record(results, f"draw/{name}/stroke_order", median_ms, min_ms,
+               travel_before=round(stats['before'], 1), travel_after=round(stats['after'], 1))
+    controller.deleteLater()
+
+
+def bench_thinning(processor, image_files, max_size=1000, skip_legacy=False):
+    """对比向量化细化与原逐像素细化的耗时，并校验结果一致"""
+    print(f"{'图像':<12}{'尺寸':>12}{'向量化(s)':>12}{'原实现(s)':>12}{'加速比':>10}{'一致':>6}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+
+        fast, fast_time = timed(processor.zhang_suen_thinning, binary)
+        name = os.path.basename(file_path)
+        size = f"{binary.shape[1]}x{binary.shape[0]}"
+
+        if skip_legacy:
+            print(f"{name:<12}{size:>12}{fast_time:>12.3f}{'-':>12}{'-':>10}{'-':>6}")
+            continue
+
+        slow, slow_time = timed(legacy_zhang_suen_thinning, binary)
+        same = np.array_equal(fast, slow)
+        print(f"{name:<12}{size:>12}{fast_time:>12.3f}{slow_time:>12.3f}"
+              f"{slow_time / max(fast_time, 1e-9):>10.1f}{'是' if same else '否':>6}")
+
+
+def bench_tiled_thinning(processor, image_files, max_size=0, band_height=256, max_workers=None):
+    """测量分块并行细化随进程数的扩展性，并校验与整幅细化一致"""
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, *[n for n in (2, 4, 8, 16) if n < max_workers], max_workers})
+    header = ''.join(f"{f'{n}进程(s)':>12}" for n in worker_counts)
+    print(f"{'图像':<12}{'尺寸':>12}{header}{'一致':>6}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+
+        reference = processor.zhang_suen_thinning(binary)
+        times = []
+        same = True
+        for workers in worker_counts:
+            # 先热身一次，排除进程池启动开销
+            processor.tiled_thinning(binary, workers, band_height)
+            result, elapsed = timed(processor.tiled_thinning, binary, workers, band_height)
+            times.append(elapsed)
+            same = same and np.array_equal(result, reference)
+
+        name = os.path.basename(file_path)
+        size = f"{binary.shape[1]}x{binary.shape[0]}"
+        columns = ''.join(f"{t:>12.3f}" for t in times)
+        print(f"{name:<12}{size:>12}{columns}{'是' if same else '否':>6}")
+
+
+def bench_special_points(processor, image_files, max_size=1000, repeat=5):
+    """对比卷积式与逐像素端点/交叉点检测的耗时，并校验分类一致"""
+    print(f"{'图像':<12}{'骨架像素':>10}{'端点':>8}{'交叉点':>8}"
+          f"{'卷积(ms)':>12}{'原实现(ms)':>12}{'加速比':>10}{'一致':>6}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+        skeleton = processor.zhang_suen_thinning(binary)
+
+        fast_time = min(timed(processor._find_special_points, skeleton)[1]
+                        for _ in range(repeat))
+        endpoints, crosspoints = processor._find_special_points(skeleton)
+        (old_endpoints, old_crosspoints), slow_time = timed(legacy_find_special_points, skeleton)
+
+        same = (endpoints.tolist() == [list(p) for p in old_endpoints] and
+                crosspoints.tolist() == [list(p) for p in old_crosspoints])
+        name = os.path.basename(file_path)
+        print(f"{name:<12}{int(np.count_nonzero(skeleton)):>10}{len(endpoints):>8}"
+              f"{len(crosspoints):>8}{fast_time * 1000:>12.2f}{slow_time * 1000:>12.2f}"
+              f"{slow_time / max(fast_time, 1e-9):>10.1f}{'是' if same else '否':>6}")
+
+
+def bench_path_tracing(processor, image_files, max_size=0):
+    """对比骨架图提取与原逐像素追踪的耗时"""
+    print(f"{'图像':<12}{'骨架像素':>10}{'骨架图(s)':>12}{'原实现(s)':>12}"
+          f"{'加速比':>10}{'路径数':>8}{'原路径数':>10}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+        skeleton = processor.zhang_suen_thinning(binary)
+
+        graph, fast_time = timed(processor.build_skeleton_graph, skeleton)
+        paths, paths_time = timed(graph.paths)
+        fast_time += paths_time
+
+        endpoints, crosspoints = processor._find_special_points(skeleton)
+        endpoints = processor._merge_close_points(endpoints, 8)
+        crosspoints = processor._merge_close_points(crosspoints, 5)
+        old_paths, slow_time = timed(legacy_extract_path_segments, skeleton, endpoints, crosspoints)
+
+        name = os.path.basename(file_path)
+        print(f"{name:<12}{int(np.count_nonzero(skeleton)):>10}{fast_time:>12.3f}{slow_time:>12.3f}"
+              f"{slow_time / max(fast_time, 1e-9):>10.1f}{len(paths):>8}{len(old_paths):>10}")
+
+
+def bench_component_extraction(processor, image_files, max_size=0, max_workers=None, repeat=3):
+    """测量按连通分量分片提取路径随进程数的扩展性，并校验结果与进程数无关"""
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, *[n for n in (2, 4, 8, 16) if n < max_workers], max_workers})
+    header = ''.join(f"{f'{n}进程(ms)':>12}" for n in worker_counts)
+    print(f"{'图像':<12}{'连通分量':>10}{'整图(ms)':>12}{header}{'一致':>6}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+        skeleton = processor.zhang_suen_thinning(binary)
+        n_components = cv2.connectedComponents(skeleton, connectivity=8)[0] - 1
+
+        whole_time = min(timed(processor.extract_paths, skeleton)[1] for _ in range(repeat))
+        reference = None
+        same = True
+        times = []
+        for workers in worker_counts:
+            # min_component_size=1 时单进程也走分片流程；先热身一次排除进程池启动开销
+            result = processor.extract_paths(skeleton, workers=workers, min_component_size=1)
+            times.append(min(timed(processor.extract_paths, skeleton, workers=workers,
+                                   min_component_size=1)[1] for _ in range(repeat)))
+            reference = reference or result
+            same = same and result == reference
+
+        name = os.path.basename(file_path)
+        columns = ''.join(f"{t * 1000:>12.1f}" for t in times)
+        print(f"{name:<12}{n_components:>10}{whole_time * 1000:>12.1f}{columns}{'是' if same else '否':>6}")
+
+
+def bench_path_render(processor, image_files, max_size=0, repeat=3):
+    """对比按颜色批量polylines与原逐段cv2.line绘制路径的耗时，并统计像素差异"""
+    print(f"{'图像':<12}{'路径点':>10}{'批量(ms)':>12}{'原实现(ms)':>12}{'加速比':>10}{'差异像素':>10}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+        skeleton = processor.zhang_suen_thinning(binary)
+        paths, _, _ = processor.extract_paths(skeleton)
+
+        fast_time = min(timed(processor.visualize_paths, skeleton.shape, paths, [], [])[1]
+                        for _ in range(repeat))
+        fast = processor.visualize_paths(skeleton.shape, paths, [], [])
+        slow, slow_time = timed(legacy_draw_paths, skeleton.shape, paths)
+        # 同色路径一起绘制，重叠处的前后顺序可能不同
+        diff = int(np.count_nonzero(np.any(fast != slow, axis=2)))
+
+        name = os.path.basename(file_path)
+        print(f"{name:<12}{sum(map(len, paths)):>10}{fast_time * 1000:>12.2f}{slow_time * 1000:>12.2f}"
+              f"{slow_time / max(fast_time, 1e-9):>10.1f}{diff:>10}")
+
+
+def bench_fitted_render(processor, image_files, max_size=0, repeat=3):
+    """对比批量采样+polylines与原逐点绘制拟合曲线的耗时，并统计像素差异"""
+    print(f"{'图像':<12}{'曲线段':>8}{'批量(ms)':>12}{'原实现(ms)':>12}{'加速比':>10}{'差异像素':>10}")
+    for file_path in image_files:
+        binary = load_binary_image(processor, file_path, max_size)
+        if binary is None:
+            continue
+        skeleton = processor.zhang_suen_thinning(binary)
+        paths, endpoints, crosspoints = processor.extract_paths(skeleton)
+        fitted_paths = processor.fit_paths(paths, endpoints, crosspoints)
+        n_segments = sum(max((len(points) - 1) // 3, 1)
+                         for path_type, points in fitted_paths if path_type == 'bezier')
+
+        # 不绘制端点标记，只比较曲线部分
+        fast_time = min(timed(processor.visualize_fitted_paths, skeleton.shape, fitted_paths, [], [])[1]
+                        for _ in range(repeat))
+        fast = processor.visualize_fitted_paths(skeleton.shape, fitted_paths, [], [])
+        slow, slow_time = timed(legacy_draw_fitted_paths, skeleton.shape, fitted_paths)
+        diff = int(np.count_nonzero(np.any(fast != slow, axis=2)))
+
+        name = os.path.basename(file_path)
+        print(f"{name:<12}{n_segments:>8}{fast_time * 1000:>12.2f}{slow_time * 1000:>12.2f}"
+              f"{slow_time / max(fast_time, 1e-9):>10.1f}{diff:>10}")
+
+
+def bench_legacy(processor, image_files, sample_files, args):
+    """与原逐像素实现对比耗时并校验结果（只打印表格，不计入基准结果）"""
+    print("== Zhang-Suen细化 ==")
+    bench_thinning(processor, image_files, args.max_size, args.skip_legacy)
+
+    print("\n== 端点/交叉点检测 ==")
+    bench_special_points(processor, sample_files, args.max_size)
+
+    print("\n== 路径段提取（原始分辨率） ==")
+    bench_path_tracing(processor, sample_files, 0)
+
+    print("\n== 分块并行细化（原始分辨率） ==")
+    bench_tiled_thinning(processor, image_files, 0, args.band_height, args.workers)
+
+    print("\n== 连通分量分片路径提取（原始分辨率） ==")
+    bench_component_extraction(processor, sample_files, 0, args.workers)
+
+    print("\n== 路径绘制（原始分辨率） ==")
+    bench_path_render(processor, sample_files, 0)
+
+    print("\n== 拟合曲线绘制（原始分辨率） ==")
+    bench_fitted_render(processor, sample_files, 0)
+
+
+def environment_info():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare_results(baseline, current, threshold, min_delta_ms):
+    """
+    对比两次结果的耗时中位数，返回 (行列表, 退化项列表)
+    比基准慢超过 threshold 比例且绝对差超过 min_delta_ms 的项记为退化
+    """
+    rows = []
+    regressions = []
+    for key in sorted(set(baseline) | set(current)):
+        if key not in current:
+            rows.append((key, baseline[key]['median_ms'], None, None, '缺失'))
+            continue
+        if key not in baseline:
+            rows.append((key, None, current[key]['median_ms'], None, '新增'))
+            continue
+        before = baseline[key]['median_ms']
+        after = current[key]['median_ms']
+        change = (after - before) / before if before > 0 else 0.0
+        status = ''
+        if change > threshold and after - before > min_delta_ms:
+            status = '退化'
+            regressions.append(key)
+        elif change < -threshold and before - after > min_delta_ms:
+            status = '提升'
+        rows.append((key, before, after, change, status))
+    return rows, regressions
+
+
+def format_row(key, before, after, change, status):
+    before = f"{before:.3f}" if before is not None else '-'
+    after = f"{after:.3f}" if after is not None else '-'
+    change = f"{change * 100:+.1f}%" if change is not None else '-'
+    return f"{key:<48}{before:>12}{after:>12}{change:>10}  {status}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="性能基准：处理阶段、路径文件读写、动画绘制与导出编码，以及与原实现的对比")
+    parser.add_argument('-o', '--output', default=None, help="将结果保存为JSON基准文件")
+    parser.add_argument('--compare', metavar='BASELINE', default=None,
+                        help="与基准文件对比，存在退化时返回非零退出码")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="判定退化的相对变慢比例（默认0.2，即20%%）")
+    parser.add_argument('--min-delta', type=float, default=0.5,
+                        help="判定退化的最小绝对差（ms），过滤计时噪声")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复次数（取中位数）")
+    parser.add_argument('--frames', type=int, default=30, help="动画绘制和导出编码的帧数")
+    parser.add_argument('--max-size', type=int, default=1000,
+                        help="图像最长边缩放上限（与主窗口一致，0表示不缩放）")
+    parser.add_argument('--noise', type=int, default=1, help="降噪强度（样例图线条较细，默认1）")
+    parser.add_argument('--thinning', default='zhang-suen', choices=['auto'] + available_backends(),
+                        help="处理阶段使用的细化后端")
+    parser.add_argument('--simplify', type=float, default=0.0, help="路径简化容差")
+    parser.add_argument('--only', choices=('pipeline', 'path_data', 'animation', 'draw', 'legacy'),
+                        action='append', default=None,
+                        help="只运行指定分组（可重复）；legacy 为与原逐像素实现的对比，需显式指定")
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help="legacy 分组中跳过原逐像素细化（仅测量新实现）")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="legacy 分组中分块细化和分片提取的最大进程数（默认CPU核心数）")
+    parser.add_argument('--band-height', type=int, default=256,
+                        help="legacy 分组中分块细化的条带行数")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    groups = args.only or ['pipeline', 'path_data', 'animation', 'draw']
+    image_files = [path for pattern in IMAGE_PATTERNS
+                   for path in sorted(glob.glob(os.path.join(STORAGE_DIR, pattern)))]
+    path_files = sorted(glob.glob(os.path.join(STORAGE_DIR, PATH_PATTERN)),
+                        key=lambda path: int(os.path.splitext(os.path.basename(path))[0]))
+    params = {
+        'max_size': args.max_size,
+        'threshold': 127,
+        'noise_kernel_size': args.noise,
+        'thinning_backend': args.thinning,
+        'simplify_tolerance': args.simplify,
+        'line_threshold': 0.98,
+        'control_dist_factor': 0.25,
+        'bezier_tolerance': 2.0,
+    }
+
+    results = {}
+    temp_dir = tempfile.mkdtemp(prefix='path_bench_')
+    start = time.perf_counter()
+    try:
+        if 'pipeline' in groups:
+            bench_pipeline(ImageProcessor(cache_bytes=0), image_files, params, args.repeat, results)
+        if 'path_data' in groups:
+            bench_path_data(path_files, temp_dir, args.repeat, results)
+        if 'animation' in groups:
+            bench_animation(path_files, temp_dir, args.frames, args.repeat, results)
+        if 'draw' in groups:
+            bench_draw_prepare(path_files, args.repeat, results)
+        if 'legacy' in groups:
+            # 原逐像素细化较慢，细化对比只用样例照片
+            photo_files = sorted(glob.glob(os.path.join(STORAGE_DIR, IMAGE_PATTERNS[0])))
+            bench_legacy(ImageProcessor(), photo_files, image_files, args)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': environment_info(),
+        'params': dict(params, repeat=args.repeat, frames=args.frames),
+        'results': results,
+    }
+
+    print(f"{'item':<48}{'median(ms)':>12}{'min(ms)':>12}")
+    for key, value in results.items():
+        print(f"{key:<48}{value['median_ms']:>12.3f}{value['min_ms']:>12.3f}")
+    print(f"\n共 {len(results)} 项，耗时 {elapsed:.1f}s")
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"结果已保存到 {args.output}")
+        except Exception as e:
+            print(f"保存基准结果时出错: {str(e)}")
+            return 1
+
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except Exception as e:
+            print(f"加载基准文件时出错: {str(e)}")
+            return 1
+        if baseline.get('version') != FORMAT_VERSION:
+            print("基准文件格式版本不同，对比结果可能不准确")
+        if baseline.get('params') != report['params']:
+            print("基准文件的测试参数不同，对比结果可能不准确")
+
+        if args.only:
+            # 只运行部分分组时，未运行的分组不算缺失
+            prefixes = tuple(f"{group}/" for group in groups)
+            if 'animation' in groups:
+                prefixes += ('export/',)
+            baseline['results'] = {key: value for key, value in baseline['results'].items()
+                                   if key.startswith(prefixes)}
+
+        rows, regressions = compare_results(baseline['results'], results,
+                                            args.threshold, args.min_delta)
+        print(f"\n{'item':<48}{'baseline':>12}{'current':>12}{'change':>10}")
+        for row in rows:
+            print(format_row(*row))
+        if regressions:
+            print(f"\n{len(regressions)} 项性能退化超过 {args.threshold * 100:.0f}%")
+            return 1
+        print(f"\n没有超过 {args.threshold * 100:.0f}% 的性能退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+from functools import lru_cache
+from math import comb
+import numpy as np
+
+# 重新参数化的最大尝试次数
+_MAX_REPARAMETERIZE = 4
+
+def bernstein_basis(t):
+    """三次伯恩斯坦基函数矩阵 (len(t), 4)"""
+    t = np.asarray(t, dtype=float)[:, None]
+    s = 1.0 - t
+    return np.hstack((s ** 3, 3 * s * s * t, 3 * s * t * t, t ** 3))
+
+def chord_length_parameterize(points):
+    """按弦长参数化，返回 [0, 1] 内的参数"""
+    lengths = np.sqrt(np.sum(np.diff(points, axis=0) ** 2, axis=1))
+    u = np.concatenate(([0.0], np.cumsum(lengths)))
+    if u[-1] <= 0:
+        return np.linspace(0.0, 1.0, len(points))
+    return u / u[-1]
+
+def _normalize(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _end_tangent(points, n_reference=5):
+    """用前几个点的平均方向估计端点切线，降低像素锯齿的影响"""
+    n = min(n_reference, len(points) - 1)
+    return _normalize(points[n] - points[0])
+
+def _generate_bezier(points, u, tan_left, tan_right):
+    """在端点和切线方向固定的条件下，最小二乘求解两个控制点的距离"""
+    p0, p3 = points[0], points[-1]
+    basis = bernstein_basis(u)
+    a1 = basis[:, 1:2] * tan_left
+    a2 = basis[:, 2:3] * tan_right
+
+    c00 = np.sum(a1 * a1)
+    c01 = np.sum(a1 * a2)
+    c11 = np.sum(a2 * a2)
+    residual = points - np.outer(basis[:, 0] + basis[:, 1], p0) - np.outer(basis[:, 2] + basis[:, 3], p3)
+    x0 = np.sum(a1 * residual)
+    x1 = np.sum(a2 * residual)
+
+    det = c00 * c11 - c01 * c01
+    alpha_l = (x0 * c11 - x1 * c01) / det if abs(det) > 1e-12 else 0.0
+    alpha_r = (c00 * x1 - c01 * x0) / det if abs(det) > 1e-12 else 0.0
+
+    # 解退化时退回弦长的三分之一（Wu/Barsky启发式）
+    seg_length = np.linalg.norm(p3 - p0)
+    epsilon = 1e-6 * seg_length
+    if alpha_l < epsilon or alpha_r < epsilon:
+        alpha_l = alpha_r = seg_length / 3.0
+
+    return np.array([p0, p0 + tan_left * alpha_l, p3 + tan_right * alpha_r, p3])
+
+def _evaluate(bezier, u):
+    return bernstein_basis(u) @ bezier
+
+def _reparameterize(bezier, points, u):
+    """牛顿迭代修正每个点的参数，使其更接近曲线上的最近点"""
+    d1 = 3 * (bezier[1:] - bezier[:-1])
+    d2 = 2 * (d1[1:] - d1[:-1])
+    s = 1.0 - u
+    q = _evaluate(bezier, u)
+    q1 = (s * s)[:, None] * d1[0] + (2 * s * u)[:, None] * d1[1] + (u * u)[:, None] * d1[2]
+    q2 = s[:, None] * d2[0] + u[:, None] * d2[1]
+    diff = q - points
+    numerator = np.sum(diff * q1, axis=1)
+    denominator = np.sum(q1 * q1, axis=1) + np.sum(diff * q2, axis=1)
+    safe = np.abs(denominator) > 1e-12
+    new_u = u.copy()
+    new_u[safe] -= numerator[safe] / denominator[safe]
+    return np.clip(new_u, 0.0, 1.0)
+
+def _max_error(bezier, points, u):
+    """返回最大平方误差及其所在的点序号"""
+    errors = np.sum((_evaluate(bezier, u) - points) ** 2, axis=1)
+    index = int(np.argmax(errors))
+    return errors[index], index
+
+def _fit_cubic(points, tan_left, tan_right, tolerance, segments):
+    """递归拟合：误差超限时在最大误差点处分割（Schneider算法）"""
+    if len(points) == 2:
+        dist = np.linalg.norm(points[1] - points[0]) / 3.0
+        segments.append(np.array([points[0], points[0] + tan_left * dist,
+                                  points[1] + tan_right * dist, points[1]]))
+        return
+
+    error_bound = tolerance * tolerance
+    u = chord_length_parameterize(points)
+    bezier = _generate_bezier(points, u, tan_left, tan_right)
+    max_error, split = _max_error(bezier, points, u)
+    if max_error < error_bound:
+        segments.append(bezier)
+        return
+
+    # 误差不太大时先尝试重新参数化
+    if max_error < error_bound * 4:
+        for _ in range(_MAX_REPARAMETERIZE):
+            u = _reparameterize(bezier, points, u)
+            bezier = _generate_bezier(points, u, tan_left, tan_right)
+            max_error, split = _max_error(bezier, points, u)
+            if max_error < error_bound:
+                segments.append(bezier)
+                return
+
+    # 在最大误差点处分割，两侧共享中心切线
+    split = min(max(split, 1), len(points) - 2)
+    center = _normalize(points[split - 1] - points[split + 1])
+    if not center.any():
+        center = _normalize(points[split - 1] - points[split])
+    _fit_cubic(points[:split + 1], tan_left, center, tolerance, segments)
+    _fit_cubic(points[split:], -center, tan_right, tolerance, segments)
+
+def fit_piecewise_bezier(path, tolerance=2.0):
+    """
+    用分段三次贝塞尔曲线拟合像素路径，每段误差不超过 tolerance 像素
+    返回 3n+1 个控制点 (首点, 控制点1, 控制点2, 终点, 控制点1, ...)，相邻段共享端点
+    """
+    points = np.asarray(path, dtype=float)
+
+    # 去除连续重复点，避免切线和弦长退化
+    if len(points) > 1:
+        keep = np.concatenate(([True], np.any(np.diff(points, axis=0) != 0, axis=1)))
+        points = points[keep]
+    if len(points) < 2:
+        return points
+
+    tan_left = _end_tangent(points)
+    tan_right = _end_tangent(points[::-1])
+    segments = []
+    _fit_cubic(points, tan_left, tan_right, max(float(tolerance), 1e-3), segments)
+
+    control_points = [segments[0][0]]
+    for segment in segments:
+        control_points.extend(segment[1:])
+    return np.array(control_points)
+
+def split_segments(control_points):
+    """将 3n+1 个控制点拆成 (n, 4, 2) 的分段数组"""
+    control_points = np.asarray(control_points, dtype=float)
+    n_segments = (len(control_points) - 1) // 3
+    index = 3 * np.arange(n_segments)[:, None] + np.arange(4)
+    return control_points[index]
+
+@lru_cache(maxsize=32)
+def bernstein_matrix(degree, samples):
+    """在 [0, 1] 上均匀取 samples 个参数的伯恩斯坦基矩阵 (samples, degree+1)，结果只读复用"""
+    t = np.linspace(0.0, 1.0, samples)[:, None]
+    k = np.arange(degree + 1)
+    coefficients = np.array([comb(degree, i) for i in k], dtype=float)
+    basis = coefficients * t ** k * (1.0 - t) ** (degree - k)
+    basis.setflags(write=False)
+    return basis
+
+def evaluate_curves(curves, samples=200):
+    """
+    批量求贝塞尔曲线采样点
+    同阶曲线堆叠后与基矩阵做一次矩阵乘法，按输入顺序返回 (samples, 2) 数组列表
+    """
+    curves = [np.asarray(curve, dtype=float) for curve in curves]
+    results = [None] * len(curves)
+    groups = {}
+    for index, curve in enumerate(curves):
+        groups.setdefault(len(curve), []).append(index)
+
+    for n_points, indices in groups.items():
+        if n_points == 1:
+            for index in indices:
+                results[index] = np.repeat(curves[index], samples, axis=0)
+            continue
+        basis = bernstein_matrix(n_points - 1, samples)
+        stacked = np.stack([curves[index] for index in indices])
+        points = np.einsum('sk,nkd->nsd', basis, stacked)
+        for index, curve_points in zip(indices, points):
+            results[index] = curve_points
+    return results
@@ -1,14 +1,19 @@
 import sys
-import json
 import time
 import pyautogui
 import win32api
 import win32con
 from PyQt5.QtWidgets import (QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
-                           QFileDialog, QLabel, QApplication, QDoubleSpinBox, QGroupBox, QGridLayout, QSpinBox)
+                           QFileDialog, QLabel, QApplication, QDoubleSpinBox, QGroupBox, QGridLayout, QSpinBox,
+                           QCheckBox)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
 from PyQt5.QtCore import QSettings
 
+from stroke_order import order_paths
+from path_data import load_path_dict
+from path_binary import BINARY_EXTENSION
+from path_codec import CHAIN_EXTENSION
+
 # 添加绘制线程类
 class DrawThread(QThread):
     progress = pyqtSignal(int, int)  # 进度信号(当前路径, 总路径)
@@ -129,6 +134,8 @@ class DrawController(QWidget):
         
         # 初始化变量
         self.paths = []
+        self.ordered_paths = []  # 按抬笔移动最短重排后的路径
+        self.order_stats = None
         self.is_drawing = False
         self.draw_thread = None
         self.mouse_listener = None
@@ -188,6 +195,11 @@ class DrawController(QWidget):
         self.speed_spin.setSuffix('x')  # 添加单位
         params_layout.addWidget(self.speed_spin, 2, 1)
         
+        # 重排笔画顺序和方向，减少抬笔移动
+        self.optimize_order_checkbox = QCheckBox("优化笔画顺序")
+        self.optimize_order_checkbox.setChecked(True)
+        params_layout.addWidget(self.optimize_order_checkbox, 3, 0, 1, 2)
+        
         params_group.setLayout(params_layout)
         layout.addWidget(params_group)
         
@@ -260,6 +272,7 @@ class DrawController(QWidget):
         self.move_time_spin.setValue(self.settings.value('move_time', 0.001, float))
         self.pause_time_spin.setValue(self.settings.value('pause_time', 0.002, float))
         self.speed_spin.setValue(self.settings.value('speed', 1.0, float))
+        self.optimize_order_checkbox.setChecked(self.settings.value('optimize_order', True, bool))
         self.scale = self.settings.value('scale', 1.0, float)
         self.offset_x = self.settings.value('offset_x', 0, int)
         self.offset_y = self.settings.value('offset_y', 0, int)
@@ -274,6 +287,7 @@ class DrawController(QWidget):
         self.settings.setValue('move_time', self.move_time_spin.value())
         self.settings.setValue('pause_time', self.pause_time_spin.value())
         self.settings.setValue('speed', self.speed_spin.value())
+        self.settings.setValue('optimize_order', self.optimize_order_checkbox.isChecked())
         self.settings.setValue('scale', self.scale_spin.value())
         self.settings.setValue('offset_x', self.offset_x_spin.value())
         self.settings.setValue('offset_y', self.offset_y_spin.value())
@@ -283,18 +297,20 @@ class DrawController(QWidget):
             self,
             "选择路径文件",
             "",
-            "JSON文件 (*.json)"
+            f"路径文件 (*.json *{BINARY_EXTENSION} *{CHAIN_EXTENSION})"
         )
         
         if filename:
             try:
-                with open(filename, 'r') as f:
-                    data = json.load(f)
+                data = load_path_dict(filename)
                 self.paths = data['paths']
                 # 保存原始图像尺寸用于缩放计算
                 self.original_width = data['image_size'][1]
                 self.original_height = data['image_size'][0]
-                self.status_label.setText("路径加载成功")
+                self.ordered_paths, self.order_stats = order_paths(self.paths)
+                self.status_label.setText(
+                    f"路径加载成功，优化顺序后抬笔移动 {self.order_stats['before']:.0f} → "
+                    f"{self.order_stats['after']:.0f} 像素 (减少 {self.order_stats['ratio']:.0%})")
                 self.draw_btn.setEnabled(True)
             except Exception as e:
                 self.status_label.setText(f"加载失败: {str(e)}")
@@ -324,9 +340,12 @@ class DrawController(QWidget):
                 self.mouse_listener.start()
             
             # 创建新线程
+            paths = self.paths
+            if self.optimize_order_checkbox.isChecked() and self.ordered_paths:
+                paths = self.ordered_paths
             self.draw_thread = DrawThread(
                 self,
-                self.paths,
+                paths,
                 self.move_time_spin.value(),
                 self.pause_time_spin.value(),
                 self.speed_spin.value()  # 每次都使用当前的速度值
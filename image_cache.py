@@ -0,0 +1,95 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+# 存活数组对象的指纹缓存：对象被回收时通过finalize移除，避免id复用导致误命中
+_fingerprints = {}
+
+def image_fingerprint(image):
+    """
+    计算图像内容指纹（形状、类型和像素数据的哈希）
+    同一数组对象只哈希一次，拖动滑块时不必重复计算；
+    注意原地修改数组内容不会使指纹失效，修改前请先复制。
+    """
+    key = id(image)
+    fingerprint = _fingerprints.get(key)
+    if fingerprint is not None:
+        return fingerprint
+
+    data = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((data.shape, data.dtype.str)).encode())
+    digest.update(memoryview(data).cast('B'))
+    fingerprint = digest.hexdigest()
+
+    try:
+        weakref.finalize(image, _fingerprints.pop, key, None)
+        _fingerprints[key] = fingerprint
+    except TypeError:
+        # 不支持弱引用的对象不做缓存
+        pass
+    return fingerprint
+
+class ImageCache:
+    """按内存预算限制的LRU缓存，值为numpy数组"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """读取缓存，命中时将条目移到最近使用端"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """写入缓存，超出内存预算时淘汰最久未使用的条目"""
+        size = self._sizeof(value)
+        if key in self._entries:
+            self.current_bytes -= self._sizeof(self._entries.pop(key))
+
+        # 单个结果超过预算时不缓存
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = value
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= self._sizeof(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存（保留统计计数）"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        """返回命中/未命中/淘汰计数和内存占用"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    @staticmethod
+    def _sizeof(value):
+        return getattr(value, 'nbytes', 0)
@@ -1,7 +1,11 @@
+import os
+import time
+import itertools
+import threading
+import multiprocessing
 import cv2
 import numpy as np
-from skimage.morphology import skeletonize as sk_skeletonize
-from skimage.morphology import thin
+from concurrent.futures import ProcessPoolExecutor, wait
 from skimage.graph import route_through_array
 from skimage import img_as_float, img_as_ubyte
 from scipy.spatial.distance import cdist
@@ -9,10 +13,190 @@ from scipy.spatial import cKDTree
 from scipy.sparse.csgraph import connected_components
 from scipy.sparse import csr_matrix
 
+from image_cache import ImageCache, image_fingerprint
+from task_control import ProcessingCancelled, check_cancelled, report_progress
+from profiling import profiled
+from skeleton_graph import SkeletonGraph
+from path_render import to_polylines, draw_paths_cycled
+from path_simplify import simplify_paths
+from bezier_fit import fit_piecewise_bezier, split_segments, evaluate_curves
+from thinning import register_backend, run_backend, select_backend
+
+def _build_zhang_suen_lut():
+    """构建Zhang-Suen两个子迭代的256项邻域查找表"""
+    lut = np.zeros((2, 256), dtype=bool)
+    for code in range(256):
+        # 第k位对应 P[k]，顺序为 P2..P9
+        P = [(code >> k) & 1 for k in range(8)]
+        n = P + P[0:1]
+        transitions = sum((n1, n2) == (0, 1) for n1, n2 in zip(n, n[1:]))
+        if not (2 <= sum(P) <= 6 and transitions == 1):
+            continue
+        # 第一子迭代：条件3、4
+        lut[0, code] = P[0] * P[2] * P[4] == 0 and P[2] * P[4] * P[6] == 0
+        # 第二子迭代：条件3'、4'
+        lut[1, code] = P[0] * P[2] * P[6] == 0 and P[0] * P[4] * P[6] == 0
+    return lut
+
+_ZHANG_SUEN_LUT = _build_zhang_suen_lut()
+
+def _estimate_thinning_iterations(image):
+    """
+    估计细化所需迭代次数：每次迭代从两侧各剥离约一层像素，
+    所需次数约等于前景到背景的最大距离
+    """
+    if not image.any():
+        return 1
+    distance = cv2.distanceTransform(image, cv2.DIST_C, 3)
+    return max(1, int(distance.max()))
+
+def _zhang_suen_thin(image, max_iterations=100, cancel_token=None, progress=None):
+    """
+    在0/1的uint8图像上原地执行Zhang-Suen细化，返回实际迭代次数
+    图像最外一圈像素视为边界，只作为邻居参与计算，不会被删除
+    每次迭代前检查取消，迭代后按估计的总迭代次数报告进度
+    """
+    height, width = image.shape
+    if height < 3 or width < 3:
+        return 0
+    
+    # 展平视图，便于按偏移量批量读取邻域
+    flat = image.ravel()
+    
+    # 8邻域偏移量，顺序为 P2..P9（上、右上、右、右下、下、左下、左、左上）
+    offsets = (-width, -width + 1, 1, width + 1, width, width - 1, -1, -width - 1)
+    
+    # 只有内部前景像素可能被删除
+    interior = np.zeros_like(image, dtype=bool)
+    interior[1:-1, 1:-1] = image[1:-1, 1:-1] > 0
+    candidates = np.flatnonzero(interior)
+    expected = _estimate_thinning_iterations(image) if progress is not None else 1
+    
+    changing = True
+    iteration = 0
+    
+    while changing and iteration < max_iterations:  # 限制最大迭代次数
+        check_cancelled(cancel_token)
+        changing = False
+        iteration += 1
+        
+        # 两个子迭代分别使用各自的查找表
+        for lut in _ZHANG_SUEN_LUT:
+            if candidates.size == 0:
+                break
+            
+            # 计算所有候选像素的邻域编码
+            codes = np.zeros(candidates.size, dtype=np.uint8)
+            for bit, offset in enumerate(offsets):
+                codes |= flat[candidates + offset] << bit
+            
+            # 同时删除满足条件的像素
+            deletion_markers = lut[codes]
+            if deletion_markers.any():
+                flat[candidates[deletion_markers]] = 0
+                candidates = candidates[~deletion_markers]
+                changing = True
+        
+        report_progress(progress, iteration / max(expected, iteration + changing))
+    
+    return iteration
+
+def _zhang_suen_backend(image, cancel_token=None, progress=None):
+    """细化后端注册表中的Zhang-Suen实现"""
+    _zhang_suen_thin(image, cancel_token=cancel_token, progress=progress)
+    return image
+
+register_backend('zhang-suen', _zhang_suen_backend)
+
+# 进程池子进程中的取消标记：值为被取消的细化任务编号（由 _init_worker 设置）
+_worker_cancelled = None
+
+def _init_worker(cancelled):
+    global _worker_cancelled
+    _worker_cancelled = cancelled
+
+class _WorkerCancelToken:
+    """子进程中使用的取消令牌：父进程把共享标记设为本任务编号即表示取消"""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+
+    def check(self):
+        if _worker_cancelled is not None and _worker_cancelled.value == self.run_id:
+            raise ProcessingCancelled()
+
+def _thin_band(band, iterations, core_top, core_bottom, run_id=None):
+    """
+    进程池任务：对带重叠区的水平条带执行固定轮数细化，每次迭代前检查取消
+    返回条带核心行的结果以及核心行是否发生变化
+    """
+    core_before = band[core_top:core_bottom].copy()
+    cancel_token = None if run_id is None else _WorkerCancelToken(run_id)
+    _zhang_suen_thin(band, iterations, cancel_token)
+    core = band[core_top:core_bottom]
+    return core, not np.array_equal(core, core_before)
+
+def _trace_component_batch(mask, x, y):
+    """
+    进程池任务：对一批连通分量的裁剪图构建骨架图
+    返回路径列表，路径为还原到图像坐标的 int32 (N, 2) 数组
+    """
+    graph = SkeletonGraph(mask)
+    offset = np.array([x, y], dtype=graph.points.dtype)
+    return [graph.points[pixels] + offset for _, _, pixels in graph.edges]
+
+def _sort_by_component(paths, labels):
+    """按路径首点所在连通分量的标签稳定排序"""
+    if not paths:
+        return paths
+    starts = np.array([path[0] for path in paths])
+    order = np.argsort(labels[starts[:, 1], starts[:, 0]], kind='stable')
+    return [paths[i] for i in order]
+
+def _pixel_counts(result, processor, image, *args, **kwargs):
+    return {'pixels': int(image.shape[0] * image.shape[1])}
+
+def _skeleton_counts(result, *args, **kwargs):
+    skeleton = result[..., 0] if result.ndim == 3 else result
+    return {'skeleton_pixels': int(np.count_nonzero(skeleton))}
+
+def _path_counts(paths):
+    return {'paths': len(paths), 'points': sum(len(path) for path in paths)}
+
+def _extract_counts(result, *args, **kwargs):
+    paths, endpoints, crosspoints = result
+    counts = _path_counts(paths)
+    counts.update(endpoints=len(endpoints), crosspoints=len(crosspoints))
+    return counts
+
+def _fit_counts(result, *args, **kwargs):
+    segments = sum(max((len(points) - 1) // 3, 1) for path_type, points in result if path_type == 'bezier')
+    return {'fitted': len(result), 'bezier_segments': segments}
+
+def _visualize_counts(result, processor, image_shape, paths, *args, **kwargs):
+    return {'pixels': int(image_shape[0] * image_shape[1]), 'paths': len(paths)}
+
 class ImageProcessor:
-    def __init__(self):
-        self.cache = {}  # 添加缓存机制
+    def __init__(self, cache_bytes=256 * 1024 * 1024):
+        # 预处理结果缓存：按图像内容指纹和参数索引，超出内存预算时LRU淘汰
+        self.cache = ImageCache(max_bytes=cache_bytes)
+        self._executor = None  # 分块细化使用的进程池（按需创建）
+        self._executor_workers = 0
+        # 与子进程共享的取消标记，值为被取消的细化任务编号
+        self._cancelled_run = None
+        self._run_ids = itertools.count(1)
+        self.skeleton_graph = None  # 最近一次路径提取得到的骨架图，供拟合和绘制复用
+        self._local = threading.local()  # 各线程最近一次细化使用的后端和耗时
     
+    @property
+    def thinning_info(self):
+        """当前线程最近一次细化的 {'backend', 'ms'}（界面和后台线程共用处理器）"""
+        return getattr(self._local, 'thinning_info', None)
+
+    @thinning_info.setter
+    def thinning_info(self, info):
+        self._local.thinning_info = info
+
     def load_image(self, file_path):
         """加载图像文件"""
         try:
@@ -26,14 +210,37 @@ class ImageProcessor:
             print(f"加载图像时出错: {str(e)}")
             return None
     
-    def preprocess(self, image, threshold=127, noise_kernel_size=3):
+    def build_proxy(self, image, target_size):
+        """
+        构建低分辨率代理图像：逐级pyrDown，取仍能覆盖目标显示尺寸 (宽, 高) 的最小金字塔层
+        返回 (代理图像, 代理相对原图的缩放比例)
+        """
+        proxy = image
+        # 标签隐藏或尺寸为0时目标可能小于1，至少保留1像素
+        target_width, target_height = max(int(target_size[0]), 1), max(int(target_size[1]), 1)
+        while True:
+            height, width = proxy.shape[:2]
+            if (width + 1) // 2 < target_width or (height + 1) // 2 < target_height:
+                break
+            smaller = cv2.pyrDown(proxy)
+            # 已缩到最小（如1x1）时pyrDown不再缩小
+            if smaller.shape[:2] == proxy.shape[:2]:
+                break
+            proxy = smaller
+        return proxy, proxy.shape[1] / image.shape[1]
+    
+    @profiled('preprocess', _pixel_counts)
+    def preprocess(self, image, threshold=127, noise_kernel_size=3, cancel_token=None, progress=None):
         """优化预处理性能"""
-        cache_key = (id(image), threshold, noise_kernel_size)
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        check_cancelled(cancel_token)
+        cache_key = (image_fingerprint(image), threshold, noise_kernel_size)
+        result = self.cache.get(cache_key)
+        if result is not None:
+            return result
             
         result = self._do_preprocess(image, threshold, noise_kernel_size)
-        self.cache[cache_key] = result
+        self.cache.put(cache_key, result)
+        report_progress(progress, 1.0)
         return result
     
     def _do_preprocess(self, image, threshold, noise_kernel_size):
@@ -56,77 +263,119 @@ class ImageProcessor:
             print(f"预处理图像时出错: {str(e)}")
             return image 
 
-    def zhang_suen_thinning(self, binary_image):
+    def zhang_suen_thinning(self, binary_image, max_iterations=100, cancel_token=None, progress=None):
         """
-        实现Zhang-Suen细化算法
+        实现Zhang-Suen细化算法（整幅数组向量化版本）
         输入：二值图像（黑底白前景）
         输出：细化后的图像
-        """
-        def neighbors(x, y, image):
-            """获取8邻域像素值"""
-            return [image[x-1, y], image[x-1, y+1],
-                    image[x, y+1], image[x+1, y+1],
-                    image[x+1, y], image[x+1, y-1],
-                    image[x, y-1], image[x-1, y-1]]
-
-        def transitions(neighbors):
-            """计算黑白转换次数"""
-            n = neighbors + neighbors[0:1]
-            return sum((n1, n2) == (0, 1) for n1, n2 in zip(n, n[1:]))
 
+        每个子迭代一次性计算所有前景像素的8邻域编码，
+        再通过256项查找表判定删除，结果与逐像素实现完全一致。
+        """
         if len(binary_image.shape) > 2:
             binary_image = cv2.cvtColor(binary_image, cv2.COLOR_RGB2GRAY)
         
         # 确保图像是二值图像
-        binary_image = binary_image > 127
-        binary_image = binary_image.astype(np.uint8) * 255
+        image = (binary_image > 127).astype(np.uint8)
+        _zhang_suen_thin(image, max_iterations, cancel_token, progress)
         
-        image = binary_image.copy() / 255
-        changing = True
-        iteration = 0
+        return image * 255
+
+    def tiled_thinning(self, binary_image, workers=None, band_height=256,
+                       max_iterations=100, round_iterations=8, cancel_token=None, progress=None):
+        """
+        分块并行Zhang-Suen细化
+        将图像切成水平条带，在进程池中并行细化后拼接。
+        每轮每个条带执行 round_iterations 次迭代，上下各带 2*round_iterations 行重叠，
+        保证核心行与整幅细化逐位一致；各条带核心均无变化时结束，因此拼接处不会产生接缝。
+        """
+        if len(binary_image.shape) > 2:
+            binary_image = cv2.cvtColor(binary_image, cv2.COLOR_RGB2GRAY)
         
-        while changing and iteration < 100:  # 限制最大迭代次数
-            changing = False
-            iteration += 1
-            
-            # 第一子迭代
-            deletion_markers = []
-            for i in range(1, image.shape[0]-1):
-                for j in range(1, image.shape[1]-1):
-                    if image[i, j] == 1:  # 白色前景像素
-                        P = neighbors(i, j, image)
-                        if (2 <= sum(P) <= 6 and  # 条件1
-                            transitions(P) == 1 and  # 条件2
-                            P[0] * P[2] * P[4] == 0 and  # 条件3
-                            P[2] * P[4] * P[6] == 0):  # 条件4
-                            deletion_markers.append((i, j))
+        image = (binary_image > 127).astype(np.uint8)
+        height = image.shape[0]
+        workers = workers or os.cpu_count() or 1
+        band_height = max(1, int(band_height))
+        
+        # 单进程或图像只有一个条带时直接整幅细化
+        if workers <= 1 or height <= band_height:
+            _zhang_suen_thin(image, max_iterations, cancel_token, progress)
+            return image * 255
+        
+        # 条带在子进程中执行，子进程每次迭代前检查取消；父进程等待结果时轮询取消令牌，
+        # 取消后通过共享标记通知子进程
+        expected = _estimate_thinning_iterations(image) if progress is not None else 1
+        
+        bands = [(top, min(top + band_height, height))
+                 for top in range(0, height, band_height)]
+        executor = self._get_executor(workers)
+        run_id = next(self._run_ids)
+        
+        iteration = 0
+        while iteration < max_iterations:
+            check_cancelled(cancel_token)
+            iterations = min(round_iterations, max_iterations - iteration)
+            # 每次迭代包含两个子迭代，边界误差每个子迭代向内传播一行
+            overlap = 2 * iterations
             
-            # 执行删除
-            for i, j in deletion_markers:
-                image[i, j] = 0
-                changing = True
+            futures = []
+            for top, bottom in bands:
+                lo = max(0, top - overlap)
+                hi = min(height, bottom + overlap)
+                futures.append(executor.submit(
+                    _thin_band, image[lo:hi].copy(), iterations, top - lo, bottom - lo, run_id))
+            self._wait_cancellable(futures, run_id, cancel_token)
             
-            # 第二子迭代
-            deletion_markers = []
-            for i in range(1, image.shape[0]-1):
-                for j in range(1, image.shape[1]-1):
-                    if image[i, j] == 1:
-                        P = neighbors(i, j, image)
-                        if (2 <= sum(P) <= 6 and
-                            transitions(P) == 1 and
-                            P[0] * P[2] * P[6] == 0 and  # 条件3'
-                            P[0] * P[4] * P[6] == 0):  # 条件4'
-                            deletion_markers.append((i, j))
+            # 拼接各条带核心行
+            changing = False
+            result = np.empty_like(image)
+            for (top, bottom), future in zip(bands, futures):
+                core, changed = future.result()
+                result[top:bottom] = core
+                changing = changing or changed
             
-            # 执行删除
-            for i, j in deletion_markers:
-                image[i, j] = 0
-                changing = True
+            image = result
+            iteration += iterations
+            if not changing:
+                break
+            report_progress(progress, iteration / max(expected, iteration + 1))
         
-        return (image * 255).astype(np.uint8)
+        return image * 255
+
+    def _wait_cancellable(self, futures, run_id, cancel_token, interval=0.05):
+        """等待进程池任务完成，期间取消时通知子进程、撤销未开始的任务并抛出 ProcessingCancelled"""
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=interval)
+            if cancel_token is not None and cancel_token.cancelled:
+                self._cancelled_run.value = run_id
+                for future in futures:
+                    future.cancel()
+                check_cancelled(cancel_token)
+
+    def _get_executor(self, workers):
+        """获取（必要时重建）指定进程数的进程池"""
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            if self._cancelled_run is None:
+                self._cancelled_run = multiprocessing.Value('q', 0, lock=False)
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                 initargs=(self._cancelled_run,))
+            self._executor_workers = workers
+        return self._executor
 
-    def skeletonize(self, image):
-        """骨架提取主函数"""
+    @profiled('skeletonize', _skeleton_counts)
+    def skeletonize(self, image, workers=1, band_height=256, thinning_backend='zhang-suen',
+                    cancel_token=None, progress=None):
+        """
+        骨架提取主函数
+        workers: 细化进程数，1为单进程，None为使用全部CPU核心
+        band_height: 分块细化时每个条带的行数
+        thinning_backend: 细化后端名称，默认Zhang-Suen；'auto' 为按图像尺寸校准后自动选择（需显式指定）
+        cancel_token: 取消令牌，细化每次迭代前检查；progress: 进度回调，参数为0~1
+        实际使用的后端和耗时记录在 thinning_info
+        """
         try:
             # 确保图像是二值图
             if len(image.shape) > 2:
@@ -140,8 +389,16 @@ class ImageProcessor:
             else:
                 binary = gray
             
-            # 应用Zhang-Suen细化
-            skeleton = self.zhang_suen_thinning(binary)
+            # 分块并行只支持Zhang-Suen细化（多进程时按条带并行）
+            if (workers is None or workers > 1) and thinning_backend in ('auto', 'zhang-suen'):
+                start = time.perf_counter()
+                skeleton = self.tiled_thinning(binary, workers, band_height,
+                                               cancel_token=cancel_token, progress=progress)
+                self.thinning_info = {'backend': 'zhang-suen',
+                                      'ms': round((time.perf_counter() - start) * 1000, 3)}
+            else:
+                skeleton = self.thin(binary, thinning_backend, cancel_token, progress)
+            report_progress(progress, 1.0)
             
             # 转回RGB格式以便显示
             return cv2.cvtColor(skeleton, cv2.COLOR_GRAY2RGB)
@@ -150,8 +407,38 @@ class ImageProcessor:
             print(f"骨架提取时出错: {str(e)}")
             return image 
 
-    def extract_paths(self, skeleton_image):
-        """提取路径，优化端点检测和路径分割"""
+    def thin(self, binary_image, backend='zhang-suen', cancel_token=None, progress=None):
+        """
+        用注册的细化后端细化二值图像，返回0/255骨架
+        backend 为 'auto' 时，每个尺寸档位首次细化会校准所有后端，
+        选出与Zhang-Suen拓扑一致（分量数、孔洞数相同）的最快后端；
+        同档位的后续图像沿用校准结果，骨架可能与Zhang-Suen逐像素不同，因此只在显式指定时使用
+        """
+        image = (binary_image > 127).astype(np.uint8)
+        if backend == 'auto':
+            calibration, skeleton = select_backend(image, cancel_token)
+            backend = calibration['backend']
+            if skeleton is not None:
+                self.thinning_info = {'backend': backend, 'ms': calibration['ms'],
+                                      'calibration': calibration}
+                return skeleton * 255
+
+        skeleton, elapsed = run_backend(backend, image, cancel_token, progress)
+        self.thinning_info = {'backend': backend, 'ms': round(elapsed, 3)}
+        return skeleton * 255
+
+    @profiled('extract_paths', _extract_counts)
+    def extract_paths(self, skeleton_image, merge_method='cluster', workers=1, min_component_size=0,
+                      cancel_token=None, progress=None):
+        """
+        提取路径，优化端点检测和路径分割
+        返回的端点和交叉点为像素邻域分类结果合并相近点后的标记（端点8像素、交叉点5像素内合并），
+        用于显示、保存和拟合；追踪用的骨架图节点见 self.skeleton_graph
+        merge_method: 相近特殊点的合并方式，'cluster'（KD树聚类）或'greedy'（原贪心合并）
+        workers: 追踪进程数，不为1或 min_component_size 大于0时按连通分量分片追踪（结果与不分片相同），None为使用全部CPU核心
+        min_component_size: 像素数小于该值的连通分量（噪点、碎笔画）直接丢弃
+        cancel_token / progress: 取消令牌和进度回调（0~1）
+        """
         try:
             # 转换为二值图像
             if len(skeleton_image.shape) > 2:
@@ -159,7 +446,11 @@ class ImageProcessor:
             else:
                 binary = skeleton_image
             binary = (binary > 127).astype(np.uint8) * 255
-
+            
+            # 标记连通分量并去掉过小的分量，两种模式都按分量标签排列路径
+            sharded = workers != 1 or min_component_size > 0
+            labels, stats, keep, binary = self._label_components(binary, min_component_size)
+            
             # 获取所有非零点坐标
             points = np.column_stack(np.where(binary > 0)[::-1])
             
@@ -167,16 +458,29 @@ class ImageProcessor:
             endpoints, crosspoints = self._find_special_points(binary)
             
             # 合并相近的端点（增加距离阈值）
-            endpoints = self._merge_close_points(endpoints, distance_threshold=8)
+            endpoints = self._merge_close_points(
+                endpoints, distance_threshold=8, method=merge_method)
             
             # 合并相近的交叉点
-            crosspoints = self._merge_close_points(crosspoints, distance_threshold=5)
+            crosspoints = self._merge_close_points(
+                crosspoints, distance_threshold=5, method=merge_method)
+            report_progress(progress, 0.1)
             
-            # 提取路径
-            paths = self._extract_path_segments(binary, endpoints, crosspoints)
+            trace_progress = None if progress is None else lambda f: progress(0.1 + 0.6 * f)
+            if sharded:
+                # 各连通分量分别构建骨架图（可在进程池中并行），路径按分量顺序拼接
+                self.skeleton_graph = None
+                paths = self._trace_components(binary, labels, stats, keep, workers,
+                                               cancel_token, trace_progress)
+            else:
+                # 构建骨架图，每条边即为一条路径段；按分量排序后与分片追踪的结果一致
+                self.skeleton_graph = self.build_skeleton_graph(binary, cancel_token, trace_progress)
+                paths = _sort_by_component(self.skeleton_graph.paths(), labels)
             
             # 优化路径：合并可以连接的路径段
-            paths = self._optimize_paths(paths)
+            paths = self._optimize_paths(
+                paths, cancel_token=cancel_token,
+                progress=None if progress is None else lambda f: progress(0.7 + 0.3 * f))
             
             # 确保路径非空
             if not paths:
@@ -191,14 +495,141 @@ class ImageProcessor:
             print(f"路径提取出错: {str(e)}")
             return [], [], []
 
-    def _merge_close_points(self, points, distance_threshold):
-        """合并距离小于阈值的点"""
+    def _label_components(self, binary, min_component_size=0):
+        """
+        标记8连通分量，返回 (标签图, 分量统计, 保留的标签, 去掉小分量后的二值图)
+        标签按分量首个像素的行优先顺序编号
+        """
+        foreground = (binary > 0).astype(np.uint8)
+        # 分量数不超过前景像素数，像素较少时用16位标签图减少内存带宽
+        label_type = cv2.CV_16U if cv2.countNonZero(foreground) < 65535 else cv2.CV_32S
+        n_labels, labels, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            foreground, 8, label_type, cv2.CCL_DEFAULT)
+        keep = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] >= max(min_component_size, 1)) + 1
+        if len(keep) < n_labels - 1:
+            kept = np.zeros(n_labels, dtype=bool)
+            kept[keep] = True
+            binary = kept[labels].astype(np.uint8) * 255
+        return labels, stats, keep, binary
+
+    def _trace_components(self, binary, labels, stats, keep, workers=1, cancel_token=None, progress=None):
+        """
+        按连通分量分片追踪路径并还原到图像坐标，binary 为去掉小分量后的二值图
+        标签连续的分量按像素数分成大小相近的批次（每个进程约4批），
+        每批裁剪外接矩形后构建一个骨架图；路径按分量标签稳定排序，顺序与进程数无关
+        """
+        workers = workers or os.cpu_count() or 1
+        areas = stats[keep, cv2.CC_STAT_AREA]
+        if workers <= 1:
+            bounds = [0, len(keep)]
+        else:
+            # 按累计像素数切分批次
+            batch_area = max(areas.sum() / (workers * 4), 1)
+            cumulative = np.cumsum(areas)
+            bounds = np.searchsorted(cumulative, np.arange(batch_area, cumulative[-1], batch_area))
+            bounds = np.unique(np.concatenate(([0], bounds + 1, [len(keep)])))
+            bounds = bounds[bounds <= len(keep)].tolist()
+        
+        batches = []
+        if len(bounds) == 2:
+            # 只有一批时直接使用整幅前景
+            bounds = []
+            batches.append(((binary > 0).astype(np.uint8), 0, 0))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            batch_labels = keep[start:end]
+            left = stats[batch_labels, cv2.CC_STAT_LEFT]
+            top = stats[batch_labels, cv2.CC_STAT_TOP]
+            x0, y0 = int(left.min()), int(top.min())
+            x1 = int((left + stats[batch_labels, cv2.CC_STAT_WIDTH]).max())
+            y1 = int((top + stats[batch_labels, cv2.CC_STAT_HEIGHT]).max())
+            crop = labels[y0:y1, x0:x1]
+            mask = (crop >= batch_labels[0]) & (crop <= batch_labels[-1])
+            if len(batch_labels) != batch_labels[-1] - batch_labels[0] + 1:
+                mask &= np.isin(crop, batch_labels)
+            batches.append((mask.astype(np.uint8), x0, y0))
+        
+        results = []
+        if workers <= 1 or len(batches) < 2:
+            for index, batch in enumerate(batches):
+                check_cancelled(cancel_token)
+                results.extend(_trace_component_batch(*batch))
+                report_progress(progress, (index + 1) / len(batches))
+        else:
+            executor = self._get_executor(workers)
+            futures = [executor.submit(_trace_component_batch, *batch) for batch in batches]
+            try:
+                for index, future in enumerate(futures):
+                    check_cancelled(cancel_token)
+                    results.extend(future.result())
+                    report_progress(progress, (index + 1) / len(futures))
+            finally:
+                for future in futures:
+                    future.cancel()
+        
+        return [list(map(tuple, path.tolist())) for path in _sort_by_component(results, labels)]
+
+    @profiled('simplify_paths', lambda result, *args, **kwargs: _path_counts(result))
+    def simplify_paths(self, paths, tolerance=1.0, cancel_token=None, progress=None):
+        """
+        Ramer-Douglas-Peucker路径简化，去除偏差不超过 tolerance 像素的冗余点
+        tolerance 为0时原样返回
+        """
+        check_cancelled(cancel_token)
+        report_progress(progress, 1.0)
+        if not tolerance:
+            return paths
+        try:
+            return simplify_paths(paths, tolerance)
+        except Exception as e:
+            print(f"路径简化出错: {str(e)}")
+            return paths
+
+    def build_skeleton_graph(self, skeleton_image, cancel_token=None, progress=None):
+        """构建骨架像素图（节点为端点/交叉点，边为二者之间的像素链）"""
+        return SkeletonGraph(skeleton_image, cancel_token, progress)
+
+    def _merge_close_points(self, points, distance_threshold, method='cluster'):
+        """
+        合并距离小于阈值的点
+        method='cluster'：KD树查找近邻点对，按连通分量聚类后取质心，
+                          O(n log n)且结果与输入顺序无关（按y、x排序输出）
+        method='greedy'：原距离矩阵贪心合并，O(n²)内存，结果依赖输入顺序
+        """
         if len(points) < 2:
-            return points
+            return [tuple(map(int, p)) for p in points]
         
         # 转换为numpy数组
         points = np.array(points)
         
+        if method == 'greedy':
+            return self._merge_close_points_greedy(points, distance_threshold)
+        
+        # 查找距离严格小于阈值的所有点对
+        tree = cKDTree(points)
+        pairs = tree.query_pairs(np.nextafter(distance_threshold, 0), output_type='ndarray')
+        
+        # 点对构成无向图，连通分量即为聚类（等价于并查集合并）
+        n_points = len(points)
+        graph = csr_matrix(
+            (np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+            shape=(n_points, n_points)
+        )
+        n_clusters, labels = connected_components(graph, directed=False)
+        
+        # 计算每个聚类的质心
+        counts = np.bincount(labels, minlength=n_clusters)
+        centroids = np.column_stack([
+            np.bincount(labels, weights=points[:, axis], minlength=n_clusters)
+            for axis in range(2)
+        ]) / counts[:, None]
+        merged = centroids.astype(int)
+        
+        # 按行优先顺序输出，保证与输入顺序无关
+        order = np.lexsort((merged[:, 0], merged[:, 1]))
+        return [tuple(map(int, p)) for p in merged[order]]
+
+    def _merge_close_points_greedy(self, points, distance_threshold):
+        """原贪心合并逻辑（距离矩阵）"""
         # 计算点之间的距离矩阵
         distances = cdist(points, points)
         
@@ -226,11 +657,50 @@ class ImageProcessor:
         
         return merged_points
 
-    def _optimize_paths(self, paths):
-        """优化路径，合并可以连接的路径段"""
+    def _optimize_paths(self, paths, threshold=5, cancel_token=None, progress=None):
+        """
+        优化路径，合并可以连接的路径段
+        使用端点网格索引查找可连接路径：每一步仍选择序号最小的可连接路径，
+        结果与逐条扫描的贪心连接完全一致，但整体接近线性时间
+        """
         if len(paths) < 2:
             return paths
         
+        # 网格索引：单元格边长等于连接阈值，只需检查相邻3x3单元格
+        grid = {}
+        
+        def cell_of(point):
+            return (int(point[0] // threshold), int(point[1] // threshold))
+        
+        for index, path in enumerate(paths):
+            for point in (path[0], path[-1]):
+                grid.setdefault(cell_of(point), set()).add(index)
+        
+        def remove_from_grid(index):
+            for point in (paths[index][0], paths[index][-1]):
+                cell = grid.get(cell_of(point))
+                if cell is not None:
+                    cell.discard(index)
+        
+        def is_close(p, q):
+            dx = float(p[0]) - float(q[0])
+            dy = float(p[1]) - float(q[1])
+            return dx * dx + dy * dy < threshold * threshold
+        
+        def find_connection(current_path):
+            """返回端点与当前路径首尾距离小于阈值的最小路径序号"""
+            best = None
+            for end in (current_path[0], current_path[-1]):
+                cx, cy = cell_of(end)
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for j in grid.get((cx + dx, cy + dy), ()):
+                            if best is not None and j >= best:
+                                continue
+                            if is_close(end, paths[j][0]) or is_close(end, paths[j][-1]):
+                                best = j
+            return best
+        
         optimized_paths = []
         used_paths = set()
         
@@ -238,42 +708,30 @@ class ImageProcessor:
             if i in used_paths:
                 continue
             
+            # 每处理64条路径检查一次取消并报告进度
+            if i % 64 == 0:
+                check_cancelled(cancel_token)
+                report_progress(progress, len(used_paths) / len(paths))
+            
             current_path = list(path1)
             used_paths.add(i)
+            remove_from_grid(i)
             
             # 尝试连接其他路径
             while True:
-                found_connection = False
-                
-                for j, path2 in enumerate(paths):
-                    if j in used_paths:
-                        continue
-                    
-                    # 检查路径端点是否接近
-                    if self._can_connect_paths(current_path, path2):
-                        # 连接路径
-                        current_path = self._connect_paths(current_path, path2)
-                        used_paths.add(j)
-                        found_connection = True
-                        break
-                
-                if not found_connection:
+                j = find_connection(current_path)
+                if j is None:
                     break
+                
+                # 连接路径
+                current_path = self._connect_paths(current_path, paths[j])
+                used_paths.add(j)
+                remove_from_grid(j)
             
             optimized_paths.append(current_path)
         
         return optimized_paths
 
-    def _can_connect_paths(self, path1, path2, threshold=5):
-        """检查两条路径是否可以连接"""
-        # 检查首尾端点的距离
-        dist1 = np.sqrt(np.sum((np.array(path1[-1]) - np.array(path2[0]))**2))
-        dist2 = np.sqrt(np.sum((np.array(path1[-1]) - np.array(path2[-1]))**2))
-        dist3 = np.sqrt(np.sum((np.array(path1[0]) - np.array(path2[0]))**2))
-        dist4 = np.sqrt(np.sum((np.array(path1[0]) - np.array(path2[-1]))**2))
-        
-        return min(dist1, dist2, dist3, dist4) < threshold
-
     def _connect_paths(self, path1, path2):
         """连接两条路径"""
         # 计算所有可能的连接方式的距离
@@ -299,6 +757,7 @@ class ImageProcessor:
         else:
             return list(reversed(path1)) + list(reversed(path2))
 
+    @profiled('visualize_paths', _visualize_counts)
     def visualize_paths(self, image_shape, paths, endpoints, crosspoints):
         """可视化路径、端点和交叉点"""
         # 创建彩色图像
@@ -318,17 +777,16 @@ class ImageProcessor:
             (255, 128, 255),  # 淡粉色
         ]
         
-        # 绘制路径（使用不同颜色）
+        # 绘制路径（循环使用颜色，同色路径一次绘制）
+        draw_paths_cycled(result, to_polylines(paths), colors, 2)  # 增加线条宽度
+        
+        # 在路径的起点和终点绘制小圆点
         for i, path in enumerate(paths):
-            color = colors[i % len(colors)]  # 循环使用颜色
-            # 绘制路径线条
-            for j in range(len(path) - 1):
-                pt1 = path[j]
-                pt2 = path[j + 1]
-                cv2.line(result, pt1, pt2, color, 2)  # 增加线条宽度
-            # 在路径的起点和终点绘制小圆点
-            cv2.circle(result, path[0], 2, color, -1)
-            cv2.circle(result, path[-1], 2, color, -1)
+            if len(path) == 0:
+                continue
+            color = colors[i % len(colors)]
+            cv2.circle(result, tuple(path[0]), 2, color, -1)
+            cv2.circle(result, tuple(path[-1]), 2, color, -1)
         
         # 绘制端点（绿色，稍大一些）
         for point in endpoints:
@@ -344,15 +802,30 @@ class ImageProcessor:
         
         return result 
 
-    def fit_paths(self, paths, endpoints, crosspoints, line_threshold=0.98, control_dist_factor=0.25):
-        """路径拟合主函数"""
+    @profiled('fit_paths', _fit_counts)
+    def fit_paths(self, paths, endpoints, crosspoints, line_threshold=0.98, control_dist_factor=0.25,
+                  bezier_tolerance=2.0, cancel_token=None, progress=None):
+        """
+        路径拟合主函数
+        bezier_tolerance > 0 时曲线用分段三次贝塞尔最小二乘拟合，误差不超过该像素数；
+        为0时退回单段曲线（由 control_dist_factor 决定控制点）
+        每条路径拟合前检查取消，按已拟合的点数报告进度
+        """
         try:
             fitted_paths = []
+            total_points = max(sum(len(path) for path in paths), 1)
+            done_points = 0
             for path in paths:
+                check_cancelled(cancel_token)
+                report_progress(progress, done_points / total_points)
+                done_points += len(path)
                 # 判断路径类型并进行相应拟合
                 if self._is_line(path, threshold=line_threshold):
                     fitted_path = self._fit_line(path)
                     fitted_paths.append(('line', fitted_path))
+                elif bezier_tolerance:
+                    fitted_path = self._fit_piecewise_bezier(path, bezier_tolerance)
+                    fitted_paths.append(('bezier', fitted_path))
                 else:
                     fitted_path = self._fit_bezier(path, control_dist_factor)
                     fitted_paths.append(('bezier', fitted_path))
@@ -379,15 +852,18 @@ class ImageProcessor:
 
     def _fit_line(self, path):
         """拟合直线"""
-        points = np.array(path)
-        vx, vy, x0, y0 = cv2.fitLine(points, cv2.DIST_L2, 0, 0.01, 0.01)
+        points = np.array(path, dtype=np.float32)
+        if len(points) < 2:
+            return [tuple(map(int, points[0]))] * 2
+        vx, vy, x0, y0 = cv2.fitLine(points, cv2.DIST_L2, 0, 0.01, 0.01).ravel()
         
-        # 计算直线的两个端点
-        t = np.array([0, 1])
-        x = x0 + vx * t[:, np.newaxis]
-        y = y0 + vy * t[:, np.newaxis]
+        # 将首尾点投影到拟合直线上得到线段端点
+        direction = np.array([vx, vy])
+        origin = np.array([x0, y0])
+        t = (points[[0, -1]] - origin) @ direction
+        ends = origin + t[:, np.newaxis] * direction
         
-        return [(int(x[0]), int(y[0])), (int(x[1]), int(y[1]))]
+        return [tuple(map(int, np.round(p))) for p in ends]
 
     def _fit_bezier(self, path, control_dist_factor=0.25):
         """拟合三次贝塞尔曲线"""
@@ -430,8 +906,16 @@ class ImageProcessor:
         
         return [tuple(map(int, p)) for p in [p0, p1, p2, p3]]
 
-    def visualize_fitted_paths(self, image_shape, fitted_paths, endpoints, crosspoints):
-        """可视化拟合后的路径，增加采样点数量"""
+    def _fit_piecewise_bezier(self, path, tolerance=2.0):
+        """分段三次贝塞尔拟合，返回首尾相接的 3n+1 个控制点"""
+        if len(path) < 4:
+            return list(path)
+        control_points = fit_piecewise_bezier(path, tolerance)
+        return [tuple(map(int, p)) for p in np.round(control_points)]
+
+    @profiled('visualize_fitted_paths', _visualize_counts)
+    def visualize_fitted_paths(self, image_shape, fitted_paths, endpoints, crosspoints, samples=200):
+        """可视化拟合后的路径，每条曲线采样 samples 个点"""
         result = np.zeros((*image_shape[:2], 3), dtype=np.uint8)
         
         # 定义颜色
@@ -443,23 +927,25 @@ class ImageProcessor:
             (128, 255, 0),    # 黄绿色
         ]
         
-        # 绘制拟合路径
+        # 收集曲线控制点（分段三次曲线 3n+1 个控制点按段拆开）
+        polylines = {}
+        curves = []
+        owners = []
         for i, (path_type, path) in enumerate(fitted_paths):
-            color = colors[i % len(colors)]
             if path_type == 'line':
-                # 绘制直线
-                cv2.line(result, path[0], path[1], color, 2)
-            else:  # bezier
-                # 增加采样点数量，使曲线更平滑
-                points = np.array(path)
-                prev_point = None
-                for t in np.linspace(0, 1, 200):  # 增加采样点
-                    point = self._bezier_point(points, t)
-                    current_point = tuple(map(int, point))
-                    
-                    if prev_point is not None:
-                        cv2.line(result, prev_point, current_point, color, 2)
-                    prev_point = current_point
+                polylines[i] = [np.array(path[:2], dtype=np.int32)]
+            elif len(path) > 4 and (len(path) - 1) % 3 == 0:
+                curves.extend(split_segments(path))
+                owners.extend([i] * ((len(path) - 1) // 3))
+            elif len(path) > 0:
+                curves.append(path)
+                owners.append(i)
+        
+        # 所有曲线一次批量采样，按路径顺序每条路径用一次polylines绘制
+        for i, points in zip(owners, evaluate_curves(curves, samples)):
+            polylines.setdefault(i, []).append(points.astype(np.int32))
+        for i in sorted(polylines):
+            cv2.polylines(result, polylines[i], False, colors[i % len(colors)], 2)
         
         # 绘制端点和交叉点
         for point in endpoints:
@@ -472,137 +958,29 @@ class ImageProcessor:
         
         return result
 
-    def _bezier_point(self, points, t):
-        """计算贝塞尔曲线上的点"""
-        if len(points) == 1:
-            return points[0]
-        
-        new_points = []
-        for i in range(len(points) - 1):
-            x = points[i][0] * (1 - t) + points[i + 1][0] * t
-            y = points[i][1] * (1 - t) + points[i + 1][1] * t
-            new_points.append((x, y))
-        
-        return self._bezier_point(new_points, t)
-
     def _find_special_points(self, binary):
-        """查找端点和交叉点"""
-        # 获取所有非零点坐标
-        points = np.column_stack(np.where(binary > 0)[::-1])
-        
-        endpoints = []
-        crosspoints = []
-        
-        # 定义8邻域的偏移量
-        neighbors = [(-1,-1), (-1,0), (-1,1),
-                    (0,-1),          (0,1),
-                    (1,-1),  (1,0),  (1,1)]
-        
-        height, width = binary.shape
-        
-        # 检查每个白色像素点
-        for x, y in points:
-            # 统计8邻域内的白色像素数量
-            neighbor_count = 0
-            for dx, dy in neighbors:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < width and 0 <= ny < height and 
-                    binary[ny, nx] > 0):
-                    neighbor_count += 1
-            
-            # 根据邻域像素数量判断点的类型
-            if neighbor_count == 1:
-                endpoints.append((x, y))
-            elif neighbor_count > 2:
-                crosspoints.append((x, y))
+        """
+        查找端点和交叉点
+        对整幅骨架做一次3x3邻域计数卷积，返回 (N, 2) 的 (x, y) 坐标数组
+        """
+        skeleton = (binary > 0).astype(np.uint8)
+        
+        # 3x3窗口求和（图像外按背景处理），减去中心即为8邻域白色像素数量
+        window_sum = cv2.boxFilter(
+            skeleton, -1, (3, 3), normalize=False,
+            borderType=cv2.BORDER_CONSTANT
+        )
+        
+        # 骨架点坐标，按行优先顺序排列
+        points = cv2.findNonZero(skeleton)
+        if points is None:
+            empty = np.empty((0, 2), dtype=np.int32)
+            return empty, empty.copy()
+        points = points.reshape(-1, 2)
+        neighbor_count = window_sum[points[:, 1], points[:, 0]] - 1
+        
+        # 根据邻域像素数量判断点的类型
+        endpoints = points[neighbor_count == 1]
+        crosspoints = points[neighbor_count > 2]
         
         return endpoints, crosspoints
-
-    def _extract_path_segments(self, binary, endpoints, crosspoints):
-        """提取路径段"""
-        # 创建所有特殊点的集合
-        special_points = set(tuple(p) for p in endpoints + crosspoints)
-        
-        # 获取所有路径点
-        path_points = np.column_stack(np.where(binary > 0)[::-1])
-        
-        # 创建已访问点的集合
-        visited = set()
-        paths = []
-        
-        # 定义8邻域的偏移量（按顺时针排序）
-        neighbors = [(-1,0), (-1,1), (0,1), (1,1),
-                    (1,0), (1,-1), (0,-1), (-1,-1)]
-        
-        height, width = binary.shape
-        
-        def get_neighbors(point):
-            """获取点的有效邻居（按顺时针顺序）"""
-            x, y = point
-            valid_neighbors = []
-            for dx, dy in neighbors:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < width and 0 <= ny < height and 
-                    binary[ny, nx] > 0 and
-                    (nx, ny) not in visited):
-                    valid_neighbors.append((nx, ny))
-            return valid_neighbors
-        
-        def trace_path(start_point):
-            """从起点追踪路径"""
-            current_path = [start_point]
-            visited.add(start_point)
-            current_point = start_point
-            
-            while True:
-                # 获取当前点的未访问邻居
-                next_points = get_neighbors(current_point)
-                
-                # 如果没有未访问的邻居，结束路径
-                if not next_points:
-                    break
-                
-                # 选择最接近当前方向的下一个点
-                if len(current_path) > 1:
-                    last_dir = np.array(current_point) - np.array(current_path[-2])
-                    next_dirs = [np.array(p) - np.array(current_point) for p in next_points]
-                    angles = [np.arctan2(np.cross(last_dir, d), np.dot(last_dir, d)) for d in next_dirs]
-                    next_point = next_points[np.argmin(np.abs(angles))]
-                else:
-                    next_point = next_points[0]
-                
-                # 如果下一个点是特殊点，将其添加到路径后结束
-                if next_point in special_points and len(current_path) > 1:
-                    current_path.append(next_point)
-                    visited.add(next_point)
-                    break
-                
-                # 继续路径
-                current_path.append(next_point)
-                visited.add(next_point)
-                current_point = next_point
-            
-            return current_path
-        
-        # 从每个端点和交叉点开始追踪路径
-        for start_point in special_points:
-            if start_point not in visited:
-                path = trace_path(start_point)
-                if len(path) > 1:
-                    paths.append(path)
-                # 从这个点开始向所有未访问的邻居追踪
-                for neighbor in get_neighbors(start_point):
-                    if neighbor not in visited:
-                        path = trace_path(start_point)
-                        if len(path) > 1:
-                            paths.append(path)
-        
-        # 处理可能的闭合路径
-        for point in path_points:
-            point = tuple(point)
-            if point not in visited:
-                path = trace_path(point)
-                if len(path) > 1:
-                    paths.append(path)
-        
-        return paths
\ No newline at end of file
@@ -2,16 +2,27 @@ import sys
 import os
 import cv2
 import numpy as np
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSlider, QSpinBox, QGridLayout, QGroupBox, QCheckBox, QSplitter, QDialog, QProgressBar, QDoubleSpinBox, QProgressDialog
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSlider, QSpinBox, QGridLayout, QGroupBox, QCheckBox, QSplitter, QDialog, QProgressBar, QDoubleSpinBox, QProgressDialog, QComboBox
 from PyQt5.QtGui import QImage, QPixmap, QPainter
 from PyQt5.QtCore import Qt, QPoint, QSize, QThread, pyqtSignal, QTimer, QSettings
 
 from image_processor import ImageProcessor
-from path_data import PathData
+from thinning import available_backends, REFERENCE_BACKEND
+from pipeline import ProcessingPipeline
+from path_simplify import point_reduction
+from stroke_order import plan_order, apply_order
+from task_control import CancelToken, ProcessingCancelled
+from profiling import profiler, profiled, PROFILE_DIR_ENV
+from path_data import PathData, path_format
+from autosave import AutoSaver
+from path_binary import BINARY_EXTENSION
+from path_codec import CHAIN_EXTENSION
 from path_animator import PathAnimator
 from export_thread import ExportThread
 
 class ZoomableLabel(QLabel):
+    resized = pyqtSignal()  # 显示区域大小改变
+    
     def __init__(self, title="", partner=None):
         super().__init__(title)
         self.setAlignment(Qt.AlignCenter)
@@ -49,6 +60,10 @@ class ZoomableLabel(QLabel):
         
         self._update_scaled_pixmap()
         
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
+        
     def wheelEvent(self, event):
         if self.original_pixmap:
             # 获取鼠标相对于图片的位置
@@ -138,31 +153,80 @@ class ProcessingThread(QThread):
     progress = pyqtSignal(int)
     error = pyqtSignal(str)
     
-    def __init__(self, processor, image, operation, params=None):
+    # 各阶段在总进度中所占的相对比重（大致按典型耗时）
+    STAGE_WEIGHTS = {
+        'preprocess': 1,
+        'skeletonize': 6,
+        'extract_paths': 2,
+        'simplify_paths': 0.5,
+        'fit_paths': 2,
+    }
+    
+    def __init__(self, processor, image, operation, params=None, pipeline=None):
         super().__init__()
         self.processor = processor
         self.image = image
         self.operation = operation
         self.params = params or {}
+        self.pipeline = pipeline
         self.is_running = True
+        # 取消令牌：各阶段在迭代中检查，stop后很快中止正在进行的计算
+        self.cancel_token = CancelToken()
+        self._last_percent = -1
+        self._stage_ranges = {}  # 阶段 -> (起点, 占比)，在总进度中的区间
+    
+    def _on_progress(self, fraction):
+        """阶段进度回调（在工作线程中调用），百分比变化时才发出信号"""
+        percent = int(fraction * 100)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.progress.emit(percent)
+    
+    def _on_stage_progress(self, stage, fraction):
+        """流水线进度回调：阶段内的进度映射到该阶段在总进度中的区间"""
+        start, share = self._stage_ranges.get(stage, (0.0, 1.0))
+        self._on_progress(start + share * fraction)
+    
+    def _plan_stages(self):
+        """按需要计算的阶段及其比重划分总进度区间"""
+        stages = []
+        stage = self.operation
+        while stage is not None and not self.pipeline.is_current(stage):
+            stages.insert(0, stage)
+            stage = self.pipeline.STAGES[stage][0]
+        total = sum(self.STAGE_WEIGHTS.get(stage, 1) for stage in stages) or 1
+        start = 0.0
+        self._stage_ranges = {}
+        for stage in stages:
+            share = self.STAGE_WEIGHTS.get(stage, 1) / total
+            self._stage_ranges[stage] = (start, share)
+            start += share
     
     def run(self):
         try:
             if not self.is_running:
                 return
-                
-            if self.operation == 'preprocess':
-                result = self.processor.preprocess(self.image, **self.params)
+            
+            control = {'cancel_token': self.cancel_token, 'progress': self._on_progress}
+            if self.pipeline is not None:
+                # 通过流水线执行，未变化的上游阶段直接复用
+                self._plan_stages()
+                result = self.pipeline.run(self.operation, self.cancel_token, self._on_stage_progress)
+                if not self.is_running:
+                    return
+                self.finished.emit(result)
+            elif self.operation == 'preprocess':
+                result = self.processor.preprocess(self.image, **self.params, **control)
                 if not self.is_running:
                     return
                 self.finished.emit(result)
             elif self.operation == 'skeletonize':
-                result = self.processor.skeletonize(self.image)
+                result = self.processor.skeletonize(self.image, **self.params, **control)
                 if not self.is_running:
                     return
                 self.finished.emit(result)
             elif self.operation == 'extract_paths':
-                paths, endpoints, crosspoints = self.processor.extract_paths(self.image)
+                paths, endpoints, crosspoints = self.processor.extract_paths(self.image, **control)
                 if not self.is_running:
                     return
                 self.finished.emit((paths, endpoints, crosspoints))
@@ -170,11 +234,15 @@ class ProcessingThread(QThread):
                 result = self.processor.fit_paths(
                     self.params['paths'],
                     self.params['endpoints'],
-                    self.params['crosspoints']
+                    self.params['crosspoints'],
+                    **control
                 )
                 if not self.is_running:
                     return
                 self.finished.emit(result)
+        except ProcessingCancelled:
+            # 已被新的处理取代或超时终止，不发出结果
+            return
         except Exception as e:
             self.error.emit(str(e))
             if self.operation == 'extract_paths':
@@ -184,7 +252,8 @@ class ProcessingThread(QThread):
     
     def stop(self):
         self.is_running = False
-        self.wait()  # 等待线程完成
+        self.cancel_token.cancel()
+        self.wait()  # 等待线程完成（取消后各阶段会在下一次检查时退出）
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -194,7 +263,17 @@ class MainWindow(QMainWindow):
         
         # 初始化处理器和路径数据对象
         self.processor = ImageProcessor()
+        self.pipeline = ProcessingPipeline(self.processor)
+        # 代理预览使用的独立流水线，输入为按显示区域缩小的金字塔层
+        self.proxy_pipeline = ProcessingPipeline(self.processor)
+        self.proxy_scale = 1.0
+        self.proxy_size = (0, 0)
+        self.proxy_target = None  # 构建代理图像时的显示区域大小
+        self.proxy_pending = False  # 代理预览的参数尚未应用到原图
+        self.commit_actions = None  # 原图提交进行中时，完成后要继续执行的操作
         self.path_data = PathData()
+        self.mapped_file = None  # 当前路径数据内存映射的文件
+        self.autosaver = AutoSaver(delay=1.0)  # 后台自动保存，合并1秒内的连续更新
         
         # 初始化动画器
         self.animator = PathAnimator()
@@ -218,6 +297,7 @@ class MainWindow(QMainWindow):
         # 建立两个Label的关联
         self.original_label.setPartner(self.processed_label)
         self.processed_label.setPartner(self.original_label)
+        self.processed_label.resized.connect(self.on_processed_label_resized)
         
         left_widget.addWidget(self.original_label)
         left_widget.addWidget(self.processed_label)
@@ -304,6 +384,39 @@ class MainWindow(QMainWindow):
         self.auto_save.setChecked(False)
         param_layout.addWidget(self.auto_save, 5, 0, 1, 3)
         
+        # 低分辨率代理预览：拖动参数时只处理缩小的图像，点击预处理或保存时再处理原图
+        self.proxy_checkbox = QCheckBox("低分辨率预览")
+        self.proxy_checkbox.setChecked(True)
+        param_layout.addWidget(self.proxy_checkbox, 6, 0, 1, 3)
+        
+        # 性能分析：记录各阶段耗时和内存，结果显示在状态栏并按图像保存为JSON
+        self.profile_checkbox = QCheckBox("性能分析")
+        self.profile_checkbox.setChecked(profiler.enabled)
+        param_layout.addWidget(self.profile_checkbox, 7, 0, 1, 3)
+        
+        # 路径提取：丢弃像素数过少的连通分量，可按分量多进程并行追踪
+        param_layout.addWidget(QLabel("最小笔画:"), 8, 0)
+        self.min_component_spin = QSpinBox()
+        self.min_component_spin.setRange(0, 10000)
+        self.min_component_spin.setValue(0)
+        self.min_component_spin.setSuffix(" 像素")
+        self.min_component_spin.setToolTip("像素数小于该值的孤立笔画视为噪点丢弃，0表示保留全部")
+        param_layout.addWidget(self.min_component_spin, 8, 1, 1, 2)
+        
+        self.parallel_checkbox = QCheckBox("多进程处理")
+        self.parallel_checkbox.setChecked(False)
+        param_layout.addWidget(self.parallel_checkbox, 9, 0, 1, 3)
+        
+        # 细化后端：默认Zhang-Suen，自动选择会按图像尺寸校准后选用与参照拓扑一致的最快后端
+        param_layout.addWidget(QLabel("细化后端:"), 10, 0)
+        self.thinning_combo = QComboBox()
+        self.thinning_combo.addItem(REFERENCE_BACKEND, REFERENCE_BACKEND)
+        self.thinning_combo.addItem("自动选择", 'auto')
+        for name in available_backends():
+            if name != REFERENCE_BACKEND:
+                self.thinning_combo.addItem(name, name)
+        param_layout.addWidget(self.thinning_combo, 10, 1, 1, 2)
+        
         param_group.setLayout(param_layout)
         right_layout.addWidget(param_group)
         
@@ -329,6 +442,34 @@ class MainWindow(QMainWindow):
         self.control_dist_spin.setValue(0.25)
         fit_params_layout.addWidget(self.control_dist_spin, 1, 1)
         
+        # 曲线拟合容差控制（像素，0表示单段曲线）
+        fit_params_layout.addWidget(QLabel("拟合容差:"), 2, 0)
+        self.bezier_tolerance_spin = QDoubleSpinBox()
+        self.bezier_tolerance_spin.setRange(0.0, 20.0)
+        self.bezier_tolerance_spin.setSingleStep(0.5)
+        self.bezier_tolerance_spin.setDecimals(1)
+        self.bezier_tolerance_spin.setValue(2.0)
+        fit_params_layout.addWidget(self.bezier_tolerance_spin, 2, 1)
+        
+        # 路径简化容差控制（像素，0表示不简化）
+        fit_params_layout.addWidget(QLabel("简化容差:"), 3, 0)
+        self.simplify_spin = QDoubleSpinBox()
+        self.simplify_spin.setRange(0.0, 10.0)
+        self.simplify_spin.setSingleStep(0.5)
+        self.simplify_spin.setDecimals(1)
+        self.simplify_spin.setValue(0.0)
+        fit_params_layout.addWidget(self.simplify_spin, 3, 1)
+        
+        # 保存和动画使用简化后的路径
+        self.save_simplified_checkbox = QCheckBox("保存简化路径")
+        self.save_simplified_checkbox.setChecked(False)
+        fit_params_layout.addWidget(self.save_simplified_checkbox, 4, 0, 1, 2)
+        
+        # 保存和动画按抬笔移动最短的顺序排列路径
+        self.order_checkbox = QCheckBox("优化笔画顺序")
+        self.order_checkbox.setChecked(False)
+        fit_params_layout.addWidget(self.order_checkbox, 4, 2)
+        
         # 拟合控制按钮
         fit_control_layout = QHBoxLayout()
         self.fit_enabled_checkbox = QCheckBox("启用拟合")
@@ -340,7 +481,7 @@ class MainWindow(QMainWindow):
         fit_control_layout.addWidget(self.fit_enabled_checkbox)
         fit_control_layout.addWidget(self.fit_preview_btn)
         fit_control_layout.addWidget(self.fit_apply_btn)
-        fit_params_layout.addLayout(fit_control_layout, 2, 0, 1, 2)
+        fit_params_layout.addLayout(fit_control_layout, 5, 0, 1, 2)
         
         fit_params_group.setLayout(fit_params_layout)
         right_layout.addWidget(fit_params_group)
@@ -430,6 +571,8 @@ class MainWindow(QMainWindow):
         
         # 存储提取的路径数据
         self.paths = []
+        self.simplified_paths = []
+        self._ordered = None  # (原路径, 顺序, 是否反向, 重排后的路径)，原路径不变时复用
         self.endpoints = []
         self.crosspoints = []
         
@@ -474,14 +617,23 @@ class MainWindow(QMainWindow):
         self.threshold_spin.valueChanged.connect(lambda: self.on_param_changed(False))
         self.noise_slider.valueChanged.connect(lambda: self.on_param_changed(False))
         self.noise_spin.valueChanged.connect(lambda: self.on_param_changed(False))
+        self.min_component_spin.valueChanged.connect(lambda: self.on_param_changed(False))
+        self.parallel_checkbox.stateChanged.connect(self.on_parallel_changed)
+        self.thinning_combo.currentIndexChanged.connect(lambda: self.on_param_changed(False))
         
         # 预览复选框状态改变时立即更新
         self.preview_checkbox.stateChanged.connect(lambda: self.on_param_changed(True))
+        self.profile_checkbox.stateChanged.connect(
+            lambda state: profiler.set_enabled(state == Qt.Checked))
         
         # 更新拟合参数连接
         self.line_threshold_spin.valueChanged.connect(self.preview_fit_paths)
         self.control_dist_spin.valueChanged.connect(self.preview_fit_paths)
+        self.bezier_tolerance_spin.valueChanged.connect(self.preview_fit_paths)
         self.fit_enabled_checkbox.stateChanged.connect(self.preview_fit_paths)
+        self.simplify_spin.valueChanged.connect(self.on_simplify_changed)
+        self.save_simplified_checkbox.stateChanged.connect(self.on_simplify_changed)
+        self.order_checkbox.stateChanged.connect(self.on_simplify_changed)
         self.fit_preview_btn.clicked.connect(self.preview_fit_paths)
         self.fit_apply_btn.clicked.connect(self.apply_fit_paths)
         
@@ -509,6 +661,7 @@ class MainWindow(QMainWindow):
         if file_name:
             self.last_directory = os.path.dirname(file_name)
             self.current_image = self.processor.load_image(file_name)
+            self.begin_profile(file_name)
             
             if self.current_image is not None:
                 h, w = self.current_image.shape[:2]
@@ -522,6 +675,8 @@ class MainWindow(QMainWindow):
                     self.current_image = cv2.resize(self.current_image, new_size)
                     self.progress_label.setText(f"图像已自动缩放至 {new_size[0]}x{new_size[1]}")
                 
+                self.pipeline.set_image(self.current_image)
+                self.update_proxy_image()
                 self.display_image(self.current_image, self.original_label)
                 self.preprocess_btn.setEnabled(True)
                 self.preprocess_image()
@@ -539,6 +694,9 @@ class MainWindow(QMainWindow):
                 print(f"停止线程时出错: {str(e)}")
                 return
         
+        # 新的处理取代进行中的原图提交，提交后的操作不再执行
+        self.commit_actions = None
+        
         # 禁用所有处理按钮
         self.preprocess_btn.setEnabled(False)
         self.skeleton_btn.setEnabled(False)
@@ -564,18 +722,22 @@ class MainWindow(QMainWindow):
             self.processor,
             self.current_image if image is None else image,
             operation,
-            params
+            params,
+            self.pipeline
         )
         self.processing_thread.finished.connect(self.on_processing_finished)
         self.processing_thread.error.connect(self.handle_error)
+        self.processing_thread.progress.connect(self.progress_bar.setValue)
         self.threads.append(self.processing_thread)  # 添加到线程列表
         self.processing_thread.start()
         
         # 启动超时定时器 - 增加到60秒
         self.process_timer.start(60000)  # 60秒超时
+        return True
     
     def handle_timeout(self):
         """处理超时"""
+        self.commit_actions = None
         if self.processing_thread and self.processing_thread.isRunning():
             self.processing_thread.stop()
             self.progress_label.setText("处理超时，已终止")
@@ -584,6 +746,7 @@ class MainWindow(QMainWindow):
     def handle_error(self, error_msg):
         """处理错误"""
         print(f"错误: {error_msg}")  # 添加日志
+        self.commit_actions = None
         self.progress_label.setText(f"处理出错: {error_msg}")
         self.progress_bar.hide()
         self.reset_ui()
@@ -620,8 +783,16 @@ class MainWindow(QMainWindow):
             # 更新进度标签
             self.progress_label.setText("处理完成")
             
+            # 取回本次处理中一并重算的上游结果，预处理图和骨架与当前参数对应
+            operation = self.processing_thread.operation
+            self.sync_upstream_images(operation)
+            actions = []
+            
             # 更新图像显示和状态
-            if self.processing_thread.operation == 'preprocess':
+            if self.commit_actions is not None:
+                actions = self.finish_commit(operation, result)
+            
+            elif operation == 'preprocess':
                 self.processed_image = result
                 self.display_image(result, self.processed_label)
                 self.skeleton_btn.setEnabled(True)
@@ -630,7 +801,7 @@ class MainWindow(QMainWindow):
                 if self.auto_process_checkbox.isChecked():
                     QTimer.singleShot(100, self.extract_skeleton)
                     
-            elif self.processing_thread.operation == 'skeletonize':
+            elif operation == 'skeletonize':
                 self.skeleton_image = result
                 self.display_image(result, self.processed_label)
                 self.extract_paths_btn.setEnabled(True)
@@ -639,31 +810,10 @@ class MainWindow(QMainWindow):
                 if self.auto_process_checkbox.isChecked():
                     QTimer.singleShot(100, self.extract_paths)
                     
-            elif self.processing_thread.operation == 'extract_paths':
-                self.paths, self.endpoints, self.crosspoints = result
-                vis_image = self.processor.visualize_paths(
-                    self.skeleton_image.shape,
-                    self.paths,
-                    self.endpoints,
-                    self.crosspoints
-                )
-                self.display_image(vis_image, self.processed_label)
-                
-                # 启用相关按钮
-                self.save_btn.setEnabled(True)
-                self.play_btn.setEnabled(True)
-                self.stop_btn.setEnabled(True)
-                self.export_btn.setEnabled(True)
-                
-                # 设置动画数据
-                self.animator.set_data(
-                    self.paths,
-                    self.endpoints,
-                    self.crosspoints,
-                    self.skeleton_image.shape
-                )
+            elif operation == 'extract_paths':
+                self.show_extracted_paths(result)
                 
-            elif self.processing_thread.operation == 'fit_paths':
+            elif operation == 'fit_paths':
                 self.fitted_paths = result
                 vis_image = self.processor.visualize_fitted_paths(
                     self.skeleton_image.shape,
@@ -673,33 +823,111 @@ class MainWindow(QMainWindow):
                 )
                 self.display_image(vis_image, self.processed_label)
             
-            # 自动保存功能
-            if self.auto_save.isChecked() and hasattr(self, 'paths'):
+            # 自动保存：提交快照，由后台线程合并连续更新后写入
+            if self.auto_save.isChecked() and hasattr(self, 'paths') and hasattr(self, 'skeleton_image'):
                 auto_save_file = os.path.join(
                     self.last_directory,
                     'auto_save.json'
                 )
-                self.path_data.add_path_data(
-                    self.paths,
-                    self.endpoints,
-                    self.crosspoints,
-                    self.skeleton_image.shape
-                )
-                if hasattr(self, 'fitted_paths'):
-                    self.path_data.add_fitted_paths(self.fitted_paths)
-                self.path_data.save_to_file(auto_save_file)
+                self.update_path_data()
+                self.autosaver.submit(auto_save_file, self.path_data.copy())
+            
+            self.report_profile()
+            
+            # 原图提交完成后继续执行等待中的操作（保存、拟合、播放、导出等）
+            for action in actions:
+                action()
             
         except Exception as e:
             print(f"处理完成回调出错: {str(e)}")
             self.handle_error(str(e))
     
+    def show_extracted_paths(self, result):
+        """显示新提取的路径并更新动画数据，之前的拟合结果随之清除"""
+        self.paths, self.endpoints, self.crosspoints = result
+        self.update_simplified_paths()
+        self.clear_fitted_paths()
+        vis_image = self.processor.visualize_paths(
+            self.skeleton_image.shape,
+            self.paths,
+            self.endpoints,
+            self.crosspoints
+        )
+        self.display_image(vis_image, self.processed_label)
+        
+        # 启用相关按钮
+        self.save_btn.setEnabled(True)
+        self.play_btn.setEnabled(True)
+        self.stop_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
+        
+        # 设置动画数据
+        self.animator.set_data(
+            self.output_paths()[0],
+            self.endpoints,
+            self.crosspoints,
+            self.skeleton_image.shape
+        )
+    
+    def sync_upstream_images(self, operation):
+        """从流水线取回 operation 上游已是最新的预处理图和骨架（记忆结果，不重新计算）"""
+        stage = self.pipeline.STAGES[operation][0]
+        while stage is not None and not self.pipeline.is_seeded(stage):
+            if stage in ('preprocess', 'skeletonize') and self.pipeline.is_current(stage):
+                if stage == 'preprocess':
+                    self.processed_image = self.pipeline.run(stage)
+                else:
+                    self.skeleton_image = self.pipeline.run(stage)
+            stage = self.pipeline.STAGES[stage][0]
+    
+    def finish_commit(self, operation, result):
+        """原图提交完成：更新路径（及重新拟合的结果），返回等待执行的操作"""
+        actions, self.commit_actions = self.commit_actions, None
+        if operation == 'fit_paths':
+            self.show_extracted_paths(self.pipeline.run('extract_paths'))
+            self.fitted_paths = result
+            vis_image = self.processor.visualize_fitted_paths(
+                self.skeleton_image.shape,
+                self.fitted_paths,
+                self.endpoints,
+                self.crosspoints
+            )
+            self.display_image(vis_image, self.processed_label)
+        else:
+            self.show_extracted_paths(result)
+        self.progress_label.setText("已按预览参数处理原图")
+        return actions
+    
+    def set_extract_params(self):
+        """将当前的预处理和路径提取参数应用到原图流水线（代理预览的参数随之生效）"""
+        self.proxy_pending = False
+        self.pipeline.set_params(
+            threshold=self.threshold_slider.value(),
+            noise_kernel_size=self.noise_slider.value(),
+            min_component_size=self.min_component_spin.value(),
+            thinning_backend=self.thinning_combo.currentData()
+        )
+    
+    def set_fit_params(self):
+        """将当前的简化和拟合参数应用到流水线"""
+        self.pipeline.set_params(
+            simplify_tolerance=self.simplify_spin.value(),
+            line_threshold=self.line_threshold_spin.value(),
+            control_dist_factor=self.control_dist_spin.value(),
+            bezier_tolerance=self.bezier_tolerance_spin.value()
+        )
+    
+    def clear_fitted_paths(self):
+        """路径重新计算后，之前的拟合结果和拟合预览不再对应，一并清除"""
+        self.fitted_paths = []
+        if hasattr(self, 'preview_fitted_paths'):
+            del self.preview_fitted_paths
+    
     def preprocess_image(self):
         if self.current_image is not None:
-            params = {
-                'threshold': self.threshold_slider.value(),
-                'noise_kernel_size': self.noise_slider.value()
-            }
-            self.start_processing('preprocess', params=params)
+            self.pipeline.unseed()
+            self.set_extract_params()
+            self.start_processing('preprocess')
     
     def on_param_changed(self, force_update=False):
         """参数改变时的处理"""
@@ -708,16 +936,118 @@ class MainWindow(QMainWindow):
                 # 立即更新
                 self.preprocess_image()
             else:
-                # 使用定时器延迟更新，避免频繁刷新
-                self.preview_timer.start(200)  # 200ms延迟
+                # 使用定时器延迟更新，避免频繁刷新；代理预览很快，只需短暂合并连续变化
+                self.preview_timer.start(30 if self.proxy_checkbox.isChecked() else 200)
                 self.preview_pending = True
     
+    def on_parallel_changed(self, state):
+        """切换多进程处理（细化按条带、路径提取按连通分量并行），不影响处理结果"""
+        self.pipeline.options['workers'] = None if state == Qt.Checked else 1
+    
     def _delayed_preview(self):
         """延迟执行预览更新"""
         if self.preview_pending:
-            self.preprocess_image()
+            if self.proxy_checkbox.isChecked():
+                self.preview_proxy()
+            else:
+                self.preprocess_image()
             self.preview_pending = False
     
+    def update_proxy_image(self):
+        """按处理结果显示区域的大小重建代理图像"""
+        if self.current_image is None:
+            return
+        target_size = (self.processed_label.width(), self.processed_label.height())
+        self.proxy_target = target_size
+        proxy, self.proxy_scale = self.processor.build_proxy(self.current_image, target_size)
+        self.proxy_size = (proxy.shape[1], proxy.shape[0])
+        self.proxy_pipeline.set_image(proxy)
+    
+    def on_processed_label_resized(self):
+        """显示区域大小改变时按新大小重建代理图像，正在代理预览时刷新预览"""
+        if getattr(self, 'current_image', None) is None:
+            return
+        if (self.processed_label.width(), self.processed_label.height()) == self.proxy_target:
+            return
+        self.update_proxy_image()
+        if self.proxy_pending and self.proxy_checkbox.isChecked():
+            self.preview_pending = True
+            self.preview_timer.start(30)
+    
+    def preview_proxy(self):
+        """在代理图像上同步执行预览，结果放大到原图尺寸显示"""
+        if self.current_image is None:
+            return
+        try:
+            # 降噪核按缩放比例缩小，保持与原图处理相近的效果
+            noise_kernel_size = max(1, int(round(self.noise_slider.value() * self.proxy_scale)))
+            # 骨架像素数约与边长成正比
+            min_component_size = int(round(self.min_component_spin.value() * self.proxy_scale))
+            self.proxy_pipeline.set_params(
+                threshold=self.threshold_slider.value(),
+                noise_kernel_size=noise_kernel_size,
+                min_component_size=min_component_size,
+                thinning_backend=self.thinning_combo.currentData()
+            )
+            
+            if self.auto_process_checkbox.isChecked():
+                paths, endpoints, crosspoints = self.proxy_pipeline.run('extract_paths')
+                skeleton = self.proxy_pipeline.run('skeletonize')
+                result = self.processor.visualize_paths(skeleton.shape, paths, endpoints, crosspoints)
+            else:
+                result = self.proxy_pipeline.run('preprocess')
+            
+            height, width = self.current_image.shape[:2]
+            result = cv2.resize(result, (width, height), interpolation=cv2.INTER_NEAREST)
+            self.display_image(result, self.processed_label)
+            
+            self.proxy_pending = True
+            proxy_width, proxy_height = self.proxy_size
+            self.progress_label.setText(
+                f"低分辨率预览 ({proxy_width}x{proxy_height})，拟合、播放、导出或保存时处理原图")
+        except Exception as e:
+            print(f"代理预览出错: {str(e)}")
+    
+    def commit_full_resolution(self, action=None):
+        """
+        代理预览的参数尚未应用到原图时，在处理线程中按当前参数处理原图（到路径提取，
+        之前有拟合结果时重新拟合），完成后再执行 action；没有待提交的参数时直接执行 action
+        """
+        if self.commit_actions is not None and not self.proxy_pending:
+            # 提交进行中且参数未再改变，完成后一并执行
+            if action is not None:
+                self.commit_actions.append(action)
+            return
+        if not self.proxy_pending or self.current_image is None:
+            if action is not None:
+                action()
+            return
+        actions = (self.commit_actions or []) + ([action] if action is not None else [])
+        had_fitted = bool(getattr(self, 'fitted_paths', None))
+        self.pipeline.unseed()
+        self.set_extract_params()
+        if had_fitted:
+            self.set_fit_params()
+        if self.start_processing('fit_paths' if had_fitted else 'extract_paths'):
+            self.commit_actions = actions
+            self.progress_label.setText("正在按预览参数处理原图...")
+    
+    def begin_profile(self, file_path):
+        """开始记录新图像的性能数据"""
+        self.profile_name = os.path.splitext(os.path.basename(file_path))[0]
+        profiler.begin(os.path.basename(file_path))
+    
+    def report_profile(self):
+        """在状态栏显示各阶段耗时，并保存当前图像的性能报告"""
+        if not profiler.enabled:
+            return
+        self.statusBar().showMessage(profiler.summary())
+        directory = os.environ.get(PROFILE_DIR_ENV) or os.path.join(self.last_directory, 'profiles')
+        name = getattr(self, 'profile_name', None) or 'profile'
+        profiler.dump_json(os.path.join(directory, f"{name}.profile.json"))
+    
+    @profiled('display_image', lambda result, window, image, label: {
+        'pixels': int(image.shape[0] * image.shape[1])} if image is not None else {})
     def display_image(self, image, label):
         """改进的图像显示函数"""
         if image is None:
@@ -739,40 +1069,54 @@ class MainWindow(QMainWindow):
     def extract_skeleton(self):
         """执行骨架提取"""
         if hasattr(self, 'processed_image'):
+            self.pipeline.unseed()
+            self.set_extract_params()
             self.start_processing('skeletonize', self.processed_image)
     
     def extract_paths(self):
         """执行路径提取"""
         if hasattr(self, 'skeleton_image'):
+            self.pipeline.unseed()
+            self.set_extract_params()
             self.start_processing('extract_paths', self.skeleton_image)
     
     def fit_paths(self):
         """执行路径拟合"""
         if hasattr(self, 'paths'):
-            self.start_processing('fit_paths', None, {
-                'paths': self.paths,
-                'endpoints': self.endpoints,
-                'crosspoints': self.crosspoints
-            })
+            self.commit_full_resolution(self._start_fit_paths)
+    
+    def _start_fit_paths(self):
+        self.set_fit_params()
+        self.start_processing('fit_paths')
     
     def preview_fit_paths(self):
         """预览路径拟合结果"""
         if not hasattr(self, 'paths'):
             return
+        if self.proxy_pending:
+            # 预览参数尚未应用到原图，先提交，完成后再预览拟合
+            self.commit_full_resolution(self.preview_fit_paths)
+            return
         
         if self.fit_enabled_checkbox.isChecked():
             # 获取当前参数
             line_threshold = self.line_threshold_spin.value()
             control_dist = self.control_dist_spin.value()
+            bezier_tolerance = self.bezier_tolerance_spin.value()
             
-            # 执行拟合并预览
-            fitted_paths = self.processor.fit_paths(
-                self.paths,
-                self.endpoints,
-                self.crosspoints,
-                line_threshold=line_threshold,
-                control_dist_factor=control_dist
-            )
+            # 执行拟合并预览：路径已是最新时由流水线只重算拟合阶段
+            self.set_fit_params()
+            if self.pipeline.is_current('extract_paths'):
+                fitted_paths = self.pipeline.run('fit_paths')
+            else:
+                fitted_paths = self.processor.fit_paths(
+                    self.simplified_paths or self.paths,
+                    self.endpoints,
+                    self.crosspoints,
+                    line_threshold=line_threshold,
+                    control_dist_factor=control_dist,
+                    bezier_tolerance=bezier_tolerance
+                )
             
             # 显示拟合预览
             vis_image = self.processor.visualize_fitted_paths(
@@ -795,6 +1139,67 @@ class MainWindow(QMainWindow):
             )
             self.display_image(vis_image, self.processed_label)
 
+    def update_simplified_paths(self):
+        """按当前容差简化路径，并在状态栏显示点数变化"""
+        tolerance = self.simplify_spin.value()
+        self.pipeline.set_params(simplify_tolerance=tolerance)
+        if not self.paths or not tolerance:
+            self.simplified_paths = self.paths
+            return
+        
+        if self.pipeline.is_current('extract_paths'):
+            self.simplified_paths = self.pipeline.run('simplify_paths')[0]
+        else:
+            self.simplified_paths = self.processor.simplify_paths(self.paths, tolerance)
+        
+        before, after, ratio = point_reduction(self.paths, self.simplified_paths)
+        self.progress_label.setText(f"路径简化: {before} → {after} 点 (减少 {ratio:.1%})")
+    
+    def output_paths(self, ordered=True):
+        """
+        保存和动画使用的路径及其简化容差，未勾选保存简化路径时为原始路径
+        勾选优化笔画顺序且 ordered 为True时返回重排后的路径
+        """
+        tolerance = self.simplify_spin.value()
+        if self.save_simplified_checkbox.isChecked() and tolerance > 0 and self.simplified_paths:
+            paths = self.simplified_paths
+        else:
+            paths, tolerance = self.paths, 0.0
+        if ordered and self.order_checkbox.isChecked() and paths:
+            paths = self.ordered_paths(paths)
+        return paths, tolerance
+    
+    def stroke_order(self, paths):
+        """
+        计算路径的绘制顺序和方向（按路径对象缓存），并在状态栏显示节省的移动距离
+        返回 (顺序, 是否反向, 重排后的路径)
+        """
+        if self._ordered is None or self._ordered[0] is not paths:
+            order, reversed_flags, stats = plan_order(paths)
+            self._ordered = (paths, order, reversed_flags, apply_order(paths, order, reversed_flags))
+            self.statusBar().showMessage(
+                f"笔画顺序优化: 抬笔移动 {stats['before']:.0f} → {stats['after']:.0f} 像素 "
+                f"(减少 {stats['ratio']:.1%})")
+        return self._ordered[1:]
+    
+    def ordered_paths(self, paths):
+        """重排路径顺序以减少抬笔移动"""
+        return self.stroke_order(paths)[2]
+    
+    def on_simplify_changed(self):
+        """简化参数改变时更新简化结果、动画和拟合预览"""
+        if not self.paths or not hasattr(self, 'skeleton_image'):
+            return
+        self.update_simplified_paths()
+        self.animator.set_data(
+            self.output_paths()[0],
+            self.endpoints,
+            self.crosspoints,
+            self.skeleton_image.shape
+        )
+        if self.fit_enabled_checkbox.isChecked():
+            self.preview_fit_paths()
+    
     def apply_fit_paths(self):
         """应用路径拟合结果"""
         if hasattr(self, 'preview_fitted_paths'):
@@ -802,6 +1207,32 @@ class MainWindow(QMainWindow):
             self.save_btn.setEnabled(True)
             self.progress_label.setText("路径拟合已应用")
     
+    def record_thinning_info(self):
+        """将当前骨架使用的细化后端和耗时写入路径数据（路径来自文件时保留原记录）"""
+        info = self.pipeline.stage_info('skeletonize')
+        if info is not None:
+            self.path_data.set_thinning_info(info)
+    
+    def update_path_data(self):
+        """
+        用当前的路径、端点和拟合结果更新 self.path_data
+        勾选优化笔画顺序时路径和拟合路径按同一顺序重排，保持一一对应
+        """
+        paths, simplify_tolerance = self.output_paths(ordered=False)
+        self.path_data.add_path_data(
+            paths,
+            self.endpoints,
+            self.crosspoints,
+            self.skeleton_image.shape,
+            simplify_tolerance
+        )
+        self.record_thinning_info()
+        if hasattr(self, 'fitted_paths'):
+            self.path_data.add_fitted_paths(self.fitted_paths)
+        if self.order_checkbox.isChecked() and paths:
+            order, reversed_flags, _ = self.stroke_order(paths)
+            self.path_data.apply_stroke_order(order, reversed_flags)
+    
     def save_path_data(self):
         """保存路径数据"""
         if not hasattr(self, 'paths'):
@@ -811,23 +1242,49 @@ class MainWindow(QMainWindow):
             self,
             "保存路径数据",
             self.last_directory,
-            "JSON文件 (*.json)"
+            f"JSON文件 (*.json);;二进制路径文件 (*{BINARY_EXTENSION});;链码压缩文件 (*{CHAIN_EXTENSION})"
         )
         
         if filename:
-            self.path_data.add_path_data(
-                self.paths,
-                self.endpoints,
-                self.crosspoints,
-                self.skeleton_image.shape
-            )
-            if hasattr(self, 'fitted_paths'):
-                self.path_data.add_fitted_paths(self.fitted_paths)
-            
-            if self.path_data.save_to_file(filename):
-                self.progress_label.setText("路径数据保存成功")
-            else:
-                self.progress_label.setText("保存路径数据失败")
+            # 低分辨率预览的参数先在原图上生效
+            self.commit_full_resolution(lambda: self._write_path_data(filename))
+    
+    def _write_path_data(self, filename):
+        self.release_mapped_file(filename)
+        self.update_path_data()
+        if self.path_data.save_to_file(filename):
+            self.progress_label.setText("路径数据保存成功")
+        else:
+            self.progress_label.setText("保存路径数据失败")
+    
+    def release_mapped_file(self, filename):
+        """
+        要覆盖的文件正是路径数据映射的文件时，先把路径复制到内存，
+        并重新分发给简化、笔画顺序和动画，释放它们持有的映射视图（Windows不允许替换仍被映射的文件）
+        """
+        if self.mapped_file is None or not os.path.exists(filename) or \
+                not os.path.samefile(filename, self.mapped_file):
+            return
+        self.mapped_file = None
+        # 路径数据可能已被重排替换，先换回界面持有的路径；原地替换 PathList 的数组，
+        # self.paths 和流水线注入的路径一并生效。加载后拟合的结果可能引用映射视图，转换为独立数组
+        self.path_data.paths = self.paths
+        self.path_data.fitted_paths = self.fitted_paths
+        self.path_data.detach()
+        self.fitted_paths = self.path_data.fitted_paths
+        # 流水线记忆的拟合等结果同样引用映射视图，清除后重新注入路径
+        self.pipeline.clear()
+        self.pipeline.seed('extract_paths', (self.paths, self.endpoints, self.crosspoints))
+        self._ordered = None
+        if hasattr(self, 'preview_fitted_paths'):
+            del self.preview_fitted_paths
+        self.update_simplified_paths()
+        self.animator.set_data(
+            self.output_paths()[0],
+            self.endpoints,
+            self.crosspoints,
+            self.skeleton_image.shape
+        )
     
     def load_path_data(self):
         """加载路径数据"""
@@ -835,16 +1292,26 @@ class MainWindow(QMainWindow):
             self,
             "加载路径数据",
             self.last_directory,
-            "JSON文件 (*.json)"
+            f"路径文件 (*.json *{BINARY_EXTENSION} *{CHAIN_EXTENSION});;JSON文件 (*.json);;"
+            f"二进制路径文件 (*{BINARY_EXTENSION});;链码压缩文件 (*{CHAIN_EXTENSION})"
         )
         
         if filename:
             if self.path_data.load_from_file(filename):
+                # 二进制文件为内存映射加载（零拷贝），覆盖保存前才复制到内存
+                self.mapped_file = filename if path_format(filename) == 'binary' else None
                 self.paths = self.path_data.paths
                 self.endpoints = self.path_data.endpoints
                 self.crosspoints = self.path_data.crosspoints
                 self.fitted_paths = self.path_data.fitted_paths
                 
+                # 加载的路径作为流水线的路径提取结果，后续拟合以此为输入
+                self.pipeline.seed(
+                    'extract_paths',
+                    (self.paths, self.endpoints, self.crosspoints)
+                )
+                self.update_simplified_paths()
+                
                 # 创建空白图像用于显示
                 self.skeleton_image = np.zeros(
                     (*self.path_data.image_size[:2], 3),
@@ -874,7 +1341,7 @@ class MainWindow(QMainWindow):
                 self.stop_btn.setEnabled(True)
                 # 设置动画数据
                 self.animator.set_data(
-                    self.paths,
+                    self.output_paths()[0],
                     self.endpoints,
                     self.crosspoints,
                     self.skeleton_image.shape
@@ -883,7 +1350,10 @@ class MainWindow(QMainWindow):
                 self.progress_label.setText("加载路径数据失败")
     
     def play_animation(self):
-        """开始播放动画"""
+        """开始播放动画（低分辨率预览的参数先在原图上生效）"""
+        self.commit_full_resolution(self._play_animation)
+    
+    def _play_animation(self):
         self.animator.play()
         self.play_btn.setEnabled(False)
         self.pause_btn.setEnabled(True)
@@ -923,6 +1393,9 @@ class MainWindow(QMainWindow):
             # 停止动画
             self.animator.stop()
             
+            # 写入等待中的自动保存
+            self.autosaver.close()
+            
             # 停止并等待所有线程
             for thread in self.threads:
                 if thread and thread.isRunning():
@@ -959,20 +1432,24 @@ class MainWindow(QMainWindow):
         )
         
         if filename:
-            self.progress_label.setText("正在导出动画...")
-            self.progress_bar.show()
-            
-            # 创建导出线程
-            self.export_thread = ExportThread(
-                self.animator,
-                filename,
-                self.speed_spin.value()
-            )
-            self.export_thread.progress.connect(self.progress_bar.setValue)
-            self.export_thread.finished.connect(self._on_export_finished)
-            self.export_thread.error.connect(self.handle_error)
-            self.threads.append(self.export_thread)  # 添加到线程列表
-            self.export_thread.start()
+            # 低分辨率预览的参数先在原图上生效
+            self.commit_full_resolution(lambda: self._start_export(filename))
+    
+    def _start_export(self, filename):
+        self.progress_label.setText("正在导出动画...")
+        self.progress_bar.show()
+        
+        # 创建导出线程
+        self.export_thread = ExportThread(
+            self.animator,
+            filename,
+            self.speed_spin.value()
+        )
+        self.export_thread.progress.connect(self.progress_bar.setValue)
+        self.export_thread.finished.connect(self._on_export_finished)
+        self.export_thread.error.connect(self.handle_error)
+        self.threads.append(self.export_thread)  # 添加到线程列表
+        self.export_thread.start()
 
     def _on_export_finished(self, success):
         """导出完成的处理"""
@@ -1035,7 +1512,7 @@ class MainWindow(QMainWindow):
             file_path = urls[0].toLocalFile()
             if file_path.lower().endswith(('.png', '.jpg', '.bmp')):
                 self.load_image_from_path(file_path)
-            elif file_path.lower().endswith('.json'):
+            elif file_path.lower().endswith(('.json', BINARY_EXTENSION, CHAIN_EXTENSION)):
                 self.load_path_data_from_path(file_path)
 
     def batch_process(self):
@@ -1088,6 +1565,13 @@ class MainWindow(QMainWindow):
         settings.setValue('auto_process', self.auto_process_checkbox.isChecked())
         settings.setValue('line_threshold', self.line_threshold_spin.value())
         settings.setValue('control_dist', self.control_dist_spin.value())
+        settings.setValue('bezier_tolerance', self.bezier_tolerance_spin.value())
+        settings.setValue('simplify_tolerance', self.simplify_spin.value())
+        settings.setValue('save_simplified', self.save_simplified_checkbox.isChecked())
+        settings.setValue('optimize_order', self.order_checkbox.isChecked())
+        settings.setValue('min_component_size', self.min_component_spin.value())
+        settings.setValue('parallel', self.parallel_checkbox.isChecked())
+        settings.setValue('thinning_backend', self.thinning_combo.currentData())
         settings.setValue('last_directory', self.last_directory)
 
     def load_settings(self):
@@ -1099,6 +1583,14 @@ class MainWindow(QMainWindow):
         self.auto_process_checkbox.setChecked(settings.value('auto_process', True, bool))
         self.line_threshold_spin.setValue(settings.value('line_threshold', 0.98, float))
         self.control_dist_spin.setValue(settings.value('control_dist', 0.25, float))
+        self.bezier_tolerance_spin.setValue(settings.value('bezier_tolerance', 2.0, float))
+        self.simplify_spin.setValue(settings.value('simplify_tolerance', 0.0, float))
+        self.save_simplified_checkbox.setChecked(settings.value('save_simplified', False, bool))
+        self.order_checkbox.setChecked(settings.value('optimize_order', False, bool))
+        self.min_component_spin.setValue(settings.value('min_component_size', 0, int))
+        self.parallel_checkbox.setChecked(settings.value('parallel', False, bool))
+        index = self.thinning_combo.findData(settings.value('thinning_backend', REFERENCE_BACKEND))
+        self.thinning_combo.setCurrentIndex(max(index, 0))
         self.last_directory = settings.value('last_directory', os.path.expanduser("~"))
 
     def load_image_from_path(self, file_path):
@@ -1109,6 +1601,7 @@ class MainWindow(QMainWindow):
             
             # 加载图像
             image = self.processor.load_image(file_path)
+            self.begin_profile(file_path)
             if image is not None:
                 self.current_image = image
                 # 自动缩放大图像
@@ -1126,6 +1619,9 @@ class MainWindow(QMainWindow):
                         interpolation=cv2.INTER_AREA
                     )
                 
+                self.pipeline.set_image(self.current_image)
+                self.update_proxy_image()
+                
                 # 显示图像
                 self.display_image(self.current_image, self.original_label)
                 self.preprocess_btn.setEnabled(True)
@@ -1145,11 +1641,20 @@ class MainWindow(QMainWindow):
             self.last_directory = os.path.dirname(file_path)
             
             if self.path_data.load_from_file(file_path):
+                # 二进制文件为内存映射加载（零拷贝），覆盖保存前才复制到内存
+                self.mapped_file = file_path if path_format(file_path) == 'binary' else None
                 self.paths = self.path_data.paths
                 self.endpoints = self.path_data.endpoints
                 self.crosspoints = self.path_data.crosspoints
                 self.fitted_paths = self.path_data.fitted_paths
                 
+                # 加载的路径作为流水线的路径提取结果，后续拟合以此为输入
+                self.pipeline.seed(
+                    'extract_paths',
+                    (self.paths, self.endpoints, self.crosspoints)
+                )
+                self.update_simplified_paths()
+                
                 # 创建空白图像用于显示
                 self.skeleton_image = np.zeros(
                     (*self.path_data.image_size[:2], 3),
@@ -1182,7 +1687,7 @@ class MainWindow(QMainWindow):
                 
                 # 设置动画数据
                 self.animator.set_data(
-                    self.paths,
+                    self.output_paths()[0],
                     self.endpoints,
                     self.crosspoints,
                     self.skeleton_image.shape
@@ -2,6 +2,8 @@ import numpy as np
 import cv2
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 
+from path_render import to_polylines, draw_polylines, partial_polyline, path_lengths
+
 class PathAnimator(QObject):
     # 动画更新信号
     frame_ready = pyqtSignal(object)
@@ -10,6 +12,9 @@ class PathAnimator(QObject):
     def __init__(self):
         super().__init__()
         self.paths = []
+        self.polylines = []  # 路径的 int32 数组形式，供批量绘制
+        self._lengths = {}   # 路径序号 -> 累计弧长
+        self._background = None  # 所有路径的暗色背景，数据不变时复用
         self.endpoints = []
         self.crosspoints = []
         self.image_size = None
@@ -25,6 +30,9 @@ class PathAnimator(QObject):
     def set_data(self, paths, endpoints, crosspoints, image_size):
         """设置路径数据"""
         self.paths = paths
+        self.polylines = to_polylines(paths)
+        self._lengths = {}
+        self._background = None
         self.endpoints = endpoints
         self.crosspoints = crosspoints
         self.image_size = image_size
@@ -88,28 +96,20 @@ class PathAnimator(QObject):
         if not self.image_size:
             return
         
-        result = np.zeros((*self.image_size[:2], 3), dtype=np.uint8)
-        
-        # 首先绘制所有路径的背景
-        for path in self.paths:
-            for j in range(len(path) - 1):
-                cv2.line(result, path[j], path[j+1], (0, 0, 128), 1)  # 减小线宽
+        # 首先绘制所有路径的背景（只绘制一次，之后每帧复制）
+        if self._background is None:
+            self._background = np.zeros((*self.image_size[:2], 3), dtype=np.uint8)
+            draw_polylines(self._background, self.polylines, (0, 0, 128), 1)  # 减小线宽
+        result = self._background.copy()
         
         # 绘制已完成的路径
-        for i in range(self.current_path_index):
-            path = self.paths[i]
-            for j in range(len(path) - 1):
-                cv2.line(result, path[j], path[j+1], (255, 255, 255), 2)
+        draw_polylines(result, self.polylines[:self.current_path_index], (255, 255, 255), 2)
         
-        # 绘制当前路径
-        if self.current_path_index < len(self.paths):
-            path = self.paths[self.current_path_index]
+        # 绘制当前路径的已完成部分
+        if self.current_path_index < len(self.polylines):
             progress = self.current_frame / self.total_frames
-            points = self._interpolate_path(path, progress)
-            
-            # 绘制当前路径的已完成部分
-            for i in range(len(points) - 1):
-                cv2.line(result, points[i], points[i+1], (255, 255, 255), 2)
+            points = self._interpolate_path(self.current_path_index, progress)
+            draw_polylines(result, [points], (255, 255, 255), 2)
         
         # 只在非播放状态或启用显示时绘制端点和交叉点
         if not self.is_playing or self.show_points:
@@ -121,31 +121,10 @@ class PathAnimator(QObject):
         
         self.frame_ready.emit(result)
     
-    def _interpolate_path(self, path, progress):
-        """计算路径的插值点"""
-        if len(path) < 2:
-            return path
-            
-        total_length = 0
-        segment_lengths = []
-        
-        # 计算路径总长度和每段长度
-        for i in range(len(path) - 1):
-            length = np.sqrt(np.sum((np.array(path[i+1]) - np.array(path[i]))**2))
-            total_length += length
-            segment_lengths.append(length)
-        
-        target_length = total_length * progress
-        current_length = 0
-        
-        # 找到当前位置
-        for i, length in enumerate(segment_lengths):
-            if current_length + length >= target_length:
-                segment_progress = (target_length - current_length) / length
-                start = np.array(path[i])
-                end = np.array(path[i+1])
-                point = start + (end - start) * segment_progress
-                return path[:i+1] + [tuple(map(int, point))]
-            current_length += length
-        
-        return path 
\ No newline at end of file
+    def _interpolate_path(self, path_index, progress):
+        """计算路径的插值点，累计弧长按路径缓存"""
+        polyline = self.polylines[path_index]
+        lengths = self._lengths.get(path_index)
+        if lengths is None:
+            lengths = self._lengths[path_index] = path_lengths(polyline)
+        return partial_polyline(polyline, progress, lengths)
@@ -0,0 +1,108 @@
+import os
+import json
+import struct
+import numpy as np
+
+# 二进制路径文件：文件头 + JSON元数据 + 按8字节对齐的连续数组
+#   魔数(8字节) | 版本 uint32 | 元数据长度 uint32 | 元数据(UTF-8 JSON) | 数组数据...
+# 元数据的 arrays 项记录每个数组相对数据区的偏移、类型和形状，加载时用memmap零拷贝映射
+BINARY_EXTENSION = '.pbin'
+MAGIC = b'PATHBIN\x00'
+VERSION = 1
+_HEADER = struct.Struct('<8sII')
+_ALIGN = 8
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def is_binary_path_file(filename):
+    """按扩展名判断是否为二进制路径文件"""
+    return os.path.splitext(filename)[1].lower() == BINARY_EXTENSION
+
+def pack_paths(paths):
+    """将路径列表打包为 (偏移 int64 (n+1,), 坐标 int32 (N, 2))"""
+    lengths = [len(path) for path in paths]
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] == 0:
+        return offsets, np.empty((0, 2), dtype=np.int32)
+    points = np.concatenate([np.asarray(path, dtype=np.int32).reshape(-1, 2)
+                             for path in paths if len(path)])
+    return offsets, points
+
+def unpack_paths(offsets, points):
+    """按偏移把坐标拆回 [x, y] 列表的列表（整体转换一次再切分）"""
+    points = points.tolist()
+    offsets = offsets.tolist()
+    return [points[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+def atomic_write(filename, data):
+    """
+    先写同目录的临时文件再替换目标文件：写入中途出错或崩溃时原文件保持完整，
+    原文件仍被内存映射时也不会被原地截断
+    """
+    temp_filename = filename + '.tmp'
+    try:
+        with open(temp_filename, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+    except Exception:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+def dumps_binary(meta, arrays):
+    """将元数据和数组编码为二进制文件内容；meta 必须可JSON序列化，arrays 为 名称 -> ndarray"""
+    layout = {}
+    offset = 0
+    contiguous = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        contiguous[name] = array
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+
+    meta = dict(meta, arrays=layout)
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(_HEADER.size + len(meta_bytes))
+
+    chunks = [_HEADER.pack(MAGIC, VERSION, len(meta_bytes)), meta_bytes,
+              b'\0' * (data_start - _HEADER.size - len(meta_bytes))]
+    for array in contiguous.values():
+        chunks.append(array.tobytes())
+        chunks.append(b'\0' * (_aligned(array.nbytes) - array.nbytes))
+    return b''.join(chunks)
+
+def save_binary(filename, meta, arrays):
+    """写入元数据和数组（原子替换）"""
+    atomic_write(filename, dumps_binary(meta, arrays))
+
+def load_binary(filename, mmap=True):
+    """
+    读取二进制路径文件，返回 (元数据, 数组字典)
+    mmap 为True时数组是文件内存映射的只读视图，不复制数据
+    """
+    with open(filename, 'rb') as f:
+        magic, version, meta_length = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("不是有效的二进制路径文件")
+        if version > VERSION:
+            raise ValueError(f"不支持的二进制路径文件版本: {version}")
+        meta = json.loads(f.read(meta_length).decode('utf-8'))
+
+    data_start = _aligned(_HEADER.size + meta_length)
+    if mmap:
+        buffer = np.memmap(filename, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(filename, dtype=np.uint8)
+
+    arrays = {}
+    for name, info in meta.pop('arrays').items():
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        start = data_start + info['offset']
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        arrays[name] = buffer[start:start + nbytes].view(dtype).reshape(shape)
+    return meta, arrays
@@ -0,0 +1,198 @@
+import os
+import json
+import zlib
+import struct
+import numpy as np
+
+# 链码路径文件：文件头 + JSON元数据 + 数据区（可选zlib压缩）
+#   魔数(8字节) | 版本 uint32 | 元数据长度 uint32 | 元数据(UTF-8 JSON) | 数据区
+# 骨架路径每一步只移动一个像素，用3位Freeman链码表示；路径起点和非单像素的步长
+# （路径合并处的跳跃等）作为例外，以zigzag变长整数差分存储。拟合路径的控制点、
+# 端点和交叉点同样存为差分变长整数。数组名称与 PathData.to_arrays 一致
+CHAIN_EXTENSION = '.pchain'
+MAGIC = b'PATHCC\x00\x00'
+VERSION = 1
+_HEADER = struct.Struct('<8sII')
+
+# Freeman方向 0-7 对应的 (dx, dy)，从 +x 方向开始逆时针（图像坐标y向下）
+DIRECTIONS = np.array([(1, 0), (1, -1), (0, -1), (-1, -1),
+                       (-1, 0), (-1, 1), (0, 1), (1, 1)], dtype=np.int64)
+# (dx + 1) * 3 + (dy + 1) -> 方向编码，(0, 0) 不是有效方向
+_DIRECTION_CODES = np.full(9, 255, dtype=np.uint8)
+_DIRECTION_CODES[(DIRECTIONS[:, 0] + 1) * 3 + DIRECTIONS[:, 1] + 1] = np.arange(8)
+
+# 数据区中各数据流的顺序
+_STREAMS = ('path_lengths', 'escape_positions', 'escape_deltas', 'chain',
+            'endpoints', 'crosspoints', 'fitted_lengths', 'fitted_types', 'fitted_deltas')
+
+def is_chain_path_file(filename):
+    """按扩展名判断是否为链码路径文件"""
+    return os.path.splitext(filename)[1].lower() == CHAIN_EXTENSION
+
+def encode_varints(values):
+    """非负整数数组编码为LEB128变长整数（每字节7位，最高位表示后续还有字节）"""
+    values = np.asarray(values, dtype=np.uint64).ravel()
+    if len(values) == 0:
+        return b''
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.zeros(len(values), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    output = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for k in range(int(sizes.max())):
+        mask = sizes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (sizes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        output[starts[mask] + k] = (chunk | more).astype(np.uint8)
+    return output.tobytes()
+
+def decode_varints(data, count):
+    """解码 count 个变长整数，返回 uint64 数组"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buffer < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError("变长整数数据不完整")
+    starts = np.concatenate(([0], ends[:-1] + 1)).astype(np.int64)
+    values = np.zeros(count, dtype=np.uint64)
+    if count == 0:
+        return values
+    for k in range(int((ends - starts).max()) + 1):
+        mask = starts + k <= ends
+        chunk = buffer[starts[mask] + k].astype(np.uint64) & np.uint64(0x7F)
+        values[mask] |= chunk << np.uint64(7 * k)
+    return values
+
+def _zigzag(values):
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+def _unzigzag(values):
+    values = np.asarray(values, dtype=np.uint64)
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+def _encode_deltas(points):
+    """点序列的相邻差分（第一个点相对原点），zigzag后变长编码"""
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    return encode_varints(_zigzag(np.diff(points, axis=0, prepend=np.zeros((1, 2), np.int64))))
+
+def _decode_deltas(data, count):
+    deltas = _unzigzag(decode_varints(data, count * 2)).reshape(-1, 2)
+    return np.cumsum(deltas, axis=0).astype(np.int32)
+
+def pack_chain(codes):
+    """3位方向编码按位紧密排列"""
+    codes = np.asarray(codes, dtype=np.uint8)
+    bits = (codes[:, None] >> np.array([2, 1, 0], dtype=np.uint8)) & 1
+    return np.packbits(bits.ravel()).tobytes()
+
+def unpack_chain(data, count):
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[:count * 3].reshape(-1, 3)
+    return (bits[:, 0] << 2) | (bits[:, 1] << 1) | bits[:, 2]
+
+def _step_masks(offsets, total):
+    """各点是否为路径起点"""
+    first = np.zeros(total, dtype=bool)
+    starts = np.asarray(offsets[:-1], dtype=np.int64)
+    first[starts[starts < total]] = True
+    return first
+
+def encode_chain(meta, arrays, compress=True):
+    """
+    将路径数组（名称同 PathData.to_arrays）编码为链码文件内容
+    compress 为True时数据区再用zlib压缩
+    """
+    offsets = np.asarray(arrays['path_offsets'], dtype=np.int64)
+    points = np.asarray(arrays['path_points'], dtype=np.int64).reshape(-1, 2)
+    # 全部路径首尾相接求差分：路径起点的差分相对上一条路径的终点
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), np.int64))
+    first = _step_masks(offsets, len(points))
+    unit = ~first & (np.abs(deltas).max(axis=1, initial=0) == 1)
+    inner_positions = np.flatnonzero(~first)
+    # 例外：路径内部非单像素的步，记录其在内部步中的序号（差分编码）
+    escape_inner = np.flatnonzero(~unit[inner_positions])
+    codes = _DIRECTION_CODES[(deltas[unit, 0] + 1) * 3 + deltas[unit, 1] + 1]
+
+    fitted_offsets = np.asarray(arrays['fitted_offsets'], dtype=np.int64)
+    streams = {
+        'path_lengths': encode_varints(np.diff(offsets)),
+        'escape_positions': encode_varints(np.diff(escape_inner, prepend=0)),
+        'escape_deltas': encode_varints(_zigzag(deltas[~unit])),
+        'chain': pack_chain(codes),
+        'endpoints': _encode_deltas(arrays['endpoints']),
+        'crosspoints': _encode_deltas(arrays['crosspoints']),
+        'fitted_lengths': encode_varints(np.diff(fitted_offsets)),
+        'fitted_types': np.asarray(arrays['fitted_types'], dtype=np.uint8).tobytes(),
+        'fitted_deltas': _encode_deltas(arrays['fitted_points']),
+    }
+    counts = {
+        'paths': len(offsets) - 1,
+        'points': len(points),
+        'escapes': len(escape_inner),
+        'endpoints': len(arrays['endpoints']),
+        'crosspoints': len(arrays['crosspoints']),
+        'fitted': len(fitted_offsets) - 1,
+        'fitted_points': len(arrays['fitted_points']),
+    }
+    payload = b''.join(streams[name] for name in _STREAMS)
+    meta = dict(meta, counts=counts, streams={name: len(streams[name]) for name in _STREAMS},
+                compression='zlib' if compress else None)
+    if compress:
+        payload = zlib.compress(payload, 9)
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    return _HEADER.pack(MAGIC, VERSION, len(meta_bytes)) + meta_bytes + payload
+
+def decode_chain(data):
+    """解码链码文件内容，返回 (元数据, 数组字典)"""
+    magic, version, meta_length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("不是有效的链码路径文件")
+    if version > VERSION:
+        raise ValueError(f"不支持的链码路径文件版本: {version}")
+    meta = json.loads(bytes(data[_HEADER.size:_HEADER.size + meta_length]).decode('utf-8'))
+    payload = data[_HEADER.size + meta_length:]
+    compression = meta.pop('compression', None)
+    if compression == 'zlib':
+        payload = zlib.decompress(payload)
+    elif compression is not None:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+
+    streams = {}
+    position = 0
+    for name in _STREAMS:
+        size = meta['streams'][name]
+        streams[name] = payload[position:position + size]
+        position += size
+    meta.pop('streams')
+    counts = meta.pop('counts')
+
+    offsets = np.zeros(counts['paths'] + 1, dtype=np.int64)
+    np.cumsum(decode_varints(streams['path_lengths'], counts['paths']).astype(np.int64),
+              out=offsets[1:])
+    total = counts['points']
+    first = _step_masks(offsets, total)
+    inner_positions = np.flatnonzero(~first)
+    escape_inner = np.cumsum(decode_varints(streams['escape_positions'], counts['escapes']).astype(np.int64))
+    unit = ~first
+    unit[inner_positions[escape_inner]] = False
+
+    deltas = np.empty((total, 2), dtype=np.int64)
+    escapes = total - int(unit.sum())
+    deltas[~unit] = _unzigzag(decode_varints(streams['escape_deltas'], escapes * 2)).reshape(-1, 2)
+    deltas[unit] = DIRECTIONS[unpack_chain(streams['chain'], int(unit.sum()))]
+
+    fitted_offsets = np.zeros(counts['fitted'] + 1, dtype=np.int64)
+    np.cumsum(decode_varints(streams['fitted_lengths'], counts['fitted']).astype(np.int64),
+              out=fitted_offsets[1:])
+    arrays = {
+        'path_offsets': offsets,
+        'path_points': np.cumsum(deltas, axis=0).astype(np.int32),
+        'endpoints': _decode_deltas(streams['endpoints'], counts['endpoints']),
+        'crosspoints': _decode_deltas(streams['crosspoints'], counts['crosspoints']),
+        'fitted_offsets': fitted_offsets,
+        'fitted_points': _decode_deltas(streams['fitted_deltas'], counts['fitted_points']),
+        'fitted_types': np.frombuffer(streams['fitted_types'], dtype=np.uint8).copy(),
+    }
+    return meta, arrays
@@ -1,21 +1,265 @@
 import json
 import numpy as np
 
+from stroke_order import plan_order, apply_order
+from path_binary import (is_binary_path_file, atomic_write, dumps_binary, load_binary,
+                         pack_paths, unpack_paths)
+from path_codec import is_chain_path_file, encode_chain, decode_chain
+
+# 二进制格式中拟合路径类型的编码
+FITTED_TYPES = ('line', 'bezier')
+# 支持的文件格式：json、binary（.pbin，内存映射）、chain（.pchain，链码压缩）
+FORMATS = ('json', 'binary', 'chain')
+
+def path_format(filename):
+    """按扩展名判断路径文件格式"""
+    if is_binary_path_file(filename):
+        return 'binary'
+    if is_chain_path_file(filename):
+        return 'chain'
+    return 'json'
+
+def _load_arrays(filename, fmt):
+    """读取二进制或链码格式文件，返回 (元数据, 数组字典)"""
+    if fmt == 'binary':
+        return load_binary(filename)
+    with open(filename, 'rb') as f:
+        return decode_chain(f.read())
+
+def load_path_dict(filename):
+    """
+    读取路径文件为与JSON相同结构的字典（坐标为 [x, y] 列表），按扩展名识别格式
+    供只需要路径和图像尺寸的窗口使用
+    """
+    fmt = path_format(filename)
+    if fmt == 'json':
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    meta, arrays = _load_arrays(filename, fmt)
+    data = dict(meta)
+    data['paths'] = unpack_paths(arrays['path_offsets'], arrays['path_points'])
+    data['endpoints'] = arrays['endpoints'].tolist()
+    data['crosspoints'] = arrays['crosspoints'].tolist()
+    fitted_points = unpack_paths(arrays['fitted_offsets'], arrays['fitted_points'])
+    data['fitted_paths'] = [{'type': FITTED_TYPES[code], 'points': points}
+                            for code, points in zip(arrays['fitted_types'].tolist(), fitted_points)]
+    return data
+
+class PathList:
+    """
+    紧凑的路径列表：所有路径的坐标存放在一个 int32 (N, 2) 数组中，offsets[i]:offsets[i+1] 为第i条路径
+    按列表方式使用：len、迭代和下标返回 (n, 2) 视图（不复制），切片返回新的 PathList
+    """
+    __slots__ = ('points', 'offsets')
+
+    def __init__(self, points=None, offsets=None):
+        if points is None:
+            points = np.empty((0, 2), dtype=np.int32)
+            offsets = np.zeros(1, dtype=np.int64)
+        self.points = points
+        self.offsets = offsets
+
+    @classmethod
+    def from_paths(cls, paths):
+        """由点列表的列表构造；已是 PathList 时直接返回"""
+        if isinstance(paths, cls):
+            return paths
+        offsets, points = pack_paths(paths)
+        return cls(points, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __bool__(self):
+        return len(self.offsets) > 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PathList.from_paths([self[i] for i in range(*index.indices(len(self)))])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("路径序号超出范围")
+        return self.points[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        points = self.points
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield points[start:end]
+
+    def lengths(self):
+        """各路径的点数"""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes
+
+    def tolist(self):
+        """转换为 [x, y] 列表的列表"""
+        return unpack_paths(self.offsets, self.points)
+
+class FittedPaths:
+    """拟合路径的紧凑存储：类型编码数组 + 控制点 PathList，迭代得到 (类型, 控制点视图)"""
+    __slots__ = ('types', 'controls')
+
+    def __init__(self, types=None, controls=None):
+        self.types = np.zeros(0, dtype=np.uint8) if types is None else types
+        self.controls = PathList() if controls is None else controls
+
+    @classmethod
+    def from_pairs(cls, fitted_paths):
+        """由 (类型, 控制点) 列表构造；已是 FittedPaths 时直接返回"""
+        if isinstance(fitted_paths, cls):
+            return fitted_paths
+        fitted_paths = list(fitted_paths)
+        types = np.array([FITTED_TYPES.index(path_type) for path_type, _ in fitted_paths],
+                         dtype=np.uint8)
+        return cls(types, PathList.from_paths([points for _, points in fitted_paths]))
+
+    def __len__(self):
+        return len(self.types)
+
+    def __bool__(self):
+        return len(self.types) > 0
+
+    def __getitem__(self, index):
+        return FITTED_TYPES[self.types[index]], self.controls[index]
+
+    def __iter__(self):
+        return zip([FITTED_TYPES[code] for code in self.types.tolist()], self.controls)
+
+    @property
+    def nbytes(self):
+        return self.types.nbytes + self.controls.nbytes
+
+def _point_array(points):
+    """点列表转为 int32 (n, 2) 数组"""
+    return np.asarray(points, dtype=np.int32).reshape(-1, 2)
+
+def _is_mapped(array):
+    """数组是否为文件内存映射（或其视图）"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
 class PathData:
+    """
+    路径数据：路径和拟合路径以 PathList / FittedPaths 紧凑存储，端点和交叉点为 int32 (n, 2) 数组
+    属性赋值时自动转换，调用方仍可传入 (x, y) 元组列表
+    """
+    __slots__ = ('_paths', '_endpoints', '_crosspoints', '_fitted_paths', '_image_size',
+                 'simplify_tolerance', 'thinning_backend', 'thinning_ms', '_version', '_validated')
+
     def __init__(self):
+        self._version = 0      # 数据修改计数，属性赋值和加载时递增
+        self._validated = None  # 最近一次验证的 (版本, 结果)
         self.paths = []
         self.endpoints = []
         self.crosspoints = []
         self.fitted_paths = []
         self.image_size = None
-        self._validate_cache = {}  # 添加验证缓存
+        self.simplify_tolerance = 0.0  # 路径简化容差，0表示保存的是原始路径
+        self.thinning_backend = None  # 骨架细化使用的后端
+        self.thinning_ms = None       # 细化耗时（毫秒）
     
-    def add_path_data(self, paths, endpoints, crosspoints, image_size):
-        """添加路径数据"""
+    @property
+    def paths(self):
+        return self._paths
+    
+    @paths.setter
+    def paths(self, paths):
+        self._paths = PathList.from_paths(paths)
+        self._version += 1
+    
+    @property
+    def endpoints(self):
+        return self._endpoints
+    
+    @endpoints.setter
+    def endpoints(self, points):
+        self._endpoints = _point_array(points)
+        self._version += 1
+    
+    @property
+    def crosspoints(self):
+        return self._crosspoints
+    
+    @crosspoints.setter
+    def crosspoints(self, points):
+        self._crosspoints = _point_array(points)
+        self._version += 1
+    
+    @property
+    def fitted_paths(self):
+        return self._fitted_paths
+    
+    @fitted_paths.setter
+    def fitted_paths(self, fitted_paths):
+        self._fitted_paths = FittedPaths.from_pairs(fitted_paths)
+        self._version += 1
+    
+    @property
+    def image_size(self):
+        return self._image_size
+    
+    @image_size.setter
+    def image_size(self, image_size):
+        self._image_size = image_size
+        self._version += 1
+    
+    @property
+    def version(self):
+        """数据版本号；原地修改路径数组后应调用 touch()"""
+        return self._version
+    
+    def touch(self):
+        """标记数据已修改，使缓存的验证结果失效"""
+        self._version += 1
+    
+    @property
+    def nbytes(self):
+        """路径数据占用的数组内存（字节）"""
+        return (self._paths.nbytes + self._endpoints.nbytes +
+                self._crosspoints.nbytes + self._fitted_paths.nbytes)
+    
+    def add_path_data(self, paths, endpoints, crosspoints, image_size, simplify_tolerance=0.0):
+        """添加路径数据，simplify_tolerance 记录路径是否经过简化"""
         self.paths = paths
         self.endpoints = endpoints
         self.crosspoints = crosspoints
         self.image_size = image_size
+        self.simplify_tolerance = simplify_tolerance
+    
+    def set_thinning_info(self, info):
+        """记录细化后端和耗时，info 为 {'backend', 'ms'} 或None"""
+        self.thinning_backend = info['backend'] if info else None
+        self.thinning_ms = info['ms'] if info else None
+    
+    def optimize_stroke_order(self, origin=(0, 0)):
+        """
+        重排路径的顺序与方向，减少抬笔移动，拟合路径随路径一起重排（见 apply_stroke_order）
+        返回路径的统计 {'before', 'after', 'saved', 'ratio'}（像素）
+        """
+        order, reversed_flags, stats = plan_order(self.paths, origin)
+        self.apply_stroke_order(order, reversed_flags)
+        return stats
+    
+    def apply_stroke_order(self, order, reversed_flags):
+        """
+        按给定顺序和方向重排路径。拟合路径与路径一一对应（fitted_paths[i] 由 paths[i] 拟合）时
+        按同一顺序重排，反向的路径其控制点倒序；数量不同时两者没有对应关系，拟合路径保持原顺序
+        """
+        fitted = self.fitted_paths
+        if len(fitted) == len(self.paths):
+            self.fitted_paths = FittedPaths(fitted.types[order],
+                                            PathList.from_paths(apply_order(fitted.controls, order,
+                                                                            reversed_flags)))
+        self.paths = apply_order(self.paths, order, reversed_flags)
     
     def add_fitted_paths(self, fitted_paths):
         """添加拟合路径数据"""
@@ -25,43 +269,121 @@ class PathData:
         """转换为字典格式"""
         return {
             'image_size': self.image_size,
-            'paths': [[(int(x), int(y)) for x, y in path] for path in self.paths],
-            'endpoints': [(int(x), int(y)) for x, y in self.endpoints],
-            'crosspoints': [(int(x), int(y)) for x, y in self.crosspoints],
+            'simplify_tolerance': self.simplify_tolerance,
+            'thinning_backend': self.thinning_backend,
+            'thinning_ms': self.thinning_ms,
+            'paths': self.paths.tolist(),
+            'endpoints': self.endpoints.tolist(),
+            'crosspoints': self.crosspoints.tolist(),
             'fitted_paths': [
                 {
-                    'type': path_type,
-                    'points': [(int(x), int(y)) for x, y in points]
+                    'type': FITTED_TYPES[code],
+                    'points': points
                 }
-                for path_type, points in self.fitted_paths
+                for code, points in zip(self.fitted_paths.types.tolist(),
+                                        self.fitted_paths.controls.tolist())
             ]
         }
     
     def from_dict(self, data):
         """从字典格式加载数据"""
         self.image_size = tuple(data['image_size'])
-        self.paths = [[(x, y) for x, y in path] for path in data['paths']]
-        self.endpoints = [(x, y) for x, y in data['endpoints']]
-        self.crosspoints = [(x, y) for x, y in data['crosspoints']]
-        self.fitted_paths = [
-            (path['type'], [(x, y) for x, y in path['points']])
-            for path in data['fitted_paths']
-        ]
-    
-    def save_to_file(self, filename):
-        """保存到JSON文件"""
+        self.simplify_tolerance = data.get('simplify_tolerance', 0.0)
+        self.thinning_backend = data.get('thinning_backend')
+        self.thinning_ms = data.get('thinning_ms')
+        self.paths = data['paths']
+        # 早期文件只保存了路径和图像尺寸
+        self.endpoints = data.get('endpoints', [])
+        self.crosspoints = data.get('crosspoints', [])
+        self.fitted_paths = [(path['type'], path['points']) for path in data.get('fitted_paths', [])]
+    
+    def to_arrays(self):
+        """转换为二进制格式的 (元数据, 数组字典)"""
+        meta = {
+            'image_size': [int(v) for v in self.image_size] if self.image_size else None,
+            'simplify_tolerance': self.simplify_tolerance,
+            'thinning_backend': self.thinning_backend,
+            'thinning_ms': self.thinning_ms,
+        }
+        arrays = {
+            'path_offsets': self.paths.offsets,
+            'path_points': self.paths.points,
+            'endpoints': self.endpoints,
+            'crosspoints': self.crosspoints,
+            'fitted_offsets': self.fitted_paths.controls.offsets,
+            'fitted_points': self.fitted_paths.controls.points,
+            'fitted_types': self.fitted_paths.types,
+        }
+        return meta, arrays
+    
+    def from_arrays(self, meta, arrays):
+        """从二进制格式的元数据和数组加载"""
+        self.image_size = tuple(meta['image_size']) if meta.get('image_size') else None
+        self.simplify_tolerance = meta.get('simplify_tolerance', 0.0)
+        self.thinning_backend = meta.get('thinning_backend')
+        self.thinning_ms = meta.get('thinning_ms')
+        # 路径坐标直接使用数组（内存映射时不复制），端点等小数组复制到内存
+        self._paths = PathList(arrays['path_points'], arrays['path_offsets'])
+        self._endpoints = np.array(arrays['endpoints'])
+        self._crosspoints = np.array(arrays['crosspoints'])
+        self._fitted_paths = FittedPaths(np.array(arrays['fitted_types']),
+                                         PathList(arrays['fitted_points'], arrays['fitted_offsets']))
+        self._version += 1
+    
+    def detach(self):
+        """
+        将内存映射的路径坐标复制到内存（原地替换，引用同一 PathList 的调用方一并生效）
+        之前从 PathList 取出的视图（如 to_polylines 的结果）仍指向映射，
+        需要在分发给其他对象之前调用，文件映射才会被释放
+        """
+        for paths in (self._paths, self._fitted_paths.controls):
+            if _is_mapped(paths.points):
+                paths.points = np.array(paths.points)
+                paths.offsets = np.array(paths.offsets)
+    
+    def copy(self):
+        """
+        浅拷贝快照：数组共享不复制。属性赋值总是替换整个数组，
+        因此快照可交给其他线程序列化，不受之后修改的影响
+        """
+        snapshot = PathData()
+        for name in self.__slots__:
+            setattr(snapshot, name, getattr(self, name))
+        return snapshot
+    
+    def to_bytes(self, fmt='json', compress=True):
+        """序列化为指定格式的文件内容，compress 只对链码格式有效（zlib压缩数据区）"""
+        if fmt == 'binary':
+            return dumps_binary(*self.to_arrays())
+        if fmt == 'chain':
+            return encode_chain(*self.to_arrays(), compress=compress)
+        if fmt != 'json':
+            raise ValueError(f"未知的路径文件格式: {fmt}")
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False).encode('utf-8')
+    
+    def save_to_file(self, filename, fmt=None, compress=True):
+        """
+        保存到文件（先写临时文件再替换）
+        fmt 为 'json'、'binary' 或 'chain'，默认按扩展名选择（.pbin / .pchain，其余为JSON）
+        """
         try:
-            data = self.to_dict()
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            fmt = fmt or path_format(filename)
+            if fmt == 'binary':
+                # 数组可能映射自要覆盖的文件，先复制到内存
+                self.detach()
+            atomic_write(filename, self.to_bytes(fmt, compress))
             return True
         except Exception as e:
             print(f"保存文件时出错: {str(e)}")
             return False
     
-    def load_from_file(self, filename):
-        """从JSON文件加载"""
+    def load_from_file(self, filename, fmt=None):
+        """从文件加载，fmt 默认按扩展名识别（二进制格式内存映射读取）"""
         try:
+            fmt = fmt or path_format(filename)
+            if fmt != 'json':
+                self.from_arrays(*_load_arrays(filename, fmt))
+                return True
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             self.from_dict(data)
@@ -71,42 +393,28 @@ class PathData:
             return False
     
     def validate_path_data(self):
-        """优化验证性能"""
-        cache_key = (
-            tuple(map(tuple, self.paths)), 
-            tuple(self.endpoints),
-            tuple(self.crosspoints),
-            self.image_size
-        )
-        
-        if cache_key in self._validate_cache:
-            return self._validate_cache[cache_key]
-            
+        """验证路径数据，数据未修改时直接返回上次的结果"""
+        if self._validated is not None and self._validated[0] == self._version:
+            return self._validated[1]
         result = self._do_validate()
-        self._validate_cache[cache_key] = result
+        self._validated = (self._version, result)
         return result
     
     def _do_validate(self):
-        """实际的验证逻辑"""
+        """实际的验证逻辑：每条路径至少两个点，所有坐标在图像范围内（对坐标数组一次比较）"""
         try:
-            if not self.paths or not isinstance(self.paths, list):
+            if not self.paths:
                 return False
             
             if not self.image_size or len(self.image_size) != 3:
                 return False
             
-            # 检查路径点的有效性
-            for path in self.paths:
-                if not path or len(path) < 2:
-                    return False
-                for point in path:
-                    if not isinstance(point, tuple) or len(point) != 2:
-                        return False
-                    x, y = point
-                    if x < 0 or y < 0 or x >= self.image_size[1] or y >= self.image_size[0]:
-                        return False
+            if (self.paths.lengths() < 2).any():
+                return False
             
-            return True
+            points = self.paths.points
+            height, width = self.image_size[:2]
+            return bool(((points >= 0) & (points < (width, height))).all())
         except Exception as e:
             print(f"路径数据验证出错: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
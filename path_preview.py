@@ -5,6 +5,10 @@ from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPu
 from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QMouseEvent
 from PyQt5.QtCore import Qt, QPoint, QRect
 
+from path_data import load_path_dict
+from path_binary import BINARY_EXTENSION
+from path_codec import CHAIN_EXTENSION
+
 class ZoomableLabel(QLabel):
     def __init__(self, main_window):
         super().__init__()
@@ -244,18 +248,17 @@ class PathPreview(QMainWindow):
         self.resize(1000, 800)
 
     def load_json(self):
-        """加载JSON文件"""
+        """加载路径文件（JSON或二进制格式）"""
         file_path, _ = QFileDialog.getOpenFileName(
             self,
-            "选择JSON文件",
+            "选择路径文件",
             "",
-            "JSON Files (*.json)"
+            f"Path Files (*.json *{BINARY_EXTENSION} *{CHAIN_EXTENSION})"
         )
         
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = load_path_dict(file_path)
                 
                 self.paths = data['paths']
                 self.image_size = data['image_size']
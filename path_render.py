@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+def to_polyline(path):
+    """将路径点列表转换为 cv2.polylines 使用的 int32 (N, 1, 2) 数组"""
+    return np.asarray(path, dtype=np.int32).reshape(-1, 1, 2)
+
+def to_polylines(paths):
+    """批量转换路径，序号与输入一一对应"""
+    return [to_polyline(path) for path in paths]
+
+def draw_polylines(image, polylines, color, thickness=1):
+    """同一颜色的所有路径用一次 cv2.polylines 绘制（跳过空路径）"""
+    polylines = [polyline for polyline in polylines if len(polyline) > 0]
+    if polylines:
+        cv2.polylines(image, polylines, False, color, thickness)
+    return image
+
+def draw_paths_cycled(image, polylines, colors, thickness=1):
+    """按序号循环分配颜色，每种颜色一次绘制"""
+    for offset, color in enumerate(colors):
+        draw_polylines(image, polylines[offset::len(colors)], color, thickness)
+    return image
+
+def path_lengths(polyline):
+    """路径的累计弧长 (N,)，首项为0"""
+    points = polyline.reshape(-1, 2).astype(float)
+    steps = np.sqrt(np.sum(np.diff(points, axis=0) ** 2, axis=1))
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+def partial_polyline(polyline, progress, lengths=None):
+    """截取路径从起点开始 progress (0~1) 比例弧长的部分，末端按线性插值补点"""
+    if len(polyline) < 2:
+        return polyline
+    if lengths is None:
+        lengths = path_lengths(polyline)
+
+    target = lengths[-1] * progress
+    # 第一个累计长度不小于目标长度的点即为当前所在线段的终点
+    end = int(np.searchsorted(lengths, target, side='left'))
+    if end == 0:
+        end = 1
+    if end >= len(polyline):
+        return polyline
+
+    points = polyline.reshape(-1, 2)
+    segment_length = lengths[end] - lengths[end - 1]
+    ratio = (target - lengths[end - 1]) / segment_length if segment_length > 0 else 0.0
+    point = points[end - 1] + (points[end] - points[end - 1]) * ratio
+    tip = point.astype(np.int32).reshape(1, 1, 2)
+    return np.concatenate((polyline[:end], tip))
@@ -0,0 +1,81 @@
+import numpy as np
+
+def _point_line_distance(points, starts, ends):
+    """点到直线 (起点, 终点) 的垂直距离；起终点重合（闭合路径）时取到起点的距离"""
+    direction = ends - starts
+    offset = points - starts
+    norm = np.hypot(direction[:, 0], direction[:, 1])
+    cross = np.abs(direction[:, 0] * offset[:, 1] - direction[:, 1] * offset[:, 0])
+    return np.where(norm > 0, cross / np.maximum(norm, 1e-12), np.hypot(offset[:, 0], offset[:, 1]))
+
+def rdp_mask(points, tolerance, offsets=None):
+    """
+    Ramer-Douglas-Peucker简化，返回保留点的布尔掩码
+    points 为所有路径首尾相接的 (N, 2) 数组，offsets 为各路径的起始下标（末项为N）；
+    每轮对所有待处理区间一起求最大偏差点，循环次数只与递归深度有关
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if offsets is None:
+        offsets = np.array([0, len(points)])
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+
+    keep = np.zeros(len(points), dtype=bool)
+    nonempty = lengths > 0
+    keep[offsets[:-1][nonempty]] = True
+    keep[offsets[1:][nonempty] - 1] = True
+    if tolerance <= 0:
+        keep[:] = True
+        return keep
+
+    # 待处理区间 [start, end]，区间内至少有一个中间点
+    long_enough = lengths > 2
+    starts = offsets[:-1][long_enough]
+    ends = offsets[1:][long_enough] - 1
+    while len(starts):
+        counts = ends - starts - 1
+        first = np.cumsum(counts) - counts
+        owner = np.repeat(np.arange(len(starts)), counts)
+        index = np.arange(counts.sum()) - first[owner] + starts[owner] + 1
+
+        distances = _point_line_distance(points[index], points[starts][owner], points[ends][owner])
+        max_distance = np.maximum.reduceat(distances, first)
+
+        # 每个区间取第一个达到最大偏差的点作为分割点
+        candidates = np.flatnonzero(distances == max_distance[owner])
+        _, first_candidate = np.unique(owner[candidates], return_index=True)
+        split = index[candidates[first_candidate]]
+
+        over = max_distance > tolerance
+        keep[split[over]] = True
+        starts, ends = (np.concatenate((starts[over], split[over])),
+                        np.concatenate((split[over], ends[over])))
+        remaining = ends - starts >= 2
+        starts, ends = starts[remaining], ends[remaining]
+
+    return keep
+
+def simplify_path(path, tolerance):
+    """简化单条路径，返回 (x, y) 元组列表"""
+    return simplify_paths([path], tolerance)[0]
+
+def simplify_paths(paths, tolerance):
+    """批量简化路径，首尾点始终保留，返回 (x, y) 元组列表的列表"""
+    lengths = [len(path) for path in paths]
+    if not lengths or sum(lengths) == 0:
+        return [list(path) for path in paths]
+
+    points = np.concatenate([np.asarray(path).reshape(-1, 2) for path in paths if len(path)])
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    keep = rdp_mask(points, tolerance, offsets)
+
+    kept = points[keep].tolist()
+    kept_offsets = np.concatenate(([0], np.cumsum(keep)))[offsets]
+    return [list(map(tuple, kept[kept_offsets[i]:kept_offsets[i + 1]]))
+            for i in range(len(paths))]
+
+def point_reduction(paths, simplified_paths):
+    """统计简化前后的点数，返回 (原点数, 简化后点数, 减少比例)"""
+    before = sum(len(path) for path in paths)
+    after = sum(len(path) for path in simplified_paths)
+    return before, after, (1.0 - after / before) if before else 0.0
@@ -0,0 +1,182 @@
+import itertools
+import threading
+
+from image_cache import image_fingerprint
+
+class ProcessingPipeline:
+    """
+    增量处理流水线：预处理 → 骨架提取 → 路径提取 → 路径简化 → 路径拟合
+    每个阶段记录上游输入和自身参数组成的键，参数变化时只重算受影响的下游阶段，
+    上游阶段直接返回记忆的结果。
+    """
+
+    # 阶段定义：名称 -> (上游阶段, 影响结果的参数)，按执行顺序排列
+    STAGES = {
+        'preprocess': (None, ('threshold', 'noise_kernel_size')),
+        'skeletonize': ('preprocess', ('thinning_backend',)),
+        'extract_paths': ('skeletonize', ('merge_method', 'min_component_size')),
+        'simplify_paths': ('extract_paths', ('simplify_tolerance',)),
+        'fit_paths': ('simplify_paths', ('line_threshold', 'control_dist_factor', 'bezier_tolerance')),
+    }
+
+    DEFAULT_PARAMS = {
+        'threshold': 127,
+        'noise_kernel_size': 3,
+        'thinning_backend': 'zhang-suen',
+        'merge_method': 'cluster',
+        'min_component_size': 0,
+        'simplify_tolerance': 0.0,
+        'line_threshold': 0.98,
+        'control_dist_factor': 0.25,
+        'bezier_tolerance': 2.0,
+    }
+
+    def __init__(self, processor, **params):
+        self.processor = processor
+        self.params = dict(self.DEFAULT_PARAMS)
+        self.params.update(params)
+        # 不影响结果的执行选项（不参与记忆键）
+        self.options = {'workers': 1, 'band_height': 256}
+        self.computed = 0  # 实际计算的阶段次数
+        self.reused = 0    # 直接复用记忆结果的次数
+        self._image = None
+        self._source_key = None
+        self._memo = {}    # 阶段 -> (键, 结果)
+        self._info = {}    # 阶段 -> (键, 附加信息)，如细化实际使用的后端
+        self._seeds = {}   # 外部注入的阶段结果（如从文件加载的路径）
+        self._seed_ids = itertools.count()
+        self._lock = threading.RLock()
+
+    def set_image(self, image):
+        """设置输入图像，清除外部注入的结果"""
+        with self._lock:
+            self._image = image
+            self._source_key = None if image is None else image_fingerprint(image)
+            self._seeds.clear()
+
+    def set_params(self, **params):
+        """更新参数，返回需要重算的阶段列表"""
+        with self._lock:
+            for name in params:
+                if name not in self.params:
+                    raise KeyError(f"未知的流水线参数: {name}")
+            self.params.update(params)
+            return self.dirty_stages()
+
+    def seed(self, stage, result):
+        """直接注入某阶段的结果，其下游以此为输入，上游不再参与"""
+        with self._lock:
+            self._seeds[stage] = (('seed', next(self._seed_ids)), result)
+
+    def unseed(self):
+        """移除所有注入的结果，恢复从输入图像计算"""
+        with self._lock:
+            self._seeds.clear()
+
+    def is_seeded(self, stage):
+        """阶段结果是否为注入的结果"""
+        with self._lock:
+            return stage in self._seeds
+
+    def stage_key(self, stage):
+        """计算阶段的记忆键（上游键 + 本阶段参数）"""
+        if stage in self._seeds:
+            return self._seeds[stage][0]
+        upstream, param_names = self.STAGES[stage]
+        upstream_key = self._source_key if upstream is None else self.stage_key(upstream)
+        if upstream_key is None:
+            return None
+        return (upstream_key, tuple(self.params[name] for name in param_names))
+
+    def is_current(self, stage):
+        """阶段结果是否已是最新"""
+        with self._lock:
+            if stage in self._seeds:
+                return True
+            key = self.stage_key(stage)
+            memo = self._memo.get(stage)
+            return key is not None and memo is not None and memo[0] == key
+
+    def dirty_stages(self):
+        """按执行顺序列出需要重算的阶段"""
+        return [stage for stage in self.STAGES if not self.is_current(stage)]
+
+    def run(self, stage, cancel_token=None, progress=None):
+        """
+        获取阶段结果，只计算缺失或过期的阶段
+        cancel_token: 取消令牌，取消时抛出 ProcessingCancelled，已完成的上游结果仍会记忆
+        progress: 进度回调 progress(阶段名, 0~1)，只对实际计算的阶段调用
+        """
+        return self._run(stage, cancel_token, progress)[1]
+
+    def _run(self, stage, cancel_token=None, progress=None):
+        """返回 (结果实际对应的键, 结果)"""
+        with self._lock:
+            if stage in self._seeds:
+                return self._seeds[stage]
+            key = self.stage_key(stage)
+            if key is None:
+                raise ValueError("流水线尚未设置输入图像")
+            memo = self._memo.get(stage)
+            if memo is not None and memo[0] == key:
+                self.reused += 1
+                return memo
+            upstream, param_names = self.STAGES[stage]
+            # 与键一起取参数快照，计算期间 set_params 不影响本次结果
+            params = {name: self.params[name] for name in param_names}
+            options = dict(self.options)
+            image, source_key = self._image, self._source_key
+
+        # 计算过程不持有锁，避免界面线程读取结果时被长时间阻塞
+        if upstream is None:
+            inputs, upstream_key = image, source_key
+        else:
+            upstream_key, inputs = self._run(upstream, cancel_token, progress)
+        # 上游结果可能来自计算期间更新的参数，按实际输入重新组成键
+        key = (upstream_key, tuple(params.values()))
+        stage_progress = None if progress is None else lambda fraction: progress(stage, fraction)
+        result = self._compute(stage, inputs, params, options, cancel_token, stage_progress)
+        info = self.processor.thinning_info if stage == 'skeletonize' else None
+
+        with self._lock:
+            # 计算期间输入已变化时不记忆该结果
+            if self.stage_key(stage) == key:
+                self._memo[stage] = (key, result)
+                if info is not None:
+                    self._info[stage] = (key, info)
+            self.computed += 1
+        return key, result
+
+    def stage_info(self, stage):
+        """阶段结果的附加信息，结果已过期或没有信息时返回None"""
+        with self._lock:
+            info = self._info.get(stage)
+            if info is None or info[0] != self.stage_key(stage):
+                return None
+            return info[1]
+
+    def clear(self):
+        """清除所有记忆结果"""
+        with self._lock:
+            self._memo.clear()
+            self._info.clear()
+            self._seeds.clear()
+
+    def _compute(self, stage, inputs, params, options, cancel_token=None, progress=None):
+        """用给定的参数和执行选项执行单个阶段"""
+        control = {'cancel_token': cancel_token, 'progress': progress}
+        if stage == 'preprocess':
+            return self.processor.preprocess(inputs, **params, **control)
+        if stage == 'skeletonize':
+            return self.processor.skeletonize(inputs, **params, **options, **control)
+        if stage == 'extract_paths':
+            return self.processor.extract_paths(inputs, **params, workers=options['workers'],
+                                                **control)
+        if stage == 'simplify_paths':
+            paths, endpoints, crosspoints = inputs
+            return (self.processor.simplify_paths(paths, params['simplify_tolerance'], **control),
+                    endpoints, crosspoints)
+        if stage == 'fit_paths':
+            paths, endpoints, crosspoints = inputs
+            return self.processor.fit_paths(paths, endpoints, crosspoints, **params, **control)
+        raise KeyError(f"未知的流水线阶段: {stage}")
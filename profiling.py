@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+# 设置该环境变量为 1 时启动即开启性能分析，为 memory 时同时记录峰值内存；
+# PROFILE_DIR 指定每张图像报告的输出目录
+PROFILE_ENV = 'PATH_EXTRACTOR_PROFILE'
+PROFILE_DIR_ENV = 'PATH_EXTRACTOR_PROFILE_DIR'
+
+class Profiler:
+    """
+    轻量级阶段性能记录
+    每个span记录墙钟时间、线程CPU时间和条目计数；trace_memory 时再用tracemalloc记录峰值内存
+    （包含numpy分配，但会明显拖慢纯Python部分，因此默认关闭）。
+    未开启时span和装饰器只做一次布尔判断。峰值内存是全局统计，多线程同时运行时会偏大。
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = False
+        self.trace_memory = trace_memory
+        self.records = []
+        self.label = None  # 当前记录对应的图像
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if enabled:
+            self.enable()
+
+    def enable(self, trace_memory=None):
+        if trace_memory is not None:
+            self.trace_memory = trace_memory
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def set_enabled(self, enabled):
+        if enabled:
+            self.enable()
+        else:
+            self.disable()
+
+    def begin(self, label):
+        """开始记录新图像，清除之前的记录"""
+        with self._lock:
+            self.label = label
+            self.records = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **counts):
+        """
+        记录一个阶段；可在with块内向产出的字典补充计数：
+            with profiler.span('stage') as counts: counts['paths'] = n
+        """
+        if not self.enabled:
+            yield counts
+            return
+
+        stack = self._stack()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        start_memory = 0
+        if tracing:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            # 子阶段重置峰值前，先把父阶段到目前为止的峰值保存下来
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        frame = {'peak': 0}
+        stack.append(frame)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield counts
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            stack.pop()
+            peak = frame['peak']
+            if tracing and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            record = {
+                'name': name,
+                'wall_ms': round(wall * 1000, 3),
+                'cpu_ms': round(cpu * 1000, 3),
+                'peak_mb': round(max(peak - start_memory, 0) / 1e6, 3) if tracing else None,
+                'counts': counts,
+                'thread': threading.current_thread().name,
+                'depth': len(stack),
+            }
+            with self._lock:
+                self.records.append(record)
+
+    def summary(self):
+        """状态栏使用的简短汇总：各阶段累计墙钟时间"""
+        with self._lock:
+            records = [record for record in self.records if record['depth'] == 0]
+        totals = {}
+        for record in records:
+            totals[record['name']] = totals.get(record['name'], 0.0) + record['wall_ms']
+        return ' | '.join(f"{name} {wall:.1f}ms" for name, wall in totals.items())
+
+    def to_dict(self):
+        with self._lock:
+            records = list(self.records)
+        totals = {}
+        for record in records:
+            total = totals.setdefault(record['name'], {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                                                      'peak_mb': None})
+            total['calls'] += 1
+            total['wall_ms'] = round(total['wall_ms'] + record['wall_ms'], 3)
+            total['cpu_ms'] = round(total['cpu_ms'] + record['cpu_ms'], 3)
+            if record['peak_mb'] is not None:
+                total['peak_mb'] = max(total['peak_mb'] or 0.0, record['peak_mb'])
+        return {'image': self.label, 'spans': records, 'totals': totals}
+
+    def dump_json(self, filename):
+        """将当前记录保存为JSON"""
+        try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"保存性能报告时出错: {str(e)}")
+            return False
+
+# 全局记录器，各模块共享
+_profile_mode = os.environ.get(PROFILE_ENV, '').lower()
+profiler = Profiler(enabled=_profile_mode not in ('', '0'), trace_memory=_profile_mode == 'memory')
+
+def profiled(name, counter=None):
+    """
+    方法装饰器：开启性能分析时将调用记录为一个span
+    counter(result, *args, **kwargs) 返回计数字典（如像素数、路径数）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.span(name) as counts:
+                result = func(*args, **kwargs)
+                if counter is not None:
+                    try:
+                        counts.update(counter(result, *args, **kwargs))
+                    except Exception:
+                        pass
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,206 @@
+import cv2
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from task_control import check_cancelled, report_progress
+
+# 8邻域偏移量 (dx, dy)
+_NEIGHBOR_OFFSETS = [(-1, -1), (0, -1), (1, -1),
+                     (-1, 0),           (1, 0),
+                     (-1, 1),  (0, 1),  (1, 1)]
+
+class SkeletonGraph:
+    """
+    骨架像素图
+    以骨架像素为顶点、m邻接（对角邻居只在没有公共4邻居时相连）为边构建CSR邻接矩阵，
+    度不为2的像素组成节点（端点/交叉点，相邻的交叉像素合并为一个节点），
+    度为2的像素串成边，每条边就是一条路径。
+    cancel_token / progress 为可选的取消令牌和进度回调（0~1），在逐条追踪边时使用。
+    """
+
+    def __init__(self, binary, cancel_token=None, progress=None):
+        binary = np.asarray(binary)
+        if binary.ndim > 2:
+            binary = cv2.cvtColor(binary, cv2.COLOR_RGB2GRAY)
+        skeleton = (binary > 0).astype(np.uint8)
+        self.shape = skeleton.shape
+
+        # 骨架像素坐标 (x, y)，按行优先顺序
+        points = cv2.findNonZero(skeleton)
+        self.points = (points.reshape(-1, 2) if points is not None
+                       else np.empty((0, 2), dtype=np.int32))
+        n_points = len(self.points)
+
+        self.adjacency = self._build_adjacency(skeleton)
+        self.degree = np.diff(self.adjacency.indptr)
+
+        # 节点标记：端点各自成为节点，相邻的交叉像素合并为同一节点
+        self.node_labels = np.full(n_points, -1, dtype=np.int64)
+        self.edge_labels = np.full(n_points, -1, dtype=np.int64)
+        self.node_points = np.empty((0, 2))
+        self.node_degree = np.empty(0, dtype=np.int64)
+        self.n_junctions = 0
+        self.edges = []  # (起始节点, 结束节点, 像素索引数组)
+        if n_points == 0:
+            return
+
+        self._label_nodes()
+        report_progress(progress, 0.3)
+        self._label_edges(cancel_token, progress)
+        report_progress(progress, 1.0)
+
+    def _build_adjacency(self, skeleton):
+        """批量构建m邻接的CSR邻接矩阵"""
+        height, width = skeleton.shape
+        n_points = len(self.points)
+
+        # 带一圈背景的像素索引图，越界邻居自然落在背景上
+        index = np.full((height + 2, width + 2), -1, dtype=np.int32)
+        xs = self.points[:, 0].astype(np.int64)
+        ys = self.points[:, 1].astype(np.int64)
+        index[ys + 1, xs + 1] = np.arange(n_points, dtype=np.int32)
+
+        rows = []
+        cols = []
+        for dx, dy in _NEIGHBOR_OFFSETS:
+            neighbor = index[ys + 1 + dy, xs + 1 + dx]
+            valid = neighbor >= 0
+            if dx and dy:
+                # 对角邻居：存在公共4邻居时已经通过它连通，不再直接相连
+                valid &= index[ys + 1, xs + 1 + dx] < 0
+                valid &= index[ys + 1 + dy, xs + 1] < 0
+            rows.append(np.flatnonzero(valid))
+            cols.append(neighbor[valid])
+
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        return csr_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+            shape=(n_points, n_points)
+        )
+
+    def _label_nodes(self):
+        """标记节点：度为1的端点和度≥3的交叉像素连通块"""
+        is_junction = self.degree >= 3
+        junction_index = np.flatnonzero(is_junction)
+
+        # 交叉像素之间的连通分量
+        sub = self.adjacency[junction_index][:, junction_index]
+        n_junctions, junction_labels = connected_components(sub, directed=False)
+        self.node_labels[junction_index] = junction_labels
+        self.n_junctions = n_junctions
+
+        endpoint_index = np.flatnonzero(self.degree == 1)
+        self.node_labels[endpoint_index] = n_junctions + np.arange(len(endpoint_index))
+
+        # 节点位置取像素质心
+        node_index = np.flatnonzero(self.node_labels >= 0)
+        labels = self.node_labels[node_index]
+        n_nodes = n_junctions + len(endpoint_index)
+        counts = np.bincount(labels, minlength=n_nodes)
+        self.node_points = np.column_stack([
+            np.bincount(labels, weights=self.points[node_index, axis], minlength=n_nodes)
+            for axis in range(2)
+        ]) / np.maximum(counts, 1)[:, None]
+        self.node_degree = np.zeros(n_nodes, dtype=np.int64)
+
+    def _label_edges(self, cancel_token=None, progress=None):
+        """标记边：度为2的像素连通分量即为边，再沿邻接关系排出像素顺序"""
+        indptr = self.adjacency.indptr
+        indices = self.adjacency.indices
+        is_node = self.node_labels >= 0
+
+        chain_index = np.flatnonzero(self.degree == 2)
+        sub = self.adjacency[chain_index][:, chain_index]
+        n_chains, chain_labels = connected_components(sub, directed=False)
+        self.edge_labels[chain_index] = chain_labels
+
+        # 每条链上与节点相邻的像素为链端；没有链端的链是闭合环
+        neighbor_pairs = indices[indptr[chain_index][:, None] + np.arange(2)]
+        touches_node = is_node[neighbor_pairs].any(axis=1)
+        # 取序号最小的链端作为起点，闭合环取序号最小的像素，保证结果确定
+        unset = np.iinfo(np.int64).max
+        chain_start = np.full(n_chains, unset, dtype=np.int64)
+        np.minimum.at(chain_start, chain_labels[touches_node], chain_index[touches_node])
+        cycles = chain_start == unset
+        if cycles.any():
+            chain_min = np.full(n_chains, unset, dtype=np.int64)
+            np.minimum.at(chain_min, chain_labels, chain_index)
+            chain_start[cycles] = chain_min[cycles]
+
+        first_neighbor = np.zeros(len(self.points), dtype=np.int64)
+        second_neighbor = np.zeros(len(self.points), dtype=np.int64)
+        first_neighbor[chain_index] = neighbor_pairs[:, 0]
+        second_neighbor[chain_index] = neighbor_pairs[:, 1]
+        first_neighbor = first_neighbor.tolist()
+        second_neighbor = second_neighbor.tolist()
+        is_node_list = is_node.tolist()
+
+        for count, start in enumerate(chain_start.tolist()):
+            # 每追踪256条链检查一次取消并报告进度
+            if count % 256 == 0:
+                check_cancelled(cancel_token)
+                report_progress(progress, 0.3 + 0.7 * count / n_chains)
+            a, b = first_neighbor[start], second_neighbor[start]
+            if is_node_list[a] or is_node_list[b]:
+                # 从链端出发，前一个像素为相邻节点
+                prev = a if is_node_list[a] else b
+                pixels = [prev, start]
+                closed = False
+            else:
+                # 闭合环：任选方向绕行一周
+                prev = a
+                pixels = [start]
+                closed = True
+
+            current = start
+            while True:
+                a, b = first_neighbor[current], second_neighbor[current]
+                nxt = b if a == prev else a
+                if closed and nxt == start:
+                    pixels.append(start)
+                    break
+                pixels.append(nxt)
+                if is_node_list[nxt]:
+                    break
+                prev, current = current, nxt
+
+            self._add_edge(np.array(pixels, dtype=np.int64), closed)
+
+        # 两个不同节点的像素直接相邻时，也构成一条边
+        coo = self.adjacency.tocoo()
+        direct = ((coo.row < coo.col) & is_node[coo.row] & is_node[coo.col] &
+                  (self.node_labels[coo.row] != self.node_labels[coo.col]))
+        for u, v in zip(coo.row[direct].tolist(), coo.col[direct].tolist()):
+            self._add_edge(np.array([u, v], dtype=np.int64), False)
+
+    def _add_edge(self, pixels, closed):
+        """记录一条边并更新节点度数"""
+        if closed:
+            start_node = end_node = -1
+        else:
+            start_node = int(self.node_labels[pixels[0]])
+            end_node = int(self.node_labels[pixels[-1]])
+            self.node_degree[start_node] += 1
+            self.node_degree[end_node] += 1
+        self.edges.append((start_node, end_node, pixels))
+
+    @property
+    def endpoints(self):
+        """度为1的端点坐标 (N, 2)"""
+        return self.points[self.degree == 1]
+
+    @property
+    def junctions(self):
+        """交叉节点的质心坐标 (N, 2)"""
+        return self.node_points[:self.n_junctions]
+
+    def edge_points(self, edge_index):
+        """返回指定边的像素坐标数组 (N, 2)"""
+        return self.points[self.edges[edge_index][2]]
+
+    def paths(self):
+        """以 (x, y) 元组列表的形式返回所有边"""
+        return [list(map(tuple, self.points[pixels].tolist()))
+                for _, _, pixels in self.edges]
@@ -0,0 +1,142 @@
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+def _endpoints(paths):
+    """各路径的首尾点，返回两个 (n, 2) 数组"""
+    starts = np.array([path[0] for path in paths], dtype=float).reshape(-1, 2)
+    ends = np.array([path[-1] for path in paths], dtype=float).reshape(-1, 2)
+    return starts, ends
+
+def _distances(a, b):
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+def travel_distance(paths, order=None, reversed_flags=None):
+    """按给定顺序和方向绘制时，相邻路径之间抬笔移动的总距离（不含到第一条路径的移动）"""
+    paths = [path for path in paths if len(path)]
+    if len(paths) < 2:
+        return 0.0
+    starts, ends = _endpoints(paths)
+    if order is None:
+        order = np.arange(len(paths))
+    if reversed_flags is None:
+        reversed_flags = np.zeros(len(order), dtype=bool)
+    entry = np.where(reversed_flags[:, None], ends[order], starts[order])
+    exit_ = np.where(reversed_flags[:, None], starts[order], ends[order])
+    return float(_distances(exit_[:-1], entry[1:]).sum())
+
+def _nearest_neighbor_tour(starts, ends, origin):
+    """
+    最近邻贪心：从离 origin 最近的端点出发，每次走到未绘制路径中最近的端点
+    端点放入KD树，查询近邻时逐步扩大k跳过已访问的路径
+    返回 (顺序, 是否反向)
+    """
+    n = len(starts)
+    points = np.concatenate((starts, ends))  # 第i条路径：起点i，终点n+i
+    tree = cKDTree(points)
+    visited = np.zeros(n, dtype=bool)
+    order = np.empty(n, dtype=np.int64)
+    flipped = np.empty(n, dtype=bool)
+
+    position = origin
+    for step in range(n):
+        k = 8
+        while True:
+            k = min(k, 2 * n)
+            _, candidates = tree.query(position, k=k)
+            candidates = np.atleast_1d(candidates)
+            free = candidates[~visited[candidates % n]]
+            if len(free) or k >= 2 * n:
+                break
+            k *= 4
+        best = int(free[0])
+        index = best % n
+        visited[index] = True
+        order[step] = index
+        flipped[step] = best >= n
+        # 反向绘制时从终点进入、起点离开
+        position = starts[index] if flipped[step] else ends[index]
+    return order, flipped
+
+def _two_opt(starts, ends, order, flipped, max_passes=20, time_limit=2.0):
+    """
+    带方向的2-opt：反转顺序中的一段路径（段内每条路径同时反向），
+    只改变段两端的两次抬笔移动；每个起点一次性计算所有候选终点的收益
+    """
+    n = len(order)
+    entry = np.where(flipped[:, None], ends[order], starts[order])
+    exit_ = np.where(flipped[:, None], starts[order], ends[order])
+    deadline = time.perf_counter() + time_limit
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n):
+            if time.perf_counter() > deadline:
+                return order, flipped
+            # 反转 [i, j]：前一条的出口改连段尾的出口，段首的入口改连后一条的入口
+            j = np.arange(i, n)
+            gain = np.zeros(len(j))
+            if i > 0:
+                gain += _distances(exit_[i - 1], entry[i]) - _distances(exit_[i - 1], exit_[j])
+            inner = j < n - 1
+            following = j[inner] + 1
+            gain[inner] += (_distances(exit_[j[inner]], entry[following]) -
+                            _distances(entry[i], entry[following]))
+            best = int(np.argmax(gain))
+            if gain[best] <= 1e-9:
+                continue
+            j = i + best
+            order[i:j + 1] = order[i:j + 1][::-1].copy()
+            flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+            entry[i:j + 1], exit_[i:j + 1] = exit_[i:j + 1][::-1].copy(), entry[i:j + 1][::-1].copy()
+            improved = True
+        if not improved:
+            break
+    return order, flipped
+
+def optimize_order(paths, origin=(0, 0), max_passes=20, time_limit=2.0):
+    """
+    计算抬笔移动最短的绘制顺序和方向：KD树最近邻构造初始顺序，再用2-opt改进
+    返回 (顺序, 是否反向)；空路径排在最后
+    """
+    nonempty = np.array([i for i, path in enumerate(paths) if len(path)], dtype=np.int64)
+    empty = np.array([i for i, path in enumerate(paths) if not len(path)], dtype=np.int64)
+    if len(nonempty) < 2:
+        order = np.concatenate((nonempty, empty))
+        return order, np.zeros(len(order), dtype=bool)
+
+    starts, ends = _endpoints([paths[i] for i in nonempty])
+    order, flipped = _nearest_neighbor_tour(starts, ends, np.asarray(origin, dtype=float))
+    order, flipped = _two_opt(starts, ends, order, flipped, max_passes, time_limit)
+    return (np.concatenate((nonempty[order], empty)),
+            np.concatenate((flipped, np.zeros(len(empty), dtype=bool))))
+
+def apply_order(paths, order, reversed_flags):
+    """按顺序重排路径，反向的路径点序颠倒"""
+    return [list(paths[i])[::-1] if flip else paths[i] for i, flip in zip(order, reversed_flags)]
+
+def plan_order(paths, origin=(0, 0), max_passes=20, time_limit=2.0):
+    """
+    计算绘制顺序和方向，返回 (顺序, 是否反向, 统计)
+    统计包含 before / after（抬笔移动距离，像素）、saved 和 ratio（节省比例）；
+    优化结果比原顺序差时返回原顺序
+    """
+    before = travel_distance(paths)
+    order, reversed_flags = optimize_order(paths, origin, max_passes, time_limit)
+    after = travel_distance(apply_order(paths, order, reversed_flags))
+    if after > before:
+        order = np.arange(len(paths))
+        reversed_flags = np.zeros(len(paths), dtype=bool)
+        after = before
+    stats = {
+        'before': before,
+        'after': after,
+        'saved': before - after,
+        'ratio': (before - after) / before if before > 0 else 0.0,
+    }
+    return order, reversed_flags, stats
+
+def order_paths(paths, origin=(0, 0), max_passes=20, time_limit=2.0):
+    """优化路径绘制顺序，返回 (重排后的路径, 统计)，统计同 plan_order"""
+    order, reversed_flags, stats = plan_order(paths, origin, max_passes, time_limit)
+    return apply_order(paths, order, reversed_flags), stats
@@ -0,0 +1,35 @@
+import threading
+
+class ProcessingCancelled(BaseException):
+    """
+    处理已被取消
+    继承BaseException，各阶段内部的 except Exception 错误处理不会把取消当作普通错误吞掉
+    """
+
+class CancelToken:
+    """协作式取消令牌：界面线程调用cancel，处理函数在循环中调用check"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """已取消时抛出 ProcessingCancelled"""
+        if self._event.is_set():
+            raise ProcessingCancelled()
+
+def check_cancelled(cancel_token):
+    """cancel_token 为None时不做检查"""
+    if cancel_token is not None:
+        cancel_token.check()
+
+def report_progress(progress, fraction):
+    """progress 为None时忽略；fraction 限制在 [0, 1]"""
+    if progress is not None:
+        progress(min(max(fraction, 0.0), 1.0))
@@ -0,0 +1,122 @@
+import time
+import threading
+import cv2
+import numpy as np
+from skimage.morphology import skeletonize as sk_skeletonize
+from skimage.morphology import thin as sk_thin
+
+from task_control import check_cancelled
+
+# 细化后端注册表：名称 -> 函数(image, cancel_token, progress)
+# image 为0/1的uint8图像（可原地修改），返回0/1的uint8骨架
+BACKENDS = {}
+# 拓扑校验的参照后端（由 image_processor 注册）
+REFERENCE_BACKEND = 'zhang-suen'
+
+_calibrations = {}  # 尺寸档位 -> 校准结果
+_lock = threading.Lock()
+
+def register_backend(name, func):
+    """注册细化后端，同名后端会被替换"""
+    BACKENDS[name] = func
+
+def available_backends():
+    return list(BACKENDS)
+
+def _skimage_skeletonize(image, cancel_token=None, progress=None):
+    return sk_skeletonize(image.astype(bool)).astype(np.uint8)
+
+def _skimage_thin(image, cancel_token=None, progress=None):
+    return sk_thin(image.astype(bool)).astype(np.uint8)
+
+register_backend('skimage-skeletonize', _skimage_skeletonize)
+register_backend('skimage-thin', _skimage_thin)
+
+# opencv-contrib 提供 ximgproc 时注册其细化实现
+if hasattr(cv2, 'ximgproc'):
+    def _ximgproc_thinning(thinning_type):
+        def thinning(image, cancel_token=None, progress=None):
+            return cv2.ximgproc.thinning(image * 255, thinningType=thinning_type) // 255
+        return thinning
+
+    register_backend('ximgproc-zhangsuen', _ximgproc_thinning(cv2.ximgproc.THINNING_ZHANGSUEN))
+    register_backend('ximgproc-guohall', _ximgproc_thinning(cv2.ximgproc.THINNING_GUOHALL))
+
+def run_backend(name, image, cancel_token=None, progress=None):
+    """用指定后端细化0/1图像（不修改输入），返回 (0/1骨架, 耗时ms)"""
+    if name not in BACKENDS:
+        raise KeyError(f"未知的细化后端: {name}")
+    start = time.perf_counter()
+    skeleton = BACKENDS[name](image.copy(), cancel_token, progress)
+    return skeleton, (time.perf_counter() - start) * 1000
+
+def topology_signature(skeleton):
+    """骨架的拓扑特征：(8连通分量数, 4连通背景中的孔洞数)"""
+    foreground = (skeleton > 0).astype(np.uint8)
+    components = cv2.connectedComponents(foreground, connectivity=8)[0] - 1
+    # 外围补一圈背景，保证外部背景只算一个分量
+    background = cv2.copyMakeBorder(1 - foreground, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=1)
+    holes = cv2.connectedComponents(background, connectivity=4)[0] - 2
+    return components, max(holes, 0)
+
+def size_bucket(shape):
+    """按像素数的2的幂划分尺寸档位，同一档位共用一次校准"""
+    return int(np.log2(max(shape[0] * shape[1], 1)))
+
+def calibrate(image, backends=None, cancel_token=None):
+    """
+    在图像上运行各后端，选出与参照后端拓扑一致的最快后端
+    返回 (校准结果, 所选后端的骨架)；校准结果包含 backend、ms、timings 和 rejected
+    """
+    names = backends or available_backends()
+    if REFERENCE_BACKEND in names:
+        names = [REFERENCE_BACKEND] + [name for name in names if name != REFERENCE_BACKEND]
+
+    reference = None
+    timings = {}
+    rejected = []
+    best = None
+    for name in names:
+        check_cancelled(cancel_token)
+        try:
+            skeleton, elapsed = run_backend(name, image, cancel_token)
+        except Exception as e:
+            print(f"细化后端 {name} 出错: {str(e)}")
+            rejected.append(name)
+            continue
+        timings[name] = round(elapsed, 3)
+        signature = topology_signature(skeleton)
+        if reference is None:
+            reference = signature
+        elif signature != reference:
+            rejected.append(name)
+            continue
+        if best is None or elapsed < best[1]:
+            best = (name, elapsed, skeleton)
+
+    if best is None:
+        raise RuntimeError("没有可用的细化后端")
+    calibration = {'backend': best[0], 'ms': timings[best[0]],
+                   'timings': timings, 'rejected': rejected}
+    return calibration, best[2]
+
+def select_backend(image, cancel_token=None):
+    """
+    返回图像尺寸档位对应的后端：首次遇到该档位时校准并缓存
+    返回 (校准结果, 骨架或None)，只有本次执行了校准时才返回骨架
+    """
+    bucket = size_bucket(image.shape)
+    with _lock:
+        calibration = _calibrations.get(bucket)
+    if calibration is not None:
+        return calibration, None
+
+    calibration, skeleton = calibrate(image, cancel_token=cancel_token)
+    with _lock:
+        _calibrations.setdefault(bucket, calibration)
+    return calibration, skeleton
+
+def reset_calibration():
+    """清除校准结果（如注册了新后端后）"""
+    with _lock:
+        _calibrations.clear()